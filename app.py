@@ -2,61 +2,167 @@ from flask import Flask, request, jsonify
 from twilio.twiml.messaging_response import MessagingResponse
 from dotenv import load_dotenv
 import os
+import atexit
 import logging
-from handlers.message_handler import MessageHandler
-from handlers.audio_handler import AudioHandler
+from concurrent.futures import TimeoutError as FutureTimeout
+from services.registry import registry
+from services.twilio_sender import TwilioSender
+from utils.sharded_dispatcher import ShardedDispatcher
+from utils.dedup_cache import DedupCache
 from utils.logger import setup_logger
 
 load_dotenv()
 logger = setup_logger()
 
 app = Flask(__name__)
-message_handler = MessageHandler()
-audio_handler = AudioHandler()
+message_handler = registry.message_handler
+audio_handler = registry.audio_handler
+
+# Recarrega data/properties.json (ou aplica o feed de CATALOG_FEED_PATH) sem reiniciar o bot
+if os.environ.get('CATALOG_WATCH', 'false').lower() in ('1', 'true', 'sim') or os.environ.get('CATALOG_FEED_PATH'):
+    registry.catalog_watcher.start()
+
+# Expira em segundo plano as conversas paradas (CONTEXT_TIMEOUT_HOURS)
+context_manager = registry.context_manager.start()
+atexit.register(context_manager.stop)
+
+# Modo assíncrono: o webhook só enfileira e a resposta sai pela API REST
+ASYNC_WEBHOOK = os.environ.get('ASYNC_WEBHOOK', 'false').lower() in ('1', 'true', 'sim')
+ERROR_TEXT = "Ops! Tive um probleminha aqui... \U0001F605 Digite 'oi' para recomeçar!"
+BUSY_TEXT = "Estou com muitas mensagens agora! \U0001F605 Me manda de novo em alguns segundinhos?"
+# Modo síncrono: espera no máximo isso pela resposta (o Twilio desiste do webhook em 15s);
+# o que passar disso é entregue depois pela API REST
+SYNC_REPLY_TIMEOUT = float(os.environ.get('SYNC_REPLY_TIMEOUT', 10))
+
+# Mensagens do mesmo número sempre caem no mesmo shard e são processadas em ordem
+dispatcher = ShardedDispatcher(
+    num_shards=int(os.environ.get('WEBHOOK_WORKERS', 4)),
+    max_queue=int(os.environ.get('WEBHOOK_QUEUE_SIZE', 100)),
+    name='webhook'
+)
+# Também no modo síncrono: entrega as respostas que passaram do SYNC_REPLY_TIMEOUT
+twilio_sender = TwilioSender()
+
+# Retries do Twilio chegam com o mesmo MessageSid e reaproveitam o resultado
+dedup_cache = DedupCache(
+    max_size=int(os.environ.get('DEDUP_CACHE_SIZE', 10000)),
+    ttl=int(os.environ.get('DEDUP_TTL_SECONDS', 600))
+)
+
+def build_reply(incoming):
+    """Processa a mensagem recebida e retorna (texto, mídias)"""
+    incoming_msg = incoming['body']
+    from_number = incoming['from']
+
+    if incoming['num_media'] > 0:
+        media_url = incoming['media_url']
+        media_type = incoming['media_type']
+
+        if 'audio' in media_type.lower():
+            result = audio_handler.process_audio(media_url, from_number)
+        else:
+            # Usa emoji unicode
+            return "Recebi sua mídia! Me conta o que você procura! \U0001F3E0", []
+    else:
+        result = message_handler.process_message(incoming_msg, from_number)
+
+    if isinstance(result, dict):
+        return result.get('text', ''), result.get('media', [])
+    return result, []
+
+def process_and_send(incoming):
+    """Executado no worker: processa e responde via API REST"""
+    try:
+        response_text, media_urls = build_reply(incoming)
+    except Exception as e:
+        logger.error(f"Erro ao processar mensagem: {str(e)}", exc_info=True)
+        response_text, media_urls = ERROR_TEXT, []
+
+    twilio_sender.send(incoming['from'], incoming['to'], response_text, media_urls[:3])
+
+def send_late_reply(incoming, future):
+    """Callback da tarefa que passou do SYNC_REPLY_TIMEOUT: envia a resposta pela API REST"""
+    try:
+        response_text, media_urls = future.result()
+    except Exception as e:
+        logger.error(f"Erro ao processar mensagem: {str(e)}", exc_info=True)
+        response_text, media_urls = ERROR_TEXT, []
+
+    try:
+        twilio_sender.send(incoming['from'], incoming['to'], response_text, media_urls[:3])
+    except Exception as e:
+        logger.error(f"Erro ao enviar resposta atrasada para {incoming['from']}: {str(e)}")
+
+def _read_incoming():
+    """Copia os campos do request (o contexto do Flask não sobrevive ao worker)"""
+    return {
+        'sid': request.values.get('MessageSid', ''),
+        'body': request.values.get('Body', '').strip(),
+        'from': request.values.get('From', ''),
+        'to': request.values.get('To', ''),
+        'num_media': int(request.values.get('NumMedia', 0)),
+        'media_url': request.values.get('MediaUrl0', ''),
+        'media_type': request.values.get('MediaContentType0', '')
+    }
 
 @app.route("/webhook", methods=["POST"])
 def whatsapp_webhook():
     try:
-        incoming_msg = request.values.get('Body', '').strip()
-        from_number = request.values.get('From', '')
-        num_media = int(request.values.get('NumMedia', 0))
-        
-        logger.info(f"Mensagem de {from_number}: {incoming_msg[:50]}...")
-        
+        incoming = _read_incoming()
+
+        logger.info(f"Mensagem de {incoming['from']}: {incoming['body'][:50]}...")
+
         resp = MessagingResponse()
-        
-        if num_media > 0:
-            media_url = request.values.get('MediaUrl0', '')
-            media_type = request.values.get('MediaContentType0', '')
-            
-            if 'audio' in media_type.lower():
-                result = audio_handler.process_audio(media_url, from_number)
-                response_text = result if isinstance(result, str) else result.get('text', '')
-                msg = resp.message(response_text)
-            else:
-                # Usa emoji unicode
-                msg = resp.message("Recebi sua mídia! Me conta o que você procura! \U0001F3E0")
+
+        job = process_and_send if ASYNC_WEBHOOK else build_reply
+        submit = lambda: dispatcher.submit(incoming['from'], job, incoming)
+
+        if incoming['sid']:
+            future, created = dedup_cache.get_or_create(incoming['sid'], submit)
+            if not created:
+                logger.info(f"Retry de {incoming['sid']} - reaproveitando resultado")
         else:
-            result = message_handler.process_message(incoming_msg, from_number)
-            
-            if isinstance(result, dict):
-                response_text = result.get('text', '')
-                media_urls = result.get('media', [])
-                
-                msg = resp.message(response_text)
-                
-                for media_url in media_urls[:3]:
-                    msg.media(media_url)
-            else:
-                msg = resp.message(result)
-        
+            future, created = submit(), True
+
+        if future is None:
+            logger.warning(f"Fila do webhook cheia para {incoming['from']}")
+            resp.message(BUSY_TEXT)
+            return str(resp)
+
+        if ASYNC_WEBHOOK:
+            # TwiML vazio: a resposta vai pela API REST
+            return str(resp)
+
+        try:
+            result = future.result(timeout=SYNC_REPLY_TIMEOUT)
+        except FutureTimeout:
+            # O Twilio não repete um webhook respondido com 200: a tarefa continua no shard
+            # e a resposta sai pela API REST quando ficar pronta (uma vez só, por quem a criou)
+            logger.warning(f"Resposta para {incoming['from']} passou de {SYNC_REPLY_TIMEOUT}s")
+            if not twilio_sender.configured:
+                # Sem credenciais a resposta atrasada é descartada: o cliente precisa reenviar
+                resp.message(BUSY_TEXT)
+            elif created:
+                future.add_done_callback(lambda done: send_late_reply(incoming, done))
+            return str(resp)
+
+        if result is None:
+            resp.message(BUSY_TEXT)
+            return str(resp)
+
+        response_text, media_urls = result
+        msg = resp.message(response_text)
+
+        for media_url in media_urls[:3]:
+            msg.media(media_url)
+
         return str(resp)
-        
+
     except Exception as e:
         logger.error(f"Erro no webhook: {str(e)}", exc_info=True)
         resp = MessagingResponse()
         # Emoji unicode
-        msg = resp.message("Ops! Tive um probleminha aqui... \U0001F605 Digite 'oi' para recomeçar!")
+        msg = resp.message(ERROR_TEXT)
         return str(resp)
 
 @app.route("/", methods=["GET"])
@@ -65,7 +171,25 @@ def home():
         "status": "online",
         "service": "Tony - Bot Imobiliário Inteligente",
         "version": "4.0",
-        "personality": "friendly"
+        "personality": "friendly",
+        "async_webhook": ASYNC_WEBHOOK
+    })
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return jsonify({
+        "dispatcher": dispatcher.stats(),
+        "dedup_cache": dedup_cache.stats(),
+        "services": registry.stats(),
+        "search_cache": registry.property_service.cache_stats(),
+        "conversations": registry.conversations.stats(),
+        "contexts": context_manager.stats(),
+        "nlu": message_handler.analyzer.stats(),
+        "intents": registry.ai_service.intents.stats(),
+        "catalog": {
+            "version": registry.property_service.version,
+            "listings": registry.property_service.count()
+        }
     })
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark do KeywordMatcher (Aho-Corasick) contra os loops de substring antigos
+Execute: python benchmarks/bench_keyword_matcher.py [mensagens]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import keyword_matcher
+from utils.keyword_matcher import KeywordMatcher
+# Tabelas dos classificadores, para os loops antigos
+from services import lead_scorer, sentiment_analyzer, language_detector, image_service
+from utils import button_builder
+from handlers import message_handler
+
+MESSAGES = [
+    "oi, bom dia! quero um apartamento de 3 quartos no centro",
+    "preciso alugar uma casa urgente, tenho filhos e minha esposa está grávida",
+    "quanto é a entrada? dá para financiar? gostei muito do AP001",
+    "tem cobertura com vista para o mar em jurerê? quero visitar hoje",
+    "manda fotos da casa verde por favor, adorei o tour 360",
+    "hello, how much is the rent for this apartment?",
+    "hola, cuánto cuesta el alquiler de la casa?",
+    "o atendimento foi péssimo, não gostei, tive um problema com a visita",
+    "abaixo de 600 mil, 2 quartos, perto da praia, à vista",
+    "obrigado! perfeito, é esse mesmo, quero fechar agora",
+]
+
+def legacy_scan(text):
+    """Os loops de substring de cada classificador, como eram antes"""
+    text_lower = text.lower()
+    hits = 0
+    for words in message_handler.KEYWORDS.values():
+        hits += any(word in text_lower for word in words)
+    for keywords in lead_scorer.HOT_SIGNALS.values():
+        for keyword in keywords:
+            hits += keyword in text_lower
+    for words in sentiment_analyzer.KEYWORDS.values():
+        hits += sum(1 for word in words if word in text_lower)
+    for patterns in language_detector.LANGUAGE_PATTERNS.values():
+        hits += sum(1 for word in patterns if word in text_lower)
+    hits += any(keyword in text_lower for keyword in image_service.IMAGE_KEYWORDS)
+    for words in button_builder.KEYWORDS.values():
+        hits += any(word in text_lower for word in words)
+    return hits
+
+def timed(fn, texts):
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(42)
+    # Variações para não medir só o cache
+    texts = [f"{rng.choice(MESSAGES)} {rng.randint(1, 10 ** 6)}" for _ in range(n)]
+    
+    matcher = keyword_matcher.shared()
+    uncached = KeywordMatcher(keyword_matcher._tables, cache_size=0)
+    total = sum(len(keywords) for keywords in keyword_matcher._tables.values())
+    print(f"🔤 {total} palavras-chave em {len(keyword_matcher._tables)} categorias, {n} mensagens\n")
+    
+    namespaces = ('handler', 'lead', 'sentiment', 'language', 'image', 'buttons')
+    
+    def pipeline(text):
+        # Cada classificador consulta a mesma mensagem: uma varredura, o resto vem do cache
+        for namespace in namespaces:
+            keyword_matcher.match(text, namespace)
+    
+    before = timed(legacy_scan, texts)
+    scan = timed(uncached.match, texts)
+    full = timed(pipeline, texts)
+    cached = timed(matcher.match, texts[:len(MESSAGES)] * (n // len(MESSAGES)))
+    print(f"{'método':<46} {'µs/mensagem':>12} {'ganho':>7}")
+    print(f"{'loops de substring (antes)':<46} {before:>12.1f} {'':>7}")
+    print(f"{'Aho-Corasick, uma passada sem cache':<46} {scan:>12.1f} {before / scan:>6.1f}x")
+    print(f"{'Aho-Corasick, 6 classificadores na mensagem':<46} {full:>12.1f} {before / full:>6.1f}x")
+    print(f"{'Aho-Corasick, mensagem já vista (cache)':<46} {cached:>12.1f} {before / cached:>6.1f}x")
+    
+    print("\nFronteira de palavra:")
+    for text in ["quero ver a casa", "a casa verde é linda", "boa noite", "dezoito quartos"]:
+        found = dict(matcher.match(text))
+        print(f"  {text!r}: {found}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória: imóveis como dicts (formato do JSON) x registros Listing
+Execute: python benchmarks/bench_listing_memory.py [quantidade ...]
+"""
+
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_property_search import generate_properties
+from services.listing import Listing
+
+def traced(build):
+    """(objeto, bytes alocados que continuam vivos) ao montar o objeto"""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+def measure(n):
+    # Passa pelo JSON como no carregamento real: cada imóvel ganha strings próprias
+    blob = json.dumps(generate_properties(n))
+    
+    dicts, dict_bytes = traced(lambda: json.loads(blob))
+    
+    def build_records():
+        records = [Listing.from_dict(p) for p in json.loads(blob)]
+        gc.collect()
+        return records
+    
+    records, record_bytes = traced(build_records)
+    
+    start = time.perf_counter()
+    for p in dicts:
+        p.get('bairro'), p['preco']
+    dict_read = (time.perf_counter() - start) / n * 1e9
+    
+    start = time.perf_counter()
+    for p in records:
+        p.get('bairro'), p['preco']
+    record_read = (time.perf_counter() - start) / n * 1e9
+    
+    assert all(dict(r) == d for r, d in zip(records, dicts))
+    return dict_bytes, record_bytes, dict_read, record_read
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50000, 500000]
+    
+    print(f"{'imóveis':>9} {'dicts (MB)':>11} {'Listing (MB)':>13} {'economia':>9} "
+          f"{'leitura dict (ns)':>18} {'leitura Listing (ns)':>21}")
+    for n in sizes:
+        dict_bytes, record_bytes, dict_read, record_read = measure(n)
+        print(f"{n:>9} {dict_bytes / 2**20:>11.1f} {record_bytes / 2**20:>13.1f} "
+              f"{1 - record_bytes / dict_bytes:>8.0%} {dict_read:>18.0f} {record_read:>21.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark das buscas do PropertyService com um catálogo sintético grande
+Execute: python benchmarks/bench_property_search.py [quantidade]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.property_service import PropertyService
+from services import columnar_catalog
+from services.catalog import parse_price
+
+TIPOS = ['Apartamento', 'Casa', 'Kitnet', 'Cobertura']
+BAIRROS = ['Centro', 'Trindade', 'Agronômica', 'Campeche', 'Jurerê', 'Ingleses', 'Itacorubi', 'Coqueiros']
+
+QUERIES = [
+    {'tipo': 'apartamento', 'operacao': 'venda', 'max_price': 600000},
+    {'tipo': 'casa', 'quartos': 3, 'bairro': 'campeche'},
+    {'operacao': 'aluguel', 'max_price': 3000, 'min_price': 1500},
+    {'quartos': 2, 'bairro': 'centro'},
+]
+
+def generate_properties(n, seed=42):
+    rng = random.Random(seed)
+    properties = []
+    for i in range(n):
+        operacao = rng.choice(['venda', 'aluguel'])
+        valor = rng.randint(200, 5000) * 1000 if operacao == 'venda' else rng.randint(8, 150) * 100
+        properties.append({
+            'codigo': f"IM{i:06d}",
+            'tipo': rng.choice(TIPOS),
+            'operacao': operacao,
+            'bairro': rng.choice(BAIRROS),
+            'cidade': 'Florianópolis',
+            'quartos': rng.randint(1, 5),
+            'preco': f"{valor:,.2f}".replace(',', '#').replace('.', ',').replace('#', '.'),
+        })
+    return properties
+
+# Implementação anterior, mantida aqui só como referência de comparação
+def legacy_search_by_price(properties, preferences):
+    results = properties.copy()
+    if preferences.get('tipo'):
+        results = [p for p in results if p['tipo'].lower() == preferences['tipo'].lower()]
+    if preferences.get('operacao'):
+        results = [p for p in results if p['operacao'].lower() == preferences['operacao'].lower()]
+    max_price = preferences.get('max_price')
+    min_price = preferences.get('min_price', 0)
+    if max_price:
+        results = [p for p in results if min_price <= parse_price(p['preco']) <= max_price]
+    return sorted(results, key=lambda x: parse_price(x['preco']))
+
+def legacy_search_with_preferences(properties, preferences):
+    results = properties.copy()
+    if preferences.get('tipo'):
+        results = [p for p in results if p['tipo'].lower() == preferences['tipo'].lower()]
+    if preferences.get('operacao'):
+        results = [p for p in results if p['operacao'].lower() == preferences['operacao'].lower()]
+    if preferences.get('quartos'):
+        results = [p for p in results if p.get('quartos', 0) >= preferences['quartos']]
+    if preferences.get('bairro'):
+        bairro = preferences['bairro'].lower()
+        results = [p for p in results if bairro in p.get('bairro', '').lower()]
+    if preferences.get('max_price'):
+        results = legacy_search_by_price(properties, preferences)
+    return results
+
+def legacy_get_property_details(properties, code):
+    for prop in properties:
+        if prop.get('codigo', '').upper() == code.upper():
+            return prop
+    return None
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeat = 5
+    properties = generate_properties(n)
+    
+    start = time.perf_counter()
+    service = PropertyService(properties=properties)
+    print(f"📦 {n} imóveis normalizados em {(time.perf_counter() - start) * 1000:.0f}ms")
+    
+    columnar = None
+    if columnar_catalog.np is not None:
+        start = time.perf_counter()
+        columnar = PropertyService(properties=properties, backend='numpy')
+        print(f"📊 backend numpy montado em {(time.perf_counter() - start) * 1000:.0f}ms")
+    else:
+        print("📊 numpy não instalado - pulando backend colunar")
+    print()
+    
+    print(f"{'consulta':<68} {'antes (ms)':>11} {'index (ms)':>11} {'numpy (ms)':>11} {'ganho':>7}")
+    for query in QUERIES:
+        expected = legacy_search_with_preferences(properties, query)
+        assert service.search_with_preferences(query) == expected
+        
+        before = timed(lambda: legacy_search_with_preferences(properties, query), repeat)
+        after = timed(lambda: service.search_with_preferences(query), repeat)
+        vectorized = float('nan')
+        if columnar:
+            assert columnar.search_with_preferences(query) == expected
+            vectorized = timed(lambda: columnar.search_with_preferences(query), repeat)
+        best = min(after, vectorized) if columnar else after
+        print(f"{str(query):<68} {before:>11.2f} {after:>11.2f} {vectorized:>11.2f} {before / best:>6.1f}x")
+    
+    if columnar:
+        query = {'operacao': 'venda', 'quartos': 3}
+        ranked = timed(lambda: columnar.cursor_with_preferences(query).next_page(5), repeat)
+        print(f"{'cursor_with_preferences 1ª página por pontuação (numpy)':<68} {'':>11} {'':>11} {ranked:>11.2f}")
+    
+    codes = [f"im{random.randrange(n):06d}" for _ in range(200)]
+    before = timed(lambda: [legacy_get_property_details(properties, c) for c in codes], 1) / len(codes)
+    after = timed(lambda: [service.get_property_details(c) for c in codes], 1) / len(codes)
+    print(f"{'get_property_details (por código)':<68} {before:>11.4f} {after:>11.4f} {'':>11} {before / after:>6.0f}x")
+
+if __name__ == "__main__":
+    main()
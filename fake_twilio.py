@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Twilio falso para testar o modo assíncrono localmente
+Execute: python fake_twilio.py [porta]
+Depois rode o bot com ASYNC_WEBHOOK=true e TWILIO_API_BASE=http://localhost:<porta>
+"""
+
+import json
+import sys
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+sent_messages = []
+lock = threading.Lock()
+
+class FakeTwilioHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        """Aceita POST /2010-04-01/Accounts/<sid>/Messages.json"""
+        if not self.path.endswith('/Messages.json'):
+            self._reply(404, {"message": "not found"})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+
+        message = {
+            "sid": "SM" + uuid.uuid4().hex,
+            "to": form.get('To', [''])[0],
+            "from": form.get('From', [''])[0],
+            "body": form.get('Body', [''])[0],
+            "media_urls": form.get('MediaUrl', []),
+            "status": "queued"
+        }
+        with lock:
+            sent_messages.append(message)
+
+        print(f"📤 {message['to']}: {message['body'][:80]}")
+        self._reply(201, message)
+
+    def do_GET(self):
+        """GET /messages lista tudo que foi enviado"""
+        if self.path != '/messages':
+            self._reply(404, {"message": "not found"})
+            return
+        with lock:
+            self._reply(200, list(sent_messages))
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def run(port=8099):
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeTwilioHandler)
+    print(f"🧪 Twilio falso ouvindo em http://localhost:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Twilio falso encerrado!")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 8099)
@@ -8,9 +8,9 @@ from handlers.message_handler import MessageHandler
 logger = logging.getLogger(__name__)
 
 class AudioHandler:
-    def __init__(self):
-        self.ai_service = AIService()
-        self.message_handler = MessageHandler()
+    def __init__(self, ai_service=None, message_handler=None):
+        self.ai_service = ai_service or AIService()
+        self.message_handler = message_handler or MessageHandler(ai_service=self.ai_service)
         self.account_sid = os.environ.get('TWILIO_ACCOUNT_SID')
         self.auth_token = os.environ.get('TWILIO_AUTH_TOKEN')
     
@@ -4,225 +4,361 @@ import random
 from datetime import datetime
 from services.ai_service import AIService
 from services.property_service import PropertyService
+from services.message_analysis import MessageAnalyzer
+from services.intent_classifier import CONFIDENCE_THRESHOLD
 from utils.emojis import e
+from utils.conversation_store import ConversationStore
+from utils import keyword_matcher
 
 logger = logging.getLogger(__name__)
 
+# Imóveis por página; o restante sai com "ver mais"
+PAGE_SIZE = 5
+
+# Palavras que decidem o caminho da mensagem (palavra inteira: "ver" não casa com "verde")
+KEYWORDS = {
+    'greeting': ['oi', 'ola', 'olá', 'bom dia', 'boa tarde', 'boa noite'],
+    'search': ['procuro', 'quero', 'preciso', 'busco', 'tem', 'existe',
+               'apartamento', 'apartamentos', 'casa', 'casas', 'kitnet', 'kitnets', 'cobertura', 'coberturas',
+               'comprar', 'alugar', 'quartos', 'bairro', 'bairros'],
+    'photo': ['foto', 'fotos', 'imagem', 'imagens', 'ver', 'mostra', 'mostrar'],
+    'apartamento': ['apartamento', 'apartamentos', 'ap', 'apto'],
+    'casa': ['casa', 'casas'],
+    'venda': ['comprar', 'compra', 'venda'],
+    'aluguel': ['alugar', 'aluguel', 'locar']
+}
+keyword_matcher.register('handler', KEYWORDS)
+
 class MessageHandler:
-    def __init__(self):
-        self.ai_service = AIService()
-        self.property_service = PropertyService()
-        self.conversations = {}
-        
+    def __init__(self, ai_service=None, property_service=None, conversations=None, analyzer=None, contexts=None):
+        self.ai_service = ai_service or AIService()
+        self.property_service = property_service or PropertyService()
+        # Precisa ser um ConversationStore (ou ter pinned()): um dict comum não serve
+        self.conversations = conversations if conversations is not None else ConversationStore()
+        # ContextManager opcional: cada mensagem adia a expiração da conversa do número
+        self.contexts = contexts
+        self.analyzer = analyzer or MessageAnalyzer(self.property_service, self.ai_service.intents.classifier)
+    
     def process_message(self, text, from_number):
         try:
-            if from_number not in self.conversations:
-                self.conversations[from_number] = {
-                    'history': [],
-                    'preferences': {},
-                    'name': None,
-                    'last_search': None,
-                    'context': None
-                }
-            
-            conv = self.conversations[from_number]
-            conv['history'].append({'user': text, 'time': datetime.now()})
-            
-            response = self._process_with_context(text, conv)
-            
-            conv['history'].append({'bot': response, 'time': datetime.now()})
+            # A conversa não sai da memória (nem vai para o disco) enquanto esta mensagem é processada
+            with self.conversations.pinned(from_number):
+                if from_number not in self.conversations:
+                    self.conversations[from_number] = {
+                        'history': [],
+                        'preferences': {},
+                        'name': None,
+                        'last_search': None,
+                        'cursor': None,
+                        'context': None
+                    }
+                
+                conv = self.conversations[from_number]
+                conv['history'].append({'user': text, 'time': datetime.now()})
+                
+                # Catálogo conferido uma vez por mensagem (no SQLite a versão pode ter mudado)
+                self.property_service.refresh()
+                
+                # Texto analisado uma vez; as etapas seguintes só leem a Analysis
+                analysis = self.analyzer.analyze(text)
+                response = self._process_with_context(analysis, conv)
+                
+                conv['history'].append({'bot': response, 'time': datetime.now()})
+                
+                if self.contexts is not None:
+                    self.contexts.set_context(from_number, {
+                        'last_search': conv.get('last_search'),
+                        'viewing': (conv.get('context') or {}).get('viewing')
+                    })
             
             return response
-            
+        
         except Exception as e:
             logger.error(f"Erro: {e}")
             return self._error_response()
     
-    def _process_with_context(self, text, conv):
-        text_lower = text.lower()
+    def _process_with_context(self, analysis, conv):
+        found = analysis.hits('handler')
         
         # Primeira interação
         if len(conv['history']) <= 1:
             return self._first_interaction()
         
+        # Próxima página da última busca
+        if self._is_more_request(analysis.lowered):
+            return self._more_results(conv)
+        
+        # "parecidos com o AP001"
+        if self._is_similar_request(analysis.lowered):
+            return self._similar_response(analysis, conv)
+        
         # Saudações
-        if any(word in text_lower for word in ['oi', 'ola', 'bom dia', 'boa tarde', 'boa noite']):
+        if 'greeting' in found:
             return self._greeting_response()
         
         # ANÁLISE PRECISA DE PREÇO
-        price_request = self._extract_price_request(text)
-        if price_request:
-            return self._handle_price_search(price_request, conv)
+        if analysis.price:
+            return self._handle_price_search(analysis, conv)
+        
+        # Sem filtros, intenção clara de agendar/agradecer/despedir vem antes da busca:
+        # "quero" sozinho é palavra de busca e "quero visitar" listaria o catálogo
+        if not analysis.preferences():
+            response = self._confident_intent_response(analysis, conv)
+            if response:
+                return response
         
         # Busca geral
-        if self._is_property_search(text):
-            return self._smart_search(text, conv)
+        if analysis.is_search:
+            return self._smart_search(analysis, conv)
         
         # Código de imóvel
-        property_code = self._extract_property_code(text)
-        if property_code:
-            return self._show_property_details(property_code, conv)
+        if analysis.code:
+            return self._show_property_details(analysis.code, conv)
         
         # Perguntas sobre fotos
-        if any(word in text_lower for word in ['foto', 'imagem', 'ver', 'mostra']):
-            return self._handle_photo_request(text, conv)
+        if 'photo' in found:
+            return self._handle_photo_request(analysis.text, conv)
         
         # Conversação geral
-        return self._contextual_response(text, conv)
-    
-    def _extract_price_request(self, text):
-        """Extrai pedidos relacionados a preço com precisão"""
-        text_lower = text.lower()
-        
-        # Padrões de preço
-        patterns = [
-            r'abaixo de (\d+)',
-            r'menos de (\d+)',
-            r'até (\d+)',
-            r'menor que (\d+)',
-            r'maximo (\d+)',
-            r'máximo (\d+)',
-            r'no maximo (\d+)',
-            r'no máximo (\d+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text_lower.replace('.', '').replace('mil', '000').replace(' ', ''))
-            if match:
-                return {
-                    'max_price': int(match.group(1)),
-                    'type': 'max'
-                }
-        
-        # Faixa de preço
-        range_pattern = r'entre (\d+) e (\d+)'
-        range_match = re.search(range_pattern, text_lower.replace('.', '').replace('mil', '000').replace(' ', ''))
-        if range_match:
-            return {
-                'min_price': int(range_match.group(1)),
-                'max_price': int(range_match.group(2)),
-                'type': 'range'
-            }
-        
-        return None
+        return self._contextual_response(analysis, conv)
     
-    def _handle_price_search(self, price_request, conv):
+    def _handle_price_search(self, analysis, conv):
         """Busca precisa por preço SEM INVENTAR"""
-        max_price = price_request.get('max_price', 0)
-        min_price = price_request.get('min_price', 0)
+        max_price = analysis.price.get('max_price', 0)
+        min_price = analysis.price.get('min_price', 0)
         
-        # Mantém preferências anteriores
-        preferences = conv.get('preferences', {}).copy()
+        # Mantém preferências anteriores; o que a própria mensagem pede ("casa até 500 mil") vale por cima
+        preferences = self._merge_preferences(analysis, conv)
         preferences['max_price'] = max_price
         if min_price:
             preferences['min_price'] = min_price
+        else:
+            preferences.pop('min_price', None)
         
-        # Busca imóveis
-        properties = self.property_service.search_by_price(preferences)
+        # Busca imóveis (só a primeira página é montada agora)
+        cursor = self.property_service.cursor_by_price(preferences)
         
-        if not properties:
-            return self._no_results_for_price(max_price, conv)
+        if not len(cursor):
+            return self._no_results_for_price(max_price, conv, preferences)
         
         # Resposta precisa
-        response = f"Encontrei {len(properties)} {'imóvel' if len(properties) == 1 else 'imóveis'} "
+        response = f"Encontrei {len(cursor)} {'imóvel' if len(cursor) == 1 else 'imóveis'} "
         
         if min_price:
             response += f"entre R$ {min_price:,.0f} e R$ {max_price:,.0f}:\n\n"
         else:
             response += f"abaixo de R$ {max_price:,.0f}:\n\n"
         
-        for i, prop in enumerate(properties[:5], 1):
-            valor_num = self._parse_price(prop['preco'])
-            response += f"{i}. {prop['tipo']} em {prop['bairro']}\n"
-            response += f"   {e('money')} R$ {prop['preco']}\n"
-            response += f"   {e('casa')} {prop['quartos']} quartos | {prop.get('area', '??')}m²\n"
-            response += f"   {e('key')} Código: {prop['codigo']}\n\n"
+        page = {'results': cursor, 'kind': 'price', 'near': preferences.get('near')}
+        for i, prop in enumerate(cursor.next_page(PAGE_SIZE), 1):
+            response += self._format_result(i, prop, page)
         
-        if len(properties) > 5:
-            response += f"... e mais {len(properties) - 5} opções!\n\n"
+        if cursor.has_more:
+            response += f"... e mais {cursor.remaining} opções! Digite 'ver mais' para continuar.\n\n"
         
         response += f"{e('bulb')} Digite o código para ver detalhes e fotos!"
         
         # Salva contexto
         conv['preferences'] = preferences
         conv['last_search'] = f"imoveis ate {max_price}"
+        conv['cursor'] = page
         
         return response
     
-    def _no_results_for_price(self, max_price, conv):
+    def _no_results_for_price(self, max_price, conv, preferences=None):
         """Resposta honesta quando não há resultados"""
-        # Busca o mais barato disponível
-        all_properties = self.property_service.get_all_properties()
+        preferences = preferences or {}
+        min_price = preferences.get('min_price')
+        if min_price:
+            asked = f"entre R$ {min_price:,.0f} e R$ {max_price:,.0f}"
+        else:
+            asked = f"abaixo de R$ {max_price:,.0f}"
+        
+        # Orçamento mínimo (com os mesmos filtros) para aparecerem opções
+        suggestions = self.property_service.relax(preferences) if preferences else []
+        if suggestions:
+            response = f"Não encontrei imóveis {asked}. {e('thinking')}\n\n"
+            response += "Mas dá para chegar perto:\n"
+            response += self._format_relaxations(suggestions)
+            response += "\nQuer que eu mostre essas opções?"
+            return response
+        
+        # O mais barato entre os que atendem aos mesmos filtros (tipo, operação, distância)
+        cheapest = self.property_service.get_cheapest(preferences)
         
-        if not all_properties:
-            return f"Desculpe, não encontrei imóveis no momento. {e('thinking')}"
+        if not cheapest:
+            return f"Desculpe, não encontrei imóveis com esses filtros no momento. {e('thinking')}"
         
-        # Encontra o mais barato
-        cheapest = min(all_properties, key=lambda x: self._parse_price(x['preco']))
-        cheapest_price = self._parse_price(cheapest['preco'])
+        cheapest_price = self.property_service.get_price(cheapest)
         
-        response = f"Não encontrei imóveis abaixo de R$ {max_price:,.0f}. {e('thinking')}\n\n"
+        response = f"Não encontrei imóveis {asked}. {e('thinking')}\n\n"
         
-        if cheapest_price < max_price * 1.5:  # Se está relativamente próximo
+        if max_price < cheapest_price < max_price * 1.5:  # Se está relativamente próximo
             response += f"Mas tenho uma opção próxima do seu orçamento:\n\n"
             response += f"{e('sparkles')} {cheapest['tipo']} em {cheapest['bairro']}\n"
             response += f"{e('money')} R$ {cheapest['preco']} (apenas R$ {cheapest_price - max_price:,.0f} acima)\n"
             response += f"{e('casa')} {cheapest['quartos']} quartos\n"
             response += f"{e('key')} Código: {cheapest['codigo']}\n\n"
             response += "Às vezes vale a pena esticar um pouquinho o orçamento! Quer ver?"
+        elif cheapest_price <= max_price:
+            # Abaixo do mínimo da faixa: o mais em conta fica fora dela por ser mais barato
+            response += f"O mais em conta com esses filtros custa R$ {cheapest['preco']} "
+            response += f"({cheapest['tipo']} em {cheapest['bairro']}, código {cheapest['codigo']}).\n\n"
+            response += "Quer ver essa opção?"
         else:
             response += f"O imóvel mais em conta que tenho custa R$ {cheapest['preco']}.\n\n"
             response += "Posso te mostrar algumas opções de financiamento que cabem no seu bolso?"
         
         return response
     
-    def _parse_price(self, price_str):
-        """Converte string de preço para número"""
-        try:
-            # Remove R$, pontos e converte vírgula
-            clean = price_str.replace('R$', '').replace('.', '').replace(',', '.').strip()
-            return float(clean)
-        except:
-            return 999999999
+    def _smart_search(self, analysis, conv):
+        """Busca inteligente sem inventar dados"""
+        preferences = analysis.preferences()
+        conv['preferences'] = self._merge_preferences(analysis, conv)
+        conv['last_search'] = analysis.text
+        
+        cursor = self.property_service.cursor_with_preferences(conv['preferences'])
+        
+        # Filtros reconhecidos mas nada encontrado: sugere o que afrouxar
+        if not len(cursor) and preferences:
+            suggestions = self.property_service.relax(conv['preferences'])
+            if suggestions:
+                return self._no_results_response(conv, suggestions)
+        
+        # Sem filtros reconhecidos na mensagem: tenta pelo texto livre ("vista mar", "mobiliado"),
+        # mantendo tipo, operação e cidade já pedidos (aluguel não responde com imóvel à venda).
+        # Com filtros, não: "apartamento 5 quartos" ranquearia qualquer apartamento pela palavra
+        # "apartamento" e o resultado furaria os filtros que o cliente pediu
+        if not preferences:
+            text_matches = self.property_service.search_text(analysis.text, preferences=conv['preferences'])
+            if text_matches:
+                return self._text_search_response(text_matches)
+        
+        if not len(cursor):
+            return self._no_results_response(conv)
+        
+        # Confirma o que entendeu (com muitos resultados, diz onde estão)
+        facets = self.property_service.facets(conv['preferences']) if len(cursor) > PAGE_SIZE else None
+        understood = self._explain_search(conv['preferences'], facets)
+        
+        response = f"{understood}\n\n"
+        response += f"Encontrei {len(cursor)} {'opção' if len(cursor) == 1 else 'opções'}:\n\n"
+        
+        page = {'results': cursor, 'kind': 'search', 'near': conv['preferences'].get('near')}
+        for i, prop in enumerate(cursor.next_page(PAGE_SIZE), 1):
+            response += self._format_result(i, prop, page)
+        
+        if cursor.has_more:
+            response += f"... e mais {cursor.remaining} opções! Digite 'ver mais' para continuar.\n"
+        
+        response += f"\n{e('bulb')} Digite o código para ver detalhes completos!"
+        
+        conv['cursor'] = page
+        
+        return response
     
-    def _is_property_search(self, text):
-        text_lower = text.lower()
-        search_words = ['procuro', 'quero', 'preciso', 'busco', 'tem', 'existe',
-                       'apartamento', 'casa', 'kitnet', 'cobertura',
-                       'comprar', 'alugar', 'quartos', 'bairro']
-        return any(word in text_lower for word in search_words)
+    def _merge_preferences(self, analysis, conv):
+        """Preferências da conversa com as da mensagem por cima (dict novo).
+        
+        A distância ("perto da praia") vale só para a mensagem que a pede:
+        a busca seguinte sem distância volta a olhar o catálogo inteiro.
+        """
+        preferences = dict(conv.get('preferences', {}))
+        preferences.pop('near', None)
+        preferences.update(analysis.preferences())
+        return preferences
     
-    def _smart_search(self, text, conv):
-        """Busca inteligente sem inventar dados"""
-        preferences = self._extract_preferences(text)
-        conv['preferences'].update(preferences)
-        conv['last_search'] = text
+    def _format_result(self, i, prop, page):
+        """Um imóvel da lista de resultados, no formato da busca que o gerou"""
+        response = f"{i}. {prop['tipo']} em {prop['bairro']}\n"
+        response += f"   {e('money')} R$ {prop['preco']}\n"
         
-        properties = self.property_service.search_with_preferences(conv['preferences'])
+        if page['kind'] == 'price':
+            response += f"   {e('casa')} {prop['quartos']} quartos | {prop.get('area', '??')}m²\n"
+        else:
+            response += f"   {e('casa')} {prop['quartos']} quartos\n"
+            if prop.get('destaque'):
+                response += f"   {e('star')} {prop['destaque']}\n"
         
-        if not properties:
-            return self._no_results_response(conv)
+        near = page.get('near')
+        if near:
+            km = self.property_service.distance_to(prop, near['point'])
+            if km is not None:
+                response += f"   {e('location')} {km:.1f} km {near['label']}\n".replace('.', ',')
         
-        # Confirma o que entendeu
-        understood = self._explain_search(conv['preferences'])
+        response += f"   {e('key')} Código: {prop['codigo']}\n\n"
+        return response
+    
+    def _is_similar_request(self, lowered):
+        return re.search(r'\b(parecid[oa]s?|semelhantes?|similar(es)?)\b', lowered) is not None
+    
+    def _similar_response(self, analysis, conv):
+        """Imóveis parecidos com o código citado (ou com o último visto)"""
+        code = analysis.code or (conv.get('context') or {}).get('viewing')
+        if not code:
+            return "Parecidos com qual imóvel? Me passe o código, por exemplo: 'parecidos com o AP001'."
         
-        response = f"{understood}\n\n"
-        response += f"Encontrei {len(properties)} {'opção' if len(properties) == 1 else 'opções'}:\n\n"
+        if not self.property_service.get_property_details(code):
+            return f"Código {code} não encontrado. Digite 'ajuda' para ver os códigos disponíveis."
+        
+        similar = self.property_service.get_similar(code)
+        if not similar:
+            return f"No momento não tenho imóveis parecidos com o {code}. {e('thinking')}"
+        
+        response = f"Imóveis parecidos com o {code}:\n\n"
+        page = {'kind': 'search'}
+        for i, prop in enumerate(similar, 1):
+            response += self._format_result(i, prop, page)
+        
+        response += f"{e('bulb')} Digite o código para ver detalhes completos!"
         
-        for i, prop in enumerate(properties[:5], 1):
+        return response
+    
+    def _is_more_request(self, lowered):
+        """'ver mais', 'mais opções', 'mostra mais'..."""
+        return re.fullmatch(
+            r'\s*(ver|mostr[ae]r?|manda|quero ver)?\s*mais(\s+(opções|opcoes|imóveis|imoveis|resultados))?\s*[!.?]*\s*',
+            lowered
+        ) is not None
+    
+    def _more_results(self, conv):
+        """Próxima página da última busca, continuando do cursor salvo na conversa"""
+        page = conv.get('cursor')
+        if not page or not page['results'].has_more:
+            return f"Já te mostrei todas as opções dessa busca. {e('thinking')} Quer ajustar os filtros?"
+        
+        cursor = page['results']
+        start = cursor.served + 1
+        properties = cursor.next_page(PAGE_SIZE)
+        
+        response = f"Opções {start} a {cursor.served} de {len(cursor)}:\n\n"
+        for i, prop in enumerate(properties, start):
+            response += self._format_result(i, prop, page)
+        
+        if cursor.has_more:
+            response += f"... e mais {cursor.remaining} opções! Digite 'ver mais' para continuar.\n\n"
+        
+        response += f"{e('bulb')} Digite o código para ver detalhes completos!"
+        
+        return response
+    
+    def _text_search_response(self, properties):
+        """Resultados da busca por texto livre, do mais relevante para o menos"""
+        response = f"Pelo que você descreveu, estes são os mais parecidos:\n\n"
+        
+        for i, prop in enumerate(properties, 1):
             response += f"{i}. {prop['tipo']} em {prop['bairro']}\n"
             response += f"   {e('money')} R$ {prop['preco']}\n"
-            response += f"   {e('casa')} {prop['quartos']} quartos\n"
             if prop.get('destaque'):
                 response += f"   {e('star')} {prop['destaque']}\n"
             response += f"   {e('key')} Código: {prop['codigo']}\n\n"
         
-        response += f"\n{e('bulb')} Digite o código para ver detalhes completos!"
+        response += f"{e('bulb')} Digite o código para ver detalhes completos!"
         
         return response
     
-    def _explain_search(self, preferences):
-        """Explica o que entendeu da busca"""
+    def _explain_search(self, preferences, facets=None):
+        """Explica o que entendeu da busca (e, com `facets`, em quais bairros estão as opções)"""
         parts = []
         
         if preferences.get('tipo'):
@@ -240,17 +376,41 @@ class MessageHandler:
         if preferences.get('bairro'):
             parts.append(f"em {preferences['bairro']}")
         
+        if preferences.get('cidade'):
+            parts.append(f"({preferences['cidade']})")
+        
+        near = preferences.get('near')
+        if near:
+            if not parts:
+                parts.append('imóveis')
+            if near.get('km'):
+                parts.append(f"a até {near['km']:g} km {near['label']}".replace('.', ','))
+            else:
+                parts.append(f"perto {near['label']}")
+        
         if parts:
-            return f"Entendi! Você busca {' '.join(parts)}."
+            explanation = f"Entendi! Você busca {' '.join(parts)}."
         else:
-            return "Vou mostrar todas as opções disponíveis:"
+            explanation = "Vou mostrar todas as opções disponíveis:"
+        
+        if facets and not preferences.get('bairro') and len(facets['bairro']) > 1:
+            scope = 'nessa faixa' if preferences.get('max_price') else 'nessa busca'
+            explanation += f"\nTenho {self._format_facet(facets['bairro'])} {scope}."
+        return explanation
     
     def _show_property_details(self, code, conv):
         """Mostra detalhes REAIS do imóvel"""
         prop = self.property_service.get_property_details(code)
         
         if not prop:
-            # Busca códigos similares
+            # Se o cliente já viu algum imóvel, sugere os parecidos com ele
+            viewing = (conv.get('context') or {}).get('viewing')
+            if viewing:
+                similar = [p['codigo'] for p in self.property_service.get_similar(viewing)]
+                if similar:
+                    return f"Não encontrei {code}. Parecidos com o {viewing} que você viu: {', '.join(similar)}."
+            
+            # Senão, códigos com o mesmo prefixo (provável erro de digitação)
             all_codes = self.property_service.get_all_codes()
             similar = [c for c in all_codes if c.startswith(code[:2])]
             
@@ -276,6 +436,7 @@ class MessageHandler:
         
         response += f"\n📸 Digite 'fotos' para ver imagens"
         response += f"\n📅 Digite 'visitar' para agendar visita"
+        response += f"\n🔁 Digite 'parecidos' para ver opções semelhantes"
         
         conv['context'] = {'viewing': code}
         
@@ -283,17 +444,21 @@ class MessageHandler:
     
     def _handle_photo_request(self, text, conv):
         """Mostra fotos se existirem"""
-        context = conv.get('context', {})
+        context = conv.get('context') or {}
         viewing = context.get('viewing')
         
         if not viewing:
             return "Qual imóvel você quer ver as fotos? Me passe o código."
         
         photos = self.property_service.get_property_photos_list(viewing)
+        tour = self.property_service.get_property_tour(viewing)
         
         if photos:
+            text = f"Fotos do {viewing}:"
+            if tour:
+                text += f"\n🎥 Tour virtual 360°: {tour}"
             return {
-                "text": f"Fotos do {viewing}:",
+                "text": text,
                 "media": photos[:3]
             }
         else:
@@ -312,66 +477,94 @@ O que você procura hoje?"""
     def _greeting_response(self):
         return f"Oi! Como posso ajudar você hoje? {e('smile')}"
     
-    def _contextual_response(self, text, conv):
+    def _contextual_response(self, analysis, conv):
         """Resposta contextual sem inventar"""
+        viewing = (conv.get('context') or {}).get('viewing')
+        
+        # Intenção reconhecida pelo classificador local, sem ida ao LLM
+        response = self._confident_intent_response(analysis, conv)
+        if response:
+            return response
+        
         # Se tem contexto de visualização
-        if conv.get('context', {}).get('viewing'):
-            code = conv['context']['viewing']
-            return f"Ainda está vendo o {code}? Digite 'fotos' para ver imagens ou 'visitar' para agendar!"
+        if viewing:
+            return f"Ainda está vendo o {viewing}? Digite 'fotos' para ver imagens ou 'visitar' para agendar!"
         
         # Resposta genérica
         return f"Não entendi bem. Você pode:\n• Buscar: 'quero apartamento 2 quartos'\n• Filtrar: 'abaixo de 500 mil'\n• Ver código: 'AP001'\n\nComo posso ajudar? {e('smile')}"
     
-    def _no_results_response(self, conv):
+    def _confident_intent_response(self, analysis, conv):
+        """Resposta da intenção do classificador local quando ele tem confiança (None caso contrário)"""
+        intent = analysis.intent
+        if not intent or intent['confidence'] < CONFIDENCE_THRESHOLD:
+            return None
+        
+        # "quero visitar o AP002" agenda o imóvel citado; sem código, o último visto
+        code = analysis.code if analysis.code and self.property_service.get_property_details(analysis.code) else None
+        return self._intent_response(intent['intent'], code or (conv.get('context') or {}).get('viewing'))
+    
+    def _intent_response(self, intent, viewing):
+        """Resposta pronta para as intenções que não dependem de busca (None nas demais)"""
+        if intent == 'thanks':
+            return f"Por nada! Foi um prazer ajudar! Qualquer coisa é só chamar! {e('smile')}"
+        if intent == 'goodbye':
+            return f"Até logo! Foi ótimo conversar com você! Volte sempre! {e('wave')}"
+        if intent == 'scheduling':
+            if viewing:
+                return f"{e('calendar')} Vamos agendar a visita ao {viewing}! Qual dia e horário ficam melhores para você?"
+            return "Claro! Qual imóvel você quer visitar? Me passe o código."
+        return None
+    
+    def _no_results_response(self, conv, suggestions=None):
         """Resposta honesta quando não há resultados"""
         criteria = conv.get('preferences', {})
+        if suggestions is None:
+            suggestions = self.property_service.relax(criteria)
         
         response = f"Não encontrei imóveis com todos esses critérios. {e('thinking')}\n\n"
         
-        # Sugere relaxar filtros
-        if criteria.get('quartos') and criteria.get('quartos') > 2:
-            response += f"• Tenho opções com {criteria['quartos']-1} quartos\n"
-        
-        if criteria.get('max_price'):
-            response += f"• Ou com preços um pouco acima de R$ {criteria['max_price']:,.0f}\n"
+        # Sugere afrouxar os filtros, só com opções que existem de verdade
+        response += self._format_relaxations(suggestions)
+        
+        # Onde há imóveis trocando só o bairro ou só o tipo
+        facets = self.property_service.facets(criteria)
+        suggested = {s['value'] for s in suggestions if s['field'] == 'bairro'}
+        other_bairros = {b: n for b, n in facets['bairro'].items() if b not in suggested}
+        if criteria.get('bairro') and other_bairros:
+            response += f"• Em outros bairros: tenho {self._format_facet(other_bairros)}\n"
+        if criteria.get('tipo') and facets['tipo']:
+            response += f"• Em outros tipos: {self._format_facet(facets['tipo'], template='{n} de {value}')}\n"
+        
+        viewing = (conv.get('context') or {}).get('viewing')
+        if viewing:
+            similar = [p['codigo'] for p in self.property_service.get_similar(viewing)]
+            if similar:
+                response += f"• Parecidos com o {viewing} que você viu: {', '.join(similar)}\n"
         
         response += "\nQuer ajustar a busca?"
         
         return response
     
-    def _error_response(self):
-        return f"Ops! Algo deu errado. {e('sweat')} Digite 'oi' para recomeçar!"
+    def _format_relaxations(self, suggestions):
+        """Uma linha por filtro afrouxado, com quantos imóveis ele traz"""
+        lines = ''
+        for suggestion in suggestions:
+            count = suggestion['unlocks']
+            options = f"{count} {'opção' if count == 1 else 'opções'}"
+            value = suggestion['value']
+            if suggestion['field'] == 'max_price':
+                lines += f"• Até R$ {value:,.0f}: {options}\n"
+            elif suggestion['field'] == 'quartos':
+                lines += f"• Com {value}+ quartos: {options}\n"
+            elif suggestion['field'] == 'bairro':
+                lines += f"• No bairro vizinho {value[:1].upper() + value[1:]}: {options}\n"
+        return lines
     
-    def _extract_property_code(self, text):
-        match = re.search(r'\b(AP|CA)\d{3,4}\b', text.upper())
-        return match.group() if match else None
+    def _format_facet(self, counts, top=3, template='{n} em {value}'):
+        """As maiores contagens de uma faceta, ex.: 12 em Ingleses, 4 em Centro e 2 em Trindade"""
+        items = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:top]
+        labels = [template.format(n=n, value=value[:1].upper() + value[1:]) for value, n in items]
+        return labels[0] if len(labels) == 1 else ', '.join(labels[:-1]) + ' e ' + labels[-1]
     
-    def _extract_preferences(self, text):
-        prefs = {}
-        text_lower = text.lower()
-        
-        # Tipo
-        if 'apartamento' in text_lower:
-            prefs['tipo'] = 'apartamento'
-        elif 'casa' in text_lower:
-            prefs['tipo'] = 'casa'
-        
-        # Operação
-        if any(word in text_lower for word in ['comprar', 'compra', 'venda']):
-            prefs['operacao'] = 'venda'
-        elif any(word in text_lower for word in ['alugar', 'aluguel', 'locar']):
-            prefs['operacao'] = 'aluguel'
-        
-        # Quartos
-        quartos_match = re.search(r'(\d+)\s*quarto', text_lower)
-        if quartos_match:
-            prefs['quartos'] = int(quartos_match.group(1))
-        
-        # Bairro
-        bairros = ['centro', 'trindade', 'agronômica', 'campeche', 'jurerê']
-        for bairro in bairros:
-            if bairro in text_lower:
-                prefs['bairro'] = bairro
-                break
-        
-        return prefs
+    def _error_response(self):
+        return f"Ops! Algo deu errado. {e('sweat')} Digite 'oi' para recomeçar!"
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Importa data/properties.json para o catálogo SQLite
+Execute: python import_catalog.py [arquivo.json] [banco.db]
+Depois rode o bot com CATALOG_BACKEND=sqlite
+"""
+
+import json
+import os
+import sys
+from services.property_service import enhance_properties
+from services.sqlite_catalog import SQLiteCatalog
+
+def import_catalog(json_path, db_path):
+    print(f"📥 Importando {json_path} para {db_path}...")
+    
+    with open(json_path, 'r', encoding='utf-8') as f:
+        properties = json.load(f)
+    
+    # Mesmos ajustes do carregamento em memória
+    enhance_properties(properties)
+    
+    store = SQLiteCatalog(db_path)
+    total = store.import_properties(properties)
+    
+    print(f"✅ {total} imóveis importados (versão {store.version})")
+
+if __name__ == "__main__":
+    json_path = sys.argv[1] if len(sys.argv) > 1 else 'data/properties.json'
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.environ.get('CATALOG_DB_PATH', 'data/properties.db')
+    import_catalog(json_path, db_path)
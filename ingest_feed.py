@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Aplica um feed de imobiliária (JSON, JSON Lines, CSV ou XML) ao catálogo SQLite
+Execute: python ingest_feed.py feed.xml [--parcial] [--simular]
+--parcial: o feed traz só atualizações (quem não veio não é removido)
+--simular: só mostra a diferença, sem gravar
+No modo em memória use CATALOG_FEED_PATH: o bot aplica o feed sozinho
+"""
+
+import sys
+from services.property_service import PropertyService
+
+def ingest(path, partial=False, dry_run=False):
+    print(f"📥 Lendo {path}...")
+    
+    service = PropertyService(backend='sqlite')
+    diff = service.ingest_feed(path, partial=partial, dry_run=dry_run)
+    
+    summary = diff.summary()
+    print(f"➕ {summary['added']} novos")
+    print(f"✏️ {summary['changed']} alterados ({summary['price_changed']} com preço novo)")
+    print(f"➖ {summary['removed']} removidos")
+    print(f"= {summary['unchanged']} sem mudança, {summary['skipped']} ignorados")
+    if dry_run:
+        print("Simulação: nada foi gravado")
+    else:
+        print(f"✅ Catálogo na versão {service.version}")
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    ingest(args[0], partial='--parcial' in sys.argv, dry_run='--simular' in sys.argv)
@@ -1,11 +1,13 @@
 import os
 import logging
+from functools import partial
 from openai import OpenAI
+from services.intent_classifier import IntentRouter, llm_intent, load_intent_classifier
 
 logger = logging.getLogger(__name__)
 
 class AIService:
-    def __init__(self):
+    def __init__(self, intent_classifier=None):
         api_key = os.environ.get('OPENAI_API_KEY')
         if api_key:
             self.client = OpenAI(api_key=api_key)
@@ -13,6 +15,21 @@ class AIService:
         else:
             self.client = None
             logger.warning("OpenAI API key não configurada - usando respostas padrão")
+        self._intent_classifier = intent_classifier
+        self._intents = None
+    
+    @property
+    def intents(self) -> IntentRouter:
+        """Classificador local de intenções; o OpenAI só é chamado quando ele tem dúvida"""
+        if self._intents is None:
+            classifier = self._intent_classifier or load_intent_classifier()
+            fallback = partial(llm_intent, self.client, self.model) if self.client else None
+            self._intents = IntentRouter(classifier, fallback)
+        return self._intents
+    
+    def classify_intent(self, text):
+        """{'intent', 'confidence', 'source'} da mensagem"""
+        return self.intents.classify(text)
     
     def generate_contextual_response(self, text, context):
         """Gera resposta com contexto da conversa"""
@@ -2,8 +2,8 @@ import os
 import json
 import logging
 from openai import OpenAI
-from services.sentiment_analyzer import SentimentAnalyzer
-from services.language_detector import LanguageDetector
+from services.message_analysis import MessageAnalyzer
+from services.intent_classifier import IntentRouter, llm_intent, load_intent_classifier
 from services.demo_mode import DemoMode
 
 logger = logging.getLogger(__name__)
@@ -11,21 +11,19 @@ logger = logging.getLogger(__name__)
 class AIPremiumService:
     def __init__(self):
         self.client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
-        self.sentiment = SentimentAnalyzer()
-        self.language = LanguageDetector()
         self.demo = DemoMode()
         self.model = "gpt-4o-mini"
+        self.intents = IntentRouter(load_intent_classifier(), lambda text, labels: llm_intent(self.client, self.model, text, labels))
+        self.analyzer = MessageAnalyzer(intent_classifier=self.intents.classifier)
     
     def process_with_sentiment(self, text: str) -> dict:
         """Processa mensagem com análise completa"""
-        # Detecta idioma
-        language = self.language.detect_language(text)
-        
-        # Analisa sentimento
-        sentiment_data = self.sentiment.analyze(text)
+        analysis = self.analyzer.analyze(text)
+        language = analysis.language
+        sentiment_data = dict(analysis.sentiment)
         
         # Ativa modo demo se solicitado
-        if "modo demo" in text.lower():
+        if "modo demo" in analysis.lowered:
             return {
                 "response": self.demo.activate(),
                 "sentiment": "positive",
@@ -66,9 +64,8 @@ class AIPremiumService:
         }
     
     def classify_intent(self, text: str) -> dict:
-        """Classificação melhorada de intenção"""
-        # Similar ao original mas com mais categorias
-        pass
+        """Intenção pelo modelo local; o LLM só entra abaixo do limiar de confiança"""
+        return self.intents.classify(text)
     
     def generate_contextual_response(self, text: str, system_prompt: str) -> str:
         """Gera resposta contextualizada"""
@@ -0,0 +1,223 @@
+import logging
+import sys
+from services.catalog_index import CatalogIndex
+from services.columnar_catalog import ColumnarCatalog
+from services.text_search import TextIndex
+from services.gazetteer import Gazetteer
+from services.geo_index import GeoIndex, coordinates_of
+from services.parsing import parse_price, parse_number
+from services.recommender import Recommender
+from services.relaxation import bairro_neighbours
+from services.gazetteer import load_places
+from services.listing import to_listing
+from services.media_index import MediaIndex
+from services.search_cursor import ListCursor, HeapCursor
+
+logger = logging.getLogger(__name__)
+
+def search_key(filters, near=None):
+    """Forma canônica da busca: filtros vazios não entram e a ordem dos campos não importa"""
+    key = tuple(sorted((name, value) for name, value in filters.items() if value is not None and value != ''))
+    if near:
+        key += (('near', near['point'], near.get('km')),)
+    return key
+
+class Catalog:
+    """Catálogo normalizado uma única vez no carregamento.
+    
+    Os imóveis viram registros compactos (services.listing.Listing) e os
+    campos usados nas buscas ficam em listas paralelas (mesma posição do
+    imóvel em `properties`), assim as buscas não precisam reprocessar strings
+    a cada mensagem. As versões em minúsculas dos campos categóricos também
+    são internadas: cada bairro existe uma vez na memória.
+    
+    Com columnar=True também monta as colunas NumPy (ColumnarCatalog), que
+    passam a executar as buscas.
+    
+    O PropertyService só conversa com o catálogo pela interface comum a
+    este snapshot e ao services.sqlite_catalog.SQLiteCatalog: get, codes,
+    properties, cursor, sorted_prices, facet_rows, search_text, cheapest,
+    price_of, apply_diff, refresh e os índices derivados (gazetteer, geo,
+    bairro_neighbours, recommender, media).
+    
+    Depois de montado o snapshot não é mais alterado: um reload cria outro
+    Catalog com `version` nova, que caches podem usar como chave. Com
+    `previous`, os imóveis que continuam iguais (o mesmo objeto Listing)
+    aproveitam os campos normalizados, os termos do índice textual e os
+    vizinhos do snapshot anterior: só o delta é processado de novo.
+    """
+    
+    # Campos normalizados, em listas paralelas a `properties`
+    FIELDS = ('price', 'tipo', 'operacao', 'bairro', 'cidade', 'quartos', 'suites', 'area', 'vagas')
+    
+    def __init__(self, properties, columnar=False, version=0, places_path='data/places.json', previous=None,
+                 media_path='data/property_images.json'):
+        self.version = version
+        self.places_path = places_path
+        self.media_path = media_path
+        self.properties = properties = [to_listing(p) for p in properties]
+        self.price = []
+        self.tipo = []
+        self.operacao = []
+        self.bairro = []
+        self.cidade = []
+        self.quartos = []
+        self.suites = []
+        self.area = []
+        self.vagas = []
+        self.by_code = {}
+        self.codes = []
+        
+        # Imóveis que vieram do snapshot anterior sem mudar (o mesmo objeto):
+        # nova posição -> posição antiga, para reaproveitar o que já foi calculado
+        reused = {}
+        if previous is not None:
+            for i, prop in enumerate(properties):
+                j = previous.by_code.get((prop.get('codigo') or '').upper())
+                if j is not None and previous.properties[j] is prop:
+                    reused[i] = j
+        
+        for i, prop in enumerate(properties):
+            j = reused.get(i)
+            if j is not None:
+                for name in self.FIELDS:
+                    getattr(self, name).append(getattr(previous, name)[j])
+            else:
+                self.price.append(parse_price(prop.get('preco', '')))
+                self.tipo.append(sys.intern(prop.get('tipo', '').lower()))
+                self.operacao.append(sys.intern(prop.get('operacao', '').lower()))
+                self.bairro.append(sys.intern(prop.get('bairro', '').lower()))
+                self.cidade.append(sys.intern(prop.get('cidade', '').lower()))
+                self.quartos.append(prop.get('quartos', 0) or 0)
+                self.suites.append(int(parse_number(prop.get('suites'))))
+                self.area.append(parse_number(prop.get('area')))
+                self.vagas.append(int(parse_number(prop.get('vagas'))))
+            
+            code = prop.get('codigo', '')
+            if code:
+                self.by_code.setdefault(code.upper(), i)
+                self.codes.append(code)
+        self.reused = len(reused)
+        
+        self.index = CatalogIndex(self)
+        self.text_index = TextIndex(properties, previous=previous.text_index if previous else None, reused=reused)
+        # data/places.json é lido uma vez por snapshot e repassado aos índices de lugares
+        places = load_places(places_path)
+        self.gazetteer = Gazetteer.build(
+            dict.fromkeys(p.get('bairro', '') for p in properties),
+            dict.fromkeys(p.get('cidade', '') for p in properties),
+            places=places
+        )
+        coordinates = [coordinates_of(p) for p in properties]
+        self.geo = GeoIndex.build(
+            [(p.get('codigo', ''),) + (c or (None, None)) for p, c in zip(properties, coordinates)],
+            previous=previous.geo if previous else None,
+            places=places
+        )
+        self.bairro_neighbours = bairro_neighbours(
+            self.bairro, coordinates, extra=places.get('bairros_vizinhos')
+        )
+        # previous: snapshot anterior, para recalcular só os vizinhos afetados
+        self.recommender = Recommender(properties, previous=previous.recommender if previous else None)
+        self.media = MediaIndex.build(properties, media_path)
+        self.columnar = ColumnarCatalog(self) if columnar else None
+        # Quem executa as buscas: as duas classes têm a mesma interface search()
+        self.engine = self.columnar or self.index
+    
+    def __len__(self):
+        return len(self.properties)
+    
+    def get(self, code):
+        """Imóvel pelo código (sem diferenciar maiúsculas) ou None"""
+        i = self.by_code.get(code.upper())
+        return self.properties[i] if i is not None else None
+    
+    def refresh(self):
+        """Snapshot em memória não muda por fora: só devolve a versão"""
+        return self.version
+    
+    def price_of(self, prop):
+        """Preço numérico já calculado de um imóvel do catálogo"""
+        i = self.by_code.get(prop.get('codigo', '').upper())
+        if i is not None and self.properties[i] is prop:
+            return self.price[i]
+        return parse_price(prop.get('preco', ''))
+    
+    def apply_diff(self, diff, version):
+        """Snapshot novo com o delta de um feed (services.feed_ingest.FeedDiff) aplicado.
+        
+        Imóveis que não mudaram continuam os mesmos objetos: o Catalog novo
+        reaproveita o que já foi calculado para eles.
+        """
+        removed = {code.upper() for code in diff.removed}
+        changed = {str(record['codigo']).strip().upper(): record for record in diff.changed}
+        properties = []
+        for prop in self.properties:
+            code = (prop.get('codigo') or '').upper()
+            if code not in removed:
+                properties.append(changed.get(code, prop))
+        properties.extend(diff.added)
+        
+        catalog = Catalog(properties, columnar=self.columnar is not None, version=version,
+                          places_path=self.places_path, previous=self, media_path=self.media_path)
+        logger.info(f"Catálogo atualizado pelo feed: versão {catalog.version}, {len(catalog)} imóveis, "
+                    f"{catalog.reused} reaproveitados")
+        return catalog
+    
+    def candidates(self, filters, near=None, cache=None):
+        """Posições que passam pelos filtros (pela distância, se houver `near`), na ordem do catálogo.
+        
+        Com `cache` (um LRUCache) buscas repetidas reaproveitam as posições;
+        a chave inclui a versão, então outro snapshot nunca lê as deste.
+        """
+        def compute():
+            positions = self.engine.search(**filters)
+            if near:
+                positions = self.geo.restrict(positions, near['point'], near.get('km'))
+            # Tupla: a mesma lista é compartilhada por todos os cursores desta busca
+            return tuple(positions)
+        
+        if cache is None:
+            return compute()
+        return cache.get_or_compute((self.version,) + search_key(filters, near), compute)
+    
+    def cursor(self, near=None, order=None, cache=None, **filters):
+        """Cursor paginado (SearchCursor) sobre a busca; com `near`, do mais perto ao mais longe.
+        
+        order='price' traz do mais barato ao mais caro; order='best', no
+        backend numpy, dos que melhor combinam com o pedido (orçamento,
+        quartos, área, vagas) aos que menos combinam.
+        """
+        positions = self.candidates(filters, near, cache)
+        if order == 'price' and not near:
+            return HeapCursor(self.properties, positions, self.price)
+        if order == 'best' and not near and self.columnar is not None:
+            def compute():
+                return tuple(self.columnar.by_score(positions, filters.get('max_price'), filters.get('min_quartos')))
+            if cache is None:
+                positions = compute()
+            else:
+                positions = cache.get_or_compute((self.version, 'best') + search_key(filters), compute)
+        return ListCursor(self.properties, positions)
+    
+    def sorted_prices(self, near=None, cache=None, **filters):
+        """Preços, em ordem crescente, dos imóveis que atendem aos filtros"""
+        if near is None:
+            return self.index.sorted_prices(**filters)
+        return sorted(self.price[i] for i in self.candidates(filters, near, cache))
+    
+    def facet_rows(self, near=None, cache=None, **filters):
+        """(tipo, bairro, quartos, preço, operação) dos imóveis que atendem aos filtros"""
+        return ((self.tipo[i], self.bairro[i], self.quartos[i], self.price[i], self.operacao[i])
+                for i in self.candidates(filters, near, cache))
+    
+    def search_text(self, query, k=5, **filters):
+        """Busca textual (descrição, destaque, bairro) ordenada por relevância BM25, só entre os que passam pelos filtros"""
+        allowed = set(self.candidates(filters)) if filters else None
+        return [self.properties[i] for i, _ in self.text_index.search(query, k, allowed=allowed)]
+    
+    def cheapest(self):
+        """Imóvel mais barato ou None"""
+        if not self.properties:
+            return None
+        return self.properties[self.index.price_order[0]]
@@ -0,0 +1,116 @@
+from bisect import bisect_left, bisect_right
+from utils.lru_cache import LRUCache
+
+class CatalogIndex:
+    """Índice invertido do catálogo.
+    
+    - Campos categóricos (tipo, operação, bairro, cidade): valor -> conjunto
+      de posições (posting list).
+    - Campos numéricos (preço, quartos): posições ordenadas pelo valor, para
+      achar uma faixa com bisect.
+    
+    Uma busca começa pelo filtro mais seletivo e só confere os demais nos
+    candidatos dele, sem percorrer o catálogo inteiro.
+    """
+    
+    CATEGORICAL = ('tipo', 'operacao', 'bairro', 'cidade')
+    
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.postings = {field: {} for field in self.CATEGORICAL}
+        
+        for field in self.CATEGORICAL:
+            postings = self.postings[field]
+            for i, value in enumerate(getattr(catalog, field)):
+                postings.setdefault(value, set()).add(i)
+        
+        self.price_order = sorted(range(len(catalog)), key=catalog.price.__getitem__)
+        self.price_sorted = [catalog.price[i] for i in self.price_order]
+        self.quartos_order = sorted(range(len(catalog)), key=catalog.quartos.__getitem__)
+        self.quartos_sorted = [catalog.quartos[i] for i in self.quartos_order]
+        # Preços ordenados por combinação de filtros (usados nas sugestões de orçamento)
+        self._price_lists = LRUCache(max_size=256, ttl=float('inf'))
+    
+    def _substring_postings(self, field, term):
+        """Une as posting lists dos valores que contêm o termo (ex.: bairro)"""
+        matches = [ids for value, ids in self.postings[field].items() if term in value]
+        if len(matches) == 1:
+            return matches[0]
+        return set().union(*matches)
+    
+    def sorted_prices(self, **filters):
+        """Preços, em ordem crescente, dos imóveis que atendem aos filtros"""
+        key = tuple(sorted((name, value) for name, value in filters.items() if value is not None and value != ''))
+        return self._price_lists.get_or_compute(
+            key, lambda: [self.catalog.price[i] for i in self.search(order='price', **filters)]
+        )
+    
+    def search(self, tipo=None, operacao=None, bairro=None, cidade=None,
+               min_quartos=None, min_price=None, max_price=None, order=None):
+        """Posições que atendem a todos os filtros.
+        
+        order=None mantém a ordem do catálogo; order='price' ordena por preço.
+        """
+        catalog = self.catalog
+        
+        sets = []
+        if tipo:
+            sets.append(self.postings['tipo'].get(tipo, set()))
+        if operacao:
+            sets.append(self.postings['operacao'].get(operacao, set()))
+        if cidade:
+            sets.append(self.postings['cidade'].get(cidade, set()))
+        if bairro:
+            sets.append(self._substring_postings('bairro', bairro))
+        
+        # Faixas numéricas viram fatias das listas ordenadas
+        ranges = []
+        if min_price is not None or max_price is not None:
+            lo = bisect_left(self.price_sorted, min_price) if min_price is not None else 0
+            hi = bisect_right(self.price_sorted, max_price) if max_price is not None else len(self.price_sorted)
+            ranges.append(('price', lo, hi, min_price, max_price))
+        if min_quartos:
+            lo = bisect_left(self.quartos_sorted, min_quartos)
+            ranges.append(('quartos', lo, len(self.quartos_sorted), min_quartos, None))
+        
+        if any(lo >= hi for _, lo, hi, _, _ in ranges):
+            return []
+        
+        if not sets and not ranges:
+            return list(self.price_order) if order == 'price' else list(range(len(catalog)))
+        
+        # Interseção dos filtros categóricos, começando pelo menor conjunto
+        candidates = None
+        if sets:
+            sets.sort(key=len)
+            candidates = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+        
+        # A faixa mais estreita pode servir de ponto de partida
+        ranges.sort(key=lambda r: r[2] - r[1])
+        if candidates is None or (ranges and ranges[0][2] - ranges[0][1] < len(candidates)):
+            field, lo, hi, _, _ = ranges.pop(0)
+            ordered = (self.price_order if field == 'price' else self.quartos_order)[lo:hi]
+            if candidates is not None:
+                ordered = [i for i in ordered if i in candidates]
+            results = ordered
+            sorted_by_price = field == 'price'
+        else:
+            results = list(candidates)
+            sorted_by_price = False
+        
+        for field, _, _, low, high in ranges:
+            values = catalog.price if field == 'price' else catalog.quartos
+            if high is None:
+                results = [i for i in results if values[i] >= low]
+            elif low is None:
+                results = [i for i in results if values[i] <= high]
+            else:
+                results = [i for i in results if low <= values[i] <= high]
+        
+        if order == 'price':
+            if not sorted_by_price:
+                results.sort()
+                results.sort(key=catalog.price.__getitem__)
+        else:
+            results.sort()
+        return results
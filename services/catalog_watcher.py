@@ -0,0 +1,74 @@
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+class CatalogWatcher:
+    """Observa data/properties.json e recarrega o catálogo quando o arquivo muda.
+    
+    Usa polling de mtime/tamanho (sem dependências extras). A reconstrução
+    roda nesta thread; o PropertyService só troca a referência do snapshot
+    no final.
+    
+    Com feed_path (feed de imobiliária em JSON/CSV/XML) observa o feed no
+    lugar do JSON e aplica só a diferença dele ao catálogo; o feed que já
+    existe na partida é aplicado na primeira verificação.
+    """
+    
+    def __init__(self, property_service, interval=5.0, feed_path=None):
+        self.property_service = property_service
+        self.interval = interval
+        self.feed_path = feed_path
+        self.reloads = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._signature = None if feed_path else self._read_signature()
+    
+    @property
+    def path(self):
+        return self.feed_path or self.property_service.path
+    
+    def _read_signature(self):
+        try:
+            stat = os.stat(self.path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def check(self):
+        """Recarrega se o arquivo mudou desde a última verificação"""
+        signature = self._read_signature()
+        if signature is None or signature == self._signature:
+            return False
+        
+        self._signature = signature
+        if self.feed_path:
+            if self.property_service.ingest_feed(self.feed_path):
+                self.reloads += 1
+                return True
+            return False
+        if self.property_service.reload():
+            self.reloads += 1
+            return True
+        return False
+    
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='catalog-watcher', daemon=True)
+            self._thread.start()
+            logger.info(f"Observando {self.path} a cada {self.interval}s")
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Erro ao observar catálogo: {e}", exc_info=True)
@@ -0,0 +1,99 @@
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+class ColumnarCatalog:
+    """Catálogo em colunas NumPy para filtros e ranking vetorizados.
+    
+    Números (preço, quartos, suítes, área, vagas) ficam em arrays e campos
+    categóricos viram códigos inteiros. Cada filtro é uma máscara sobre o
+    inventário inteiro, calculada numa passada só.
+    """
+    
+    CATEGORICAL = ('tipo', 'operacao', 'bairro', 'cidade')
+    
+    def __init__(self, catalog):
+        if np is None:
+            raise ImportError("numpy não instalado")
+        
+        self.catalog = catalog
+        self.price = np.asarray(catalog.price, dtype=np.float64)
+        self.quartos = np.asarray(catalog.quartos, dtype=np.int32)
+        self.suites = np.asarray(catalog.suites, dtype=np.int32)
+        self.area = np.asarray(catalog.area, dtype=np.float64)
+        self.vagas = np.asarray(catalog.vagas, dtype=np.int32)
+        
+        self.vocab = {}
+        self.codes = {}
+        for field in self.CATEGORICAL:
+            vocab = {}
+            values = getattr(catalog, field)
+            self.codes[field] = np.fromiter(
+                (vocab.setdefault(value, len(vocab)) for value in values),
+                dtype=np.int32, count=len(values)
+            )
+            self.vocab[field] = vocab
+    
+    def _mask(self, tipo=None, operacao=None, bairro=None, cidade=None,
+              min_quartos=None, min_price=None, max_price=None):
+        mask = np.ones(len(self.price), dtype=bool)
+        
+        for field, value in (('tipo', tipo), ('operacao', operacao), ('cidade', cidade)):
+            if value:
+                code = self.vocab[field].get(value)
+                if code is None:
+                    return np.zeros(len(self.price), dtype=bool)
+                mask &= self.codes[field] == code
+        
+        if bairro:
+            # Substring: junta os códigos de todos os bairros que contêm o termo
+            matching = [code for value, code in self.vocab['bairro'].items() if bairro in value]
+            mask &= np.isin(self.codes['bairro'], matching)
+        
+        if min_quartos:
+            mask &= self.quartos >= min_quartos
+        if min_price is not None:
+            mask &= self.price >= min_price
+        if max_price is not None:
+            mask &= self.price <= max_price
+        
+        return mask
+    
+    def search(self, order=None, **filters):
+        """Mesma interface do CatalogIndex.search: posições que atendem aos filtros"""
+        ids = np.flatnonzero(self._mask(**filters))
+        if order == 'price':
+            ids = ids[np.argsort(self.price[ids], kind='stable')]
+        return ids.tolist()
+    
+    def _score(self, ids, max_price=None, quartos=None):
+        """Pontuação multicritério (preço, quartos, área, vagas) das posições `ids`"""
+        score = np.zeros(len(ids))
+        if max_price:
+            price = self.price[ids]
+            # Passar do orçamento pesa mais do que ficar abaixo dele
+            gap = (price - max_price) / max_price
+            score -= np.where(gap > 0, gap * 2.0, -gap * 0.5)
+        if quartos:
+            score -= np.abs(self.quartos[ids] - quartos) * 0.3
+        area = self.area[ids]
+        if area.max() > 0:
+            score += area / area.max() * 0.2
+        score += np.minimum(self.vagas[ids], 3) * 0.05
+        return score
+    
+    def by_score(self, positions, max_price=None, quartos=None):
+        """Posições da busca da que melhor combina para a que menos combina (empates na ordem original).
+        
+        O pedido (orçamento, quartos) só pesa na ordem: quem filtra é a busca.
+        """
+        ids = np.asarray(positions, dtype=np.intp)
+        if not len(ids):
+            return []
+        score = self._score(ids, max_price, quartos)
+        return ids[np.argsort(-score, kind='stable')].tolist()
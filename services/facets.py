@@ -0,0 +1,63 @@
+from bisect import bisect_right
+from collections import Counter
+from services.parsing import INVALID_PRICE
+
+# Faixas de preço (limites superiores) para venda e aluguel
+SALE_BUCKETS = [300000, 500000, 750000, 1000000, 2000000]
+RENT_BUCKETS = [1500, 2500, 4000, 6000]
+
+FACETS = ('tipo', 'bairro', 'quartos', 'price')
+
+def price_bucket(price, bounds):
+    """Faixa (mínimo, máximo) do preço; None no limite aberto (e para preço inválido)"""
+    if price >= INVALID_PRICE:
+        return None
+    i = bisect_right(bounds, price)
+    return (bounds[i - 1] if i > 0 else None, bounds[i] if i < len(bounds) else None)
+
+def count_facets(rows, tipo=None, bairro=None, min_quartos=None, min_price=None, max_price=None):
+    """Contagens por tipo, bairro, quartos e faixa de preço em uma única passada.
+    
+    `rows` são (tipo, bairro, quartos, preço, operação) dos imóveis que já
+    passaram pelos filtros fixos (operação, cidade, distância). Cada faceta
+    conta os imóveis que atendem a todos os outros filtros, menos o dela:
+    assim "bairro" responde onde há opções com o mesmo tipo, quartos e preço.
+    
+    Cada imóvel cai numa faixa da própria operação (RENT_BUCKETS para
+    aluguel, SALE_BUCKETS para o resto): sem operação na busca, um aluguel
+    de R$ 3 mil não vai para a faixa de venda "até R$ 300 mil".
+    
+    Retorna {'total': n, 'tipo': Counter, 'bairro': Counter, 'quartos': Counter,
+    'price': Counter de (mínimo, máximo)}.
+    """
+    facets = {name: Counter() for name in FACETS}
+    total = 0
+    
+    for row_tipo, row_bairro, row_quartos, row_price, row_operacao in rows:
+        ok_price = ((min_price is None or row_price >= min_price)
+                    and (max_price is None or row_price <= max_price))
+        failed = None
+        for name, ok in (('tipo', not tipo or row_tipo == tipo),
+                         ('bairro', not bairro or bairro in row_bairro),
+                         ('quartos', not min_quartos or row_quartos >= min_quartos),
+                         ('price', ok_price)):
+            if ok:
+                continue
+            if failed is not None:
+                # Falhou em dois filtros: não conta em nenhuma faceta
+                break
+            failed = name
+        else:
+            values = {'tipo': row_tipo, 'bairro': row_bairro, 'quartos': row_quartos,
+                      'price': price_bucket(row_price, RENT_BUCKETS if row_operacao == 'aluguel' else SALE_BUCKETS)}
+            if failed is None:
+                total += 1
+                for name in FACETS:
+                    facets[name][values[name]] += 1
+            else:
+                facets[failed][values[failed]] += 1
+    
+    facets['price'].pop(None, None)
+    
+    facets['total'] = total
+    return facets
@@ -0,0 +1,190 @@
+import csv
+import json
+import logging
+import os
+import re
+import xml.etree.ElementTree as ET
+from services.parsing import parse_price
+
+logger = logging.getLogger(__name__)
+
+# Campos que chegam como texto em CSV/XML mas são números no catálogo
+INT_FIELDS = ('quartos', 'suites', 'vagas')
+FLOAT_FIELDS = ('lat', 'lon')
+# Listas em uma coluna/tag só: "url1|url2"
+LIST_FIELDS = ('fotos', 'imagens')
+
+CHUNK_SIZE = 1 << 16
+
+_SEPARATORS = re.compile(r'[\s,]*')
+
+def _iter_json(f):
+    """Objetos de um array JSON ([{...}, {...}]) ou de JSON Lines, lendo aos pedaços"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    in_array = None
+    while True:
+        pos = _SEPARATORS.match(buffer, pos).end()
+        if in_array is None and pos < len(buffer):
+            in_array = buffer[pos] == '['
+            pos += in_array
+            continue
+        if in_array and buffer.startswith(']', pos):
+            return
+        if pos < len(buffer):
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Objeto cortado no fim do pedaço: lê mais
+                if eof:
+                    raise
+            else:
+                yield record
+                pos = end
+                continue
+        if eof:
+            return
+        chunk = f.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+def _coerce(record):
+    """Converte os campos de texto (CSV/XML) para os tipos do catálogo"""
+    result = {}
+    for key, value in record.items():
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+            try:
+                if key in INT_FIELDS:
+                    value = int(float(value.replace(',', '.')))
+                elif key in FLOAT_FIELDS:
+                    value = float(value.replace(',', '.'))
+            except ValueError:
+                pass
+            if key in LIST_FIELDS:
+                value = [item.strip() for item in value.split('|') if item.strip()]
+        result[key] = value
+    return result
+
+def _iter_csv(f):
+    sample = f.read(4096)
+    f.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+    except csv.Error:
+        dialect = csv.excel
+    for row in csv.DictReader(f, dialect=dialect):
+        yield _coerce({key.strip(): value for key, value in row.items() if key})
+
+def _iter_xml(path, record_tag):
+    """Cada <imovel> vira um dict; tags com filhos (<fotos><foto>...) viram listas"""
+    root = None
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        if root is None:
+            root = elem
+        if event != 'end' or elem.tag != record_tag:
+            continue
+        record = {}
+        for child in elem:
+            if len(child):
+                record[child.tag] = [(item.text or '').strip() for item in child]
+            else:
+                record[child.tag] = child.text or ''
+        yield _coerce(record)
+        # Descarta o que já foi lido: a memória fica limitada a um imóvel
+        elem.clear()
+        root.clear()
+
+def iter_feed(path, format=None, record_tag='imovel'):
+    """Imóveis de um feed (JSON, JSON Lines, CSV ou XML), um por vez.
+    
+    O formato vem da extensão quando não é informado. Nenhum formato carrega
+    o arquivo inteiro: a memória fica limitada ao imóvel sendo lido.
+    """
+    format = (format or os.path.splitext(path)[1].lstrip('.')).lower()
+    if format in ('json', 'jsonl', 'ndjson'):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from _iter_json(f)
+    elif format == 'csv':
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from _iter_csv(f)
+    elif format == 'xml':
+        yield from _iter_xml(path, record_tag)
+    else:
+        raise ValueError(f"Formato de feed não suportado: {format}")
+
+class FeedDiff:
+    """Diferença entre um feed e o catálogo atual.
+    
+    - added: imóveis novos (dicts do feed)
+    - changed: imóveis que mudaram (dicts do feed); price_changed lista os
+      códigos dos que mudaram de preço
+    - removed: códigos que estão no catálogo mas não vieram no feed
+    """
+    
+    def __init__(self):
+        self.added = []
+        self.changed = []
+        self.price_changed = []
+        self.removed = []
+        self.unchanged = 0
+        self.skipped = 0
+    
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+    
+    def summary(self):
+        return {
+            'added': len(self.added),
+            'changed': len(self.changed),
+            'price_changed': len(self.price_changed),
+            'removed': len(self.removed),
+            'unchanged': self.unchanged,
+            'skipped': self.skipped
+        }
+
+_MISSING = object()
+
+def _same(current, record):
+    """Mesmas chaves e valores (current pode ser um Listing, sem virar dict)"""
+    return len(current) == len(record) and all(
+        current.get(key, _MISSING) == value for key, value in record.items()
+    )
+
+def diff_feed(records, lookup, current_codes, partial=False):
+    """Compara o feed com o catálogo sem montar o feed inteiro na memória.
+    
+    `lookup(codigo)` devolve o imóvel atual (ou None) e `current_codes` são
+    os códigos do catálogo. Só o delta e os códigos vistos ficam guardados.
+    Com partial=True o feed traz só atualizações: quem não veio não é removido.
+    """
+    diff = FeedDiff()
+    seen = set()
+    for record in records:
+        code = str(record.get('codigo') or '').strip().upper()
+        if not code or code in seen:
+            diff.skipped += 1
+            continue
+        seen.add(code)
+        
+        current = lookup(code)
+        if current is None:
+            diff.added.append(record)
+        elif not _same(current, record):
+            diff.changed.append(record)
+            if parse_price(current.get('preco', '')) != parse_price(record.get('preco', '')):
+                diff.price_changed.append(code)
+        else:
+            diff.unchanged += 1
+    
+    if not partial:
+        diff.removed = [code for code in current_codes if code and code.upper() not in seen]
+    
+    if diff.skipped:
+        logger.warning(f"Feed: {diff.skipped} imóveis sem código ou com código repetido ignorados")
+    return diff
@@ -0,0 +1,157 @@
+import json
+import logging
+import re
+from services.text_search import fold, STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+def load_places(path='data/places.json'):
+    """Lê o arquivo de lugares (bairros, cidades, apelidos e pontos de interesse)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Erro ao ler {path}: {e}")
+        return {}
+
+# Semelhança mínima (Dice) entre uma palavra da mensagem e uma palavra do nome ("sako" ~ "saco")
+WORD_MIN_CONFIDENCE = 0.4
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def dice(a, b):
+    """Coeficiente de Dice entre dois conjuntos de trigramas"""
+    return 2.0 * len(a & b) / (len(a) + len(b))
+
+class Gazetteer:
+    """Nomes de bairros e cidades com busca aproximada por trigramas.
+    
+    Tolera erros de digitação e falta de acento ("centor", "jurere",
+    "ingleses"): cada nome é quebrado em trigramas e a consulta só compara
+    com os nomes que compartilham algum trigrama com ela.
+    
+    Nome de várias palavras só casa aproximado se a consulta apontar para
+    ele e só para ele: "grande" sozinho (Saco Grande ou Córrego Grande?) e
+    "casa grande" não viram bairro; "corego grande" vira.
+    """
+    
+    def __init__(self, min_confidence=0.5):
+        self.min_confidence = min_confidence
+        self.places = []
+        self.exact = {}
+        self.postings = {}
+        self.max_words = 1
+        # Palavra -> nomes que a contêm (para saber se a consulta aponta para um nome só)
+        self.word_names = {}
+    
+    def add(self, name, kind, alias=None):
+        """Registra um lugar; alias é outra grafia que aponta para o mesmo nome"""
+        key = fold(alias or name).strip()
+        if not key or (key, kind) in self.exact:
+            return
+        
+        place_id = len(self.places)
+        grams = trigrams(key)
+        words = [word for word in key.split() if word not in STOPWORDS]
+        self.places.append({'name': name, 'kind': kind, 'key': key, 'grams': len(grams), 'words': words})
+        self.exact[(key, kind)] = place_id
+        self.max_words = max(self.max_words, len(key.split()))
+        for word in words:
+            self.word_names.setdefault(word, set()).add(name)
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(place_id)
+    
+    def lookup(self, term, kind=None):
+        """Melhor lugar para o termo: {'name', 'kind', 'confidence'} ou None"""
+        key = fold(term).strip()
+        kinds = [kind] if kind else ['bairro', 'cidade']
+        for k in kinds:
+            place_id = self.exact.get((key, k))
+            if place_id is not None:
+                return self._result(place_id, 1.0)
+        
+        grams = trigrams(key)
+        counts = {}
+        for gram in grams:
+            for place_id in self.postings.get(gram, ()):
+                counts[place_id] = counts.get(place_id, 0) + 1
+        
+        best_id, best_score = None, 0.0
+        for place_id, common in counts.items():
+            place = self.places[place_id]
+            if kind and place['kind'] != kind:
+                continue
+            # Coeficiente de Dice entre os conjuntos de trigramas
+            score = 2.0 * common / (len(grams) + place['grams'])
+            if score > best_score and self._distinctive_match(key, place):
+                best_id, best_score = place_id, score
+        
+        if best_id is None or best_score < self.min_confidence:
+            return None
+        return self._result(best_id, best_score)
+    
+    def _distinctive_match(self, key, place):
+        """Se a consulta aponta só para este lugar (nomes de uma palavra sempre passam).
+        
+        Cada palavra da consulta precisa lembrar uma palavra do nome, e as
+        palavras lembradas juntas não podem estar também em outro nome.
+        """
+        if len(place['words']) < 2:
+            return True
+        wanted = [(word, trigrams(word)) for word in place['words']]
+        matched = set()
+        for word in key.split():
+            if word in STOPWORDS:
+                continue
+            grams = trigrams(word)
+            similar = {place_word for place_word, other in wanted if dice(grams, other) >= WORD_MIN_CONFIDENCE}
+            if not similar:
+                return False
+            matched |= similar
+        return len(set.intersection(*(self.word_names[word] for word in matched))) == 1 if matched else False
+    
+    def find_in_text(self, text, kind=None):
+        """Procura um lugar em qualquer trecho de 1 a N palavras da mensagem"""
+        words = re.findall(r'[a-z0-9]+', fold(text))
+        best = None
+        for size in range(min(self.max_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                chunk = words[start:start + size]
+                if size == 1 and (len(chunk[0]) < 4 or chunk[0] in STOPWORDS):
+                    continue
+                match = self.lookup(' '.join(chunk), kind)
+                if match and (best is None or match['confidence'] > best['confidence']):
+                    best = match
+                    if best['confidence'] == 1.0:
+                        return best
+        return best
+    
+    def _result(self, place_id, confidence):
+        place = self.places[place_id]
+        return {'name': place['name'], 'kind': place['kind'], 'confidence': round(confidence, 3)}
+    
+    @classmethod
+    def build(cls, bairros, cidades, path='data/places.json', places=None):
+        """Gazetteer com os lugares do catálogo + a lista configurável em data/places.json
+        
+        places: conteúdo já lido de data/places.json (evita ler o arquivo de novo)
+        """
+        gazetteer = cls()
+        for name in bairros:
+            gazetteer.add(name, 'bairro')
+        for name in cidades:
+            gazetteer.add(name, 'cidade')
+        
+        config = load_places(path) if places is None else places
+        for name in config.get('bairros', []):
+            gazetteer.add(name, 'bairro')
+        for name in config.get('cidades', []):
+            gazetteer.add(name, 'cidade')
+        for kind, aliases in config.get('apelidos', {}).items():
+            for alias, name in aliases.items():
+                gazetteer.add(name, kind, alias=alias)
+        return gazetteer
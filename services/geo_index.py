@@ -0,0 +1,227 @@
+import heapq
+import math
+import re
+from bisect import bisect_right
+from services.text_search import fold
+from services.gazetteer import load_places
+
+EARTH_RADIUS_KM = 6371.0
+LEAF_SIZE = 16
+
+def coordinates_of(prop):
+    """(lat, lon) do imóvel ou None quando não tem coordenadas válidas"""
+    try:
+        lat, lon = float(prop['lat']), float(prop['lon'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+def _to_xyz(lat, lon):
+    # Ponto na esfera terrestre: a distância em linha reta (corda) cresce junto
+    # com a distância pela superfície, então a árvore pode usar a euclidiana
+    lat, lon = math.radians(lat), math.radians(lon)
+    cos_lat = math.cos(lat)
+    return (EARTH_RADIUS_KM * cos_lat * math.cos(lon),
+            EARTH_RADIUS_KM * cos_lat * math.sin(lon),
+            EARTH_RADIUS_KM * math.sin(lat))
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / (2 * EARTH_RADIUS_KM)))
+
+def _km_to_chord(km):
+    return 2 * EARTH_RADIUS_KM * math.sin(min(km, math.pi * EARTH_RADIUS_KM) / (2 * EARTH_RADIUS_KM))
+
+class KDTree:
+    """k-d tree sobre coordenadas geográficas.
+    
+    Cada ponto vira (x, y, z) na esfera e a árvore divide o espaço pelo eixo
+    de cada nível, com folhas de até LEAF_SIZE pontos. Buscas por vizinhos e
+    por raio só visitam os ramos que podem ter pontos dentro da distância.
+    """
+    
+    def __init__(self, points):
+        # points: lista de (lat, lon, item)
+        self.items = [item for _, _, item in points]
+        self.coords = [_to_xyz(lat, lon) for lat, lon, _ in points]
+        self.root = self._build(list(range(len(points))), 0) if points else None
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def _build(self, ids, depth):
+        if len(ids) <= LEAF_SIZE:
+            return ids
+        axis = depth % 3
+        coords = self.coords
+        ids.sort(key=lambda i: coords[i][axis])
+        mid = len(ids) // 2
+        return (axis, coords[ids[mid]][axis],
+                self._build(ids[:mid], depth + 1),
+                self._build(ids[mid:], depth + 1))
+    
+    def nearest(self, lat, lon, k=5, max_km=None):
+        """Os k pontos mais próximos: lista de (km, item), do mais perto ao mais longe"""
+        if self.root is None or k <= 0:
+            return []
+        
+        target = _to_xyz(lat, lon)
+        limit = _km_to_chord(max_km) ** 2 if max_km is not None else float('inf')
+        coords = self.coords
+        heap = []  # (-distância², id): o pior dos k fica no topo
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            # bound: distância² mínima possível até a região do nó
+            if bound > limit or (len(heap) == k and bound >= -heap[0][0]):
+                continue
+            if isinstance(node, list):
+                for i in node:
+                    x, y, z = coords[i]
+                    d2 = (x - target[0]) ** 2 + (y - target[1]) ** 2 + (z - target[2]) ** 2
+                    if d2 > limit:
+                        continue
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d2, i))
+                    elif d2 < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d2, i))
+                continue
+            
+            axis, split, left, right = node
+            diff = target[axis] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            # O lado de lá só é visitado se a fronteira estiver mais perto que o pior atual
+            stack.append((far, max(bound, diff * diff)))
+            stack.append((near, bound))
+        
+        return [(_chord_to_km(math.sqrt(-d2)), self.items[i]) for d2, i in sorted(heap, reverse=True)]
+    
+    def within(self, lat, lon, radius_km):
+        """Todos os pontos a até radius_km: lista de (km, item) ordenada pela distância"""
+        if self.root is None:
+            return []
+        
+        target = _to_xyz(lat, lon)
+        limit = _km_to_chord(radius_km) ** 2
+        coords = self.coords
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                for i in node:
+                    x, y, z = coords[i]
+                    d2 = (x - target[0]) ** 2 + (y - target[1]) ** 2 + (z - target[2]) ** 2
+                    if d2 <= limit:
+                        found.append((d2, i))
+                continue
+            
+            axis, split, left, right = node
+            diff = target[axis] - split
+            if diff < 0 or diff * diff <= limit:
+                stack.append(left)
+            if diff >= 0 or diff * diff <= limit:
+                stack.append(right)
+        
+        found.sort()
+        return [(_chord_to_km(math.sqrt(d2)), self.items[i]) for d2, i in found]
+
+class GeoIndex:
+    """Coordenadas dos imóveis e distâncias até os pontos de interesse.
+    
+    As distâncias de cada imóvel até o ponto mais próximo de cada categoria
+    ("centro", "praia", ...) são calculadas uma vez no carregamento e
+    guardadas ordenadas; "até 2 km do centro" vira uma busca binária nessa
+    lista, sem medir distância nenhuma na hora da mensagem.
+    
+    Com `previous` (o GeoIndex do snapshot anterior), imóveis com o mesmo
+    código e as mesmas coordenadas reaproveitam as distâncias já calculadas.
+    """
+    
+    DEFAULT_RADIUS_KM = 1.0
+    
+    def __init__(self, entries, points=None, previous=None):
+        # entries: lista de (codigo, lat, lon) na ordem do catálogo; lat/lon podem ser None
+        self.entries = entries
+        self.codes = [code for code, _, _ in entries]
+        self.position = {code.upper(): i for i, code in enumerate(self.codes) if code}
+        located = [(lat, lon, i) for i, (_, lat, lon) in enumerate(entries) if lat is not None]
+        self.tree = KDTree(located)
+        
+        # Posição no índice anterior dos imóveis que não se mexeram
+        same = {}
+        if previous is not None:
+            for _, _, i in located:
+                j = previous.position.get(self.codes[i].upper()) if self.codes[i] else None
+                if j is not None and previous.entries[j] == entries[i]:
+                    same[i] = j
+        
+        self.places = {}
+        self.points = {}
+        self.distance = {}
+        self.ranked = {}
+        for key, config in (points or {}).items():
+            places = [(p['lat'], p['lon'], p.get('nome', key)) for p in config.get('locais', [])]
+            if not places:
+                continue
+            self.points[key] = {
+                'label': config.get('rotulo', key),
+                'aliases': sorted({fold(alias) for alias in config.get('apelidos', [key])}, key=len, reverse=True),
+                'radius_km': float(config.get('raio_km', self.DEFAULT_RADIUS_KM))
+            }
+            
+            self.places[key] = places
+            
+            poi_tree = KDTree(places)
+            distance = [None] * len(entries)
+            known = previous.distance.get(key) if previous is not None and previous.places.get(key) == places else None
+            for lat, lon, i in located:
+                j = same.get(i) if known is not None else None
+                distance[i] = known[j] if j is not None else poi_tree.nearest(lat, lon, 1)[0][0]
+            self.distance[key] = distance
+            
+            ranked = sorted((d, i) for i, d in enumerate(distance) if d is not None)
+            self.ranked[key] = ([d for d, _ in ranked], [i for _, i in ranked])
+    
+    @classmethod
+    def build(cls, entries, path='data/places.json', previous=None, places=None):
+        if places is None:
+            places = load_places(path)
+        return cls(entries, places.get('pontos', {}), previous)
+    
+    def find_point(self, text):
+        """Ponto de interesse citado no texto: {'point', 'alias', 'label', 'radius_km'} ou None"""
+        words = ' ' + ' '.join(re.findall(r'[a-z0-9]+', fold(text))) + ' '
+        best = None
+        for key, point in self.points.items():
+            for alias in point['aliases']:
+                if f' {alias} ' in words and (best is None or len(alias) > len(best['alias'])):
+                    best = {'point': key, 'alias': alias, 'label': point['label'], 'radius_km': point['radius_km']}
+                    break
+        return best
+    
+    def near(self, point, radius_km=None):
+        """Posições a até radius_km do ponto (padrão: raio do ponto), da mais perto à mais longe"""
+        if point not in self.ranked:
+            return []
+        if radius_km is None:
+            radius_km = self.points[point]['radius_km']
+        distances, positions = self.ranked[point]
+        return positions[:bisect_right(distances, radius_km)]
+    
+    def restrict(self, positions, point, radius_km=None):
+        """Filtra as posições de uma busca pela distância ao ponto, ordenando pela distância"""
+        allowed = set(positions)
+        return [i for i in self.near(point, radius_km) if i in allowed]
+    
+    def distance_to(self, code, point):
+        """Distância pré-calculada (km) do imóvel até o ponto, ou None"""
+        i = self.position.get((code or '').upper())
+        if i is None or point not in self.distance:
+            return None
+        return self.distance[point][i]
+    
+    def nearest(self, lat, lon, k=5, max_km=None):
+        """Os k imóveis mais próximos de uma coordenada qualquer: lista de (km, posição)"""
+        return self.tree.nearest(lat, lon, k, max_km)
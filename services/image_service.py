@@ -1,31 +1,28 @@
 import logging
 from typing import List, Dict
+from services.property_service import PropertyService
+from utils import keyword_matcher
 
 logger = logging.getLogger(__name__)
 
+IMAGE_KEYWORDS = ['foto', 'fotos', 'imagem', 'imagens', 'ver', 'mostra', 'manda', 'tour', 'vídeo', '360']
+keyword_matcher.register('image', {'request': IMAGE_KEYWORDS})
+
 class ImageService:
-    def __init__(self):
-        self.properties = self._load_properties()
-    
-    def _load_properties(self):
-        """Carrega propriedades com imagens"""
-        try:
-            import json
-            with open('data/properties.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
+    def __init__(self, property_service=None):
+        # Usa o mesmo catálogo do PropertyService em vez de reler o JSON
+        self.property_service = property_service or PropertyService()
     
     def get_property_images(self, property_code: str) -> Dict:
         """Retorna imagens de um imóvel específico"""
-        for prop in self.properties:
-            if prop.get('codigo', '').upper() == property_code.upper():
-                return {
-                    "found": True,
-                    "images": prop.get('imagens', []),
-                    "tour_virtual": prop.get('tour_virtual', None),
-                    "property": prop
-                }
+        prop = self.property_service.get_property_details(property_code)
+        if prop:
+            return {
+                "found": True,
+                "images": self.property_service.get_property_photos_list(property_code),
+                "tour_virtual": self.property_service.get_property_tour(property_code),
+                "property": prop
+            }
         
         return {"found": False, "images": [], "tour_virtual": None}
     
@@ -58,6 +55,4 @@ class ImageService:
     
     def has_image_request(self, text: str) -> bool:
         """Detecta se o usuário quer ver imagens"""
-        image_keywords = ['foto', 'fotos', 'imagem', 'imagens', 'ver', 'mostra', 'manda', 'tour', 'vídeo', '360']
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in image_keywords)
+        return bool(keyword_matcher.match(text, 'image'))
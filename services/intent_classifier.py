@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from utils.keyword_matcher import normalize
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DATA_PATH = 'data/intents.json'
+MODEL_PATH = 'data/intent_model.npz'
+
+# Abaixo desta confiança o modelo local não decide sozinho (pergunta ao LLM, se houver)
+CONFIDENCE_THRESHOLD = float(os.environ.get('INTENT_CONFIDENCE_THRESHOLD', 0.5))
+
+# Tamanho do espaço de hashing (potência de 2)
+DIM = 1 << 14
+
+_WORD = re.compile(r'\w+')
+
+def features(text):
+    """N-gramas do texto normalizado: palavras, pares de palavras e trigramas de letras"""
+    words = _WORD.findall(normalize(text))
+    feats = ['^']
+    feats.extend('w:' + word for word in words)
+    feats.extend(f'b:{a} {b}' for a, b in zip(words, words[1:]))
+    for word in words:
+        padded = f'<{word}>'
+        feats.extend('c:' + padded[i:i + 3] for i in range(len(padded) - 2))
+    if '?' in text:
+        feats.append('p:?')
+    return feats
+
+def _hash(feature, mask):
+    # crc32 e não hash(): o mesmo índice em qualquer processo (o modelo é salvo em disco)
+    return zlib.crc32(feature.encode('utf-8')) & mask
+
+def load_labels(path=DATA_PATH):
+    """Intenções do arquivo de treino ([] se não existir)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return list(json.load(f))
+    except (OSError, ValueError):
+        return []
+
+def load_examples(path=DATA_PATH):
+    """Exemplos rotulados de {"intenção": ["frase", ...]} como lista de (frase, intenção)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [(text, intent) for intent, texts in data.items() for text in texts]
+
+def split_examples(examples, test_ratio=0.2, seed=42):
+    """Separa treino e teste mantendo a proporção de cada intenção"""
+    by_intent = {}
+    for example in examples:
+        by_intent.setdefault(example[1], []).append(example)
+    rng = random.Random(seed)
+    train, test = [], []
+    for group in by_intent.values():
+        group = group[:]
+        rng.shuffle(group)
+        cut = max(1, round(len(group) * test_ratio))
+        test.extend(group[:cut])
+        train.extend(group[cut:])
+    return train, test
+
+class IntentClassifier:
+    """Classificador de intenção local: n-gramas com hashing + regressão logística (softmax).
+    
+    Cada frase vira ~50 índices num espaço de DIM posições, sem vocabulário
+    para guardar; a pontuação de cada intenção é a soma dos pesos desses
+    índices. Uma predição custa dezenas de microssegundos, sem rede.
+    """
+    
+    def __init__(self, labels, weights, bias, dim=DIM):
+        self.labels = list(labels)
+        self.weights = weights
+        self.bias = bias
+        self.dim = dim
+        self._mask = dim - 1
+    
+    def _encode(self, texts):
+        """Índices, valores e início de cada frase (formato CSR) de um lote"""
+        indices, values, offsets = [], [], []
+        for text in texts:
+            feats = features(text)
+            offsets.append(len(indices))
+            # Normalizado pelo tamanho: frases longas não dominam o treino
+            value = 1.0 / len(feats) ** 0.5
+            indices.extend(_hash(feature, self._mask) for feature in feats)
+            values.extend([value] * len(feats))
+        return (np.array(indices, dtype=np.int64), np.array(values, dtype=np.float32),
+                np.array(offsets, dtype=np.int64))
+    
+    def _probabilities(self, indices, values, offsets):
+        scores = np.add.reduceat(self.weights[indices] * values[:, None], offsets, axis=0) + self.bias
+        scores -= scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+    
+    @classmethod
+    def train(cls, examples, dim=DIM, epochs=300, learning_rate=5.0, l2=1e-4):
+        """Treina com descida de gradiente no lote inteiro (exemplos: lista de (frase, intenção))"""
+        labels = sorted({intent for _, intent in examples})
+        model = cls(labels, np.zeros((dim, len(labels)), dtype=np.float32),
+                    np.zeros(len(labels), dtype=np.float32), dim)
+        
+        indices, values, offsets = model._encode([text for text, _ in examples])
+        rows = np.repeat(np.arange(len(examples)), np.diff(np.append(offsets, len(indices))))
+        targets = np.zeros((len(examples), len(labels)), dtype=np.float32)
+        targets[np.arange(len(examples)), [labels.index(intent) for _, intent in examples]] = 1
+        
+        # Gradiente só nas posições usadas: contribuições ordenadas por índice e somadas por trecho
+        order = np.argsort(indices, kind='stable')
+        used, starts = np.unique(indices[order], return_index=True)
+        
+        for _ in range(epochs):
+            errors = (model._probabilities(indices, values, offsets) - targets) / len(examples)
+            contributions = (errors[rows] * values[:, None])[order]
+            weights = model.weights[used]
+            model.weights[used] = weights - learning_rate * (np.add.reduceat(contributions, starts, axis=0) + l2 * weights)
+            model.bias -= learning_rate * errors.sum(axis=0)
+        return model
+    
+    def predict(self, text):
+        """(intenção, confiança entre 0 e 1)"""
+        feats = features(text)
+        indices = [_hash(feature, self._mask) for feature in feats]
+        scores = self.weights[indices].sum(axis=0) / len(feats) ** 0.5 + self.bias
+        exp = np.exp(scores - scores.max())
+        best = int(exp.argmax())
+        return self.labels[best], float(exp[best] / exp.sum())
+    
+    def predict_batch(self, texts):
+        """predict() de várias frases numa operação só: lista de (intenção, confiança)"""
+        if not texts:
+            return []
+        probabilities = self._probabilities(*self._encode(texts))
+        best = probabilities.argmax(axis=1)
+        return [(self.labels[i], float(p[i])) for i, p in zip(best, probabilities)]
+    
+    def evaluate(self, examples, threshold=CONFIDENCE_THRESHOLD):
+        """Acurácia, precisão/recall por intenção e confusões ({esperada: {prevista: n}}).
+        
+        coverage: fração decidida localmente (confiança >= threshold);
+        confident_accuracy: acurácia só nessa fração (o resto iria para o LLM).
+        """
+        predictions = self.predict_batch([text for text, _ in examples])
+        confusion = {}
+        for (_, expected), (got, _) in zip(examples, predictions):
+            row = confusion.setdefault(expected, {})
+            row[got] = row.get(got, 0) + 1
+        
+        per_intent = {}
+        for intent in self.labels:
+            tp = confusion.get(intent, {}).get(intent, 0)
+            predicted_n = sum(row.get(intent, 0) for row in confusion.values())
+            actual_n = sum(confusion.get(intent, {}).values())
+            per_intent[intent] = {
+                'precision': round(tp / predicted_n, 3) if predicted_n else 0.0,
+                'recall': round(tp / actual_n, 3) if actual_n else 0.0,
+                'support': actual_n
+            }
+        
+        hits = [expected == got for (_, expected), (got, _) in zip(examples, predictions)]
+        confident = [hit for hit, (_, confidence) in zip(hits, predictions) if confidence >= threshold]
+        return {
+            'accuracy': round(sum(hits) / len(hits), 3) if hits else 0.0,
+            'coverage': round(len(confident) / len(hits), 3) if hits else 0.0,
+            'confident_accuracy': round(sum(confident) / len(confident), 3) if confident else 0.0,
+            'per_intent': per_intent,
+            'confusion': confusion
+        }
+    
+    def save(self, path=MODEL_PATH):
+        np.savez(path, weights=self.weights, bias=self.bias, labels=np.array(self.labels), dim=np.array(self.dim))
+    
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls([str(label) for label in data['labels']], data['weights'], data['bias'], int(data['dim']))
+
+def load_intent_classifier(model_path=None, data_path=DATA_PATH):
+    """Modelo salvo por train_intents.py ou, se não houver (ou estiver velho), treinado agora.
+    
+    Retorna None sem NumPy ou sem dados de treino.
+    """
+    if np is None:
+        logger.warning("numpy não instalado - intenções só pelo LLM")
+        return None
+    
+    model_path = model_path or os.environ.get('INTENT_MODEL_PATH', MODEL_PATH)
+    data_mtime = os.path.getmtime(data_path) if os.path.exists(data_path) else 0
+    if os.path.exists(model_path) and os.path.getmtime(model_path) >= data_mtime:
+        try:
+            return IntentClassifier.load(model_path)
+        except Exception as e:
+            logger.warning(f"Erro ao ler {model_path}: {e}")
+    
+    if not data_mtime:
+        logger.warning(f"Sem {data_path} - intenções só pelo LLM")
+        return None
+    
+    t0 = time.perf_counter()
+    classifier = IntentClassifier.train(load_examples(data_path))
+    logger.info(f"Classificador de intenções treinado em {(time.perf_counter() - t0) * 1000:.0f}ms "
+                f"(salve com: python train_intents.py)")
+    return classifier
+
+def llm_intent(client, model, text, labels):
+    """Intenção escolhida pelo LLM entre `labels`, ou None"""
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "Classifique a intenção da mensagem de um cliente de imobiliária. "
+                                              f"Responda só com um destes rótulos: {', '.join(labels)}."},
+                {"role": "user", "content": text}
+            ],
+            temperature=0,
+            max_tokens=10
+        )
+        label = response.choices[0].message.content.strip().lower()
+        return label if label in labels else None
+    except Exception as e:
+        logger.error(f"Erro ao classificar intenção: {e}")
+        return None
+
+class IntentRouter:
+    """Intenção da mensagem: modelo local primeiro, LLM só quando ele tem dúvida.
+    
+    Com confiança >= threshold a resposta é local (microssegundos, sem custo).
+    Abaixo disso chama `fallback(texto, intenções)`, se houver; se o LLM
+    não responder, fica a previsão local mesmo.
+    """
+    
+    def __init__(self, classifier=None, fallback=None, threshold=CONFIDENCE_THRESHOLD):
+        self.classifier = classifier
+        self.fallback = fallback
+        self.threshold = threshold
+        # Sem modelo (sem NumPy) o LLM ainda escolhe entre as intenções do arquivo de treino
+        self.labels = classifier.labels if classifier is not None else load_labels()
+        self.counts = {'local': 0, 'llm': 0, 'llm_failed': 0}
+        self._lock = threading.Lock()
+    
+    def classify(self, text):
+        """{'intent', 'confidence', 'source'}; source é 'local', 'llm' ou 'none'"""
+        if self.classifier is None:
+            return self._resolve(text, (None, 0.0))
+        return self._resolve(text, self.classifier.predict(text))
+    
+    def classify_batch(self, texts):
+        """classify() de várias mensagens; o modelo local roda num lote só"""
+        if self.classifier is None:
+            return [self._resolve(text, (None, 0.0)) for text in texts]
+        return [self._resolve(text, prediction) for text, prediction in zip(texts, self.classifier.predict_batch(texts))]
+    
+    def _resolve(self, text, prediction):
+        intent, confidence = prediction
+        if confidence >= self.threshold or self.fallback is None:
+            self._count('local')
+            return {'intent': intent, 'confidence': confidence, 'source': 'local' if intent else 'none'}
+        
+        llm_label = self.fallback(text, self.labels) if self.labels else None
+        if llm_label:
+            self._count('llm')
+            return {'intent': llm_label, 'confidence': confidence, 'source': 'llm'}
+        
+        self._count('llm_failed')
+        return {'intent': intent, 'confidence': confidence, 'source': 'local' if intent else 'none'}
+    
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+    
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        return dict(counts, threshold=self.threshold,
+                    local_rate=round(counts['local'] / total, 3) if total else 0.0)
@@ -1,12 +1,16 @@
 from typing import Dict
+from utils import keyword_matcher
+
+LANGUAGE_PATTERNS = {
+    "en": ["hello", "house", "apartment", "rent", "buy", "how much", "where", "when"],
+    "es": ["hola", "casa", "apartamento", "alquiler", "comprar", "cuánto", "dónde", "cuándo"],
+    "pt": ["olá", "oi", "casa", "apartamento", "alugar", "comprar", "quanto", "onde", "quando"]
+}
+keyword_matcher.register('language', LANGUAGE_PATTERNS)
 
 class LanguageDetector:
     def __init__(self):
-        self.language_patterns = {
-            "en": ["hello", "house", "apartment", "rent", "buy", "how much", "where", "when"],
-            "es": ["hola", "casa", "apartamento", "alquiler", "comprar", "cuánto", "dónde", "cuándo"],
-            "pt": ["olá", "oi", "casa", "apartamento", "alugar", "comprar", "quanto", "onde", "quando"]
-        }
+        self.language_patterns = LANGUAGE_PATTERNS
         
         self.greetings = {
             "pt": "Olá! Como posso ajudar você hoje? 🏠",
@@ -27,14 +31,11 @@ class LanguageDetector:
             }
         }
     
-    def detect_language(self, text: str) -> str:
-        """Detecta o idioma da mensagem"""
-        text_lower = text.lower()
-        scores = {}
-        
-        for lang, patterns in self.language_patterns.items():
-            score = sum(1 for word in patterns if word in text_lower)
-            scores[lang] = score
+    def detect_language(self, text: str, found=None) -> str:
+        """Detecta o idioma da mensagem (`found`: palavras já encontradas na Analysis)"""
+        if found is None:
+            found = keyword_matcher.match(text, 'language')
+        scores = {lang: len(found.get(lang, ())) for lang in self.language_patterns}
         
         # Se não detectar, assume português
         detected = max(scores, key=scores.get) if max(scores.values()) > 0 else "pt"
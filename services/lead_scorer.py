@@ -1,20 +1,26 @@
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List
+from utils import keyword_matcher
+from utils.conversation_store import ConversationStore
+
+HOT_SIGNALS = {
+    'urgency': ['urgente', 'hoje', 'rápido', 'preciso', 'imediato', 'agora'],
+    'commitment': ['comprar', 'fechar', 'decidir', 'quanto entrada', 'financiamento'],
+    'family': ['esposa', 'marido', 'família', 'filhos', 'mudança', 'casando'],
+    'specific': ['gostei', 'perfeito', 'é esse', 'quero esse', 'adorei'],
+    'viewing': ['visitar', 'ver', 'conhecer', 'quando posso', 'marcar'],
+    'budget': ['valor', 'preço', 'quanto', 'entrada', 'parcela', 'à vista']
+}
+keyword_matcher.register('lead', HOT_SIGNALS)
 
 class LeadScorer:
     """Sistema de pontuação de leads em tempo real"""
     
-    def __init__(self):
-        self.scores = {}
-        self.hot_signals = {
-            'urgency': ['urgente', 'hoje', 'rápido', 'preciso', 'imediato', 'agora'],
-            'commitment': ['comprar', 'fechar', 'decidir', 'quanto entrada', 'financiamento'],
-            'family': ['esposa', 'marido', 'família', 'filhos', 'mudança', 'casando'],
-            'specific': ['gostei', 'perfeito', 'é esse', 'quero esse', 'adorei'],
-            'viewing': ['visitar', 'ver', 'conhecer', 'quando posso', 'marcar'],
-            'budget': ['valor', 'preço', 'quanto', 'entrada', 'parcela', 'à vista']
-        }
+    def __init__(self, scores=None):
+        # Limitado como as conversas: leads parados há mais tempo saem primeiro
+        self.scores = scores if scores is not None else ConversationStore()
+        self.hot_signals = HOT_SIGNALS
     
     def analyze_lead(self, user_id: str, conversation_history: List[Dict]) -> Dict:
         """Analisa e pontua o lead"""
@@ -25,14 +31,11 @@ class LeadScorer:
         # Analisa cada mensagem
         for msg in conversation_history:
             if msg.get('from') == 'user':
-                text = msg.get('text', '').lower()
-                
-                # Busca sinais quentes
-                for category, keywords in self.hot_signals.items():
+                # Busca sinais quentes (uma passada só pelo texto; o automato guarda a varredura da mensagem)
+                for category, keywords in keyword_matcher.match(msg.get('text', ''), 'lead').items():
                     for keyword in keywords:
-                        if keyword in text:
-                            score += 10
-                            signals_found.append(f"{category}: {keyword}")
+                        score += 10
+                        signals_found.append(f"{category}: {keyword}")
         
         # Fatores comportamentais
         if len(conversation_history) > 5:
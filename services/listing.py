@@ -0,0 +1,78 @@
+import sys
+from collections.abc import Mapping
+
+# Campos com poucos valores distintos, repetidos em milhares de imóveis
+CATEGORICAL = ('tipo', 'operacao', 'bairro', 'cidade')
+
+# Ordem das chaves compartilhada entre imóveis com o mesmo formato
+_layouts = {}
+
+class Listing(Mapping):
+    """Imóvel do catálogo em formato compacto e somente leitura.
+    
+    Os campos conhecidos ficam em __slots__, sem um dict por imóvel repetindo
+    as mesmas chaves; campos desconhecidos vão para `_extra`. Os valores
+    categóricos são internados (sys.intern): "Florianópolis" fica uma vez só
+    na memória, não uma vez por imóvel.
+    
+    Para quem ainda espera dicts, o próprio registro é a visão: prop['tipo'],
+    prop.get('fotos'), `in`, items() e dict(prop) funcionam. Não dá para
+    alterar; para mudar um imóvel use to_dict() e recarregue o catálogo.
+    """
+    
+    FIELDS = ('codigo', 'tipo', 'operacao', 'bairro', 'cidade', 'lat', 'lon', 'quartos', 'suites',
+              'area', 'vagas', 'preco', 'descricao', 'destaque', 'fotos', 'imagens', 'tour_virtual')
+    __slots__ = FIELDS + ('_keys', '_extra')
+    
+    @classmethod
+    def from_dict(cls, data):
+        record = cls()
+        extra = None
+        for key, value in data.items():
+            if key in _FIELD_SET:
+                if key in CATEGORICAL and isinstance(value, str):
+                    value = sys.intern(value)
+                setattr(record, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        keys = tuple(data)
+        record._keys = _layouts.setdefault(keys, keys)
+        record._extra = extra
+        return record
+    
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+    
+    def get(self, key, default=None):
+        # Atalho: o get do Mapping passa por __getitem__ e exceções
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        return self._extra.get(key, default) if self._extra is not None else default
+    
+    def __iter__(self):
+        return iter(self._keys)
+    
+    def __len__(self):
+        return len(self._keys)
+    
+    def to_dict(self):
+        """Cópia em dict comum (ex.: para gravar em JSON)"""
+        return {key: self[key] for key in self._keys}
+    
+    def __repr__(self):
+        return f"Listing({self.to_dict()!r})"
+
+_FIELD_SET = frozenset(Listing.FIELDS)
+
+def to_listing(prop):
+    """Registro compacto do imóvel (o próprio, se já for um Listing)"""
+    return prop if isinstance(prop, Listing) else Listing.from_dict(prop)
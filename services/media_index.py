@@ -0,0 +1,58 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+def load_property_images(path='data/property_images.json'):
+    """Fotos extras por código ({"AP001": [urls]}); {} se o arquivo não existir"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Erro ao ler {path}: {e}")
+        return {}
+
+class MediaIndex:
+    """Fotos e tour virtual de cada imóvel, montados uma vez no carregamento.
+    
+    Junta as três origens, nesta ordem: `fotos` do imóvel, `imagens` do
+    imóvel e data/property_images.json, sem URLs repetidas. Pedido de fotos
+    e anexos do webhook viram uma consulta de dicionário por código.
+    """
+    
+    SOURCES = ('fotos', 'imagens')
+    
+    def __init__(self, properties, extra=None):
+        extra = {code.upper(): urls for code, urls in (extra or {}).items()}
+        self.media = {}
+        self.tours = {}
+        
+        for prop in properties:
+            code = (prop.get('codigo') or '').upper()
+            if not code or code in self.media or code in self.tours:
+                continue
+            
+            urls = []
+            for source in self.SOURCES:
+                urls.extend(prop.get(source) or [])
+            urls.extend(extra.get(code) or [])
+            # dict.fromkeys: tira repetidas mantendo a ordem
+            media = tuple(dict.fromkeys(url.strip() for url in urls if isinstance(url, str) and url.strip()))
+            if media:
+                self.media[code] = media
+            if prop.get('tour_virtual'):
+                self.tours[code] = prop['tour_virtual']
+    
+    @classmethod
+    def build(cls, properties, path='data/property_images.json'):
+        return cls(properties, load_property_images(path))
+    
+    def photos(self, code):
+        """URLs das fotos do imóvel, na ordem de exibição (lista vazia se não houver)"""
+        return list(self.media.get((code or '').upper(), ()))
+    
+    def tour(self, code):
+        """URL do tour virtual ou None"""
+        return self.tours.get((code or '').upper())
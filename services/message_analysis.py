@@ -0,0 +1,261 @@
+import logging
+import re
+import threading
+import time
+from types import MappingProxyType
+from services.language_detector import LanguageDetector
+from services.sentiment_analyzer import SentimentAnalyzer
+from services.text_search import fold
+from utils import keyword_matcher
+
+logger = logging.getLogger(__name__)
+
+# Etapas do pipeline, na ordem em que rodam
+STAGES = ('normalize', 'keywords', 'price', 'code', 'preferences', 'sentiment', 'language', 'intent')
+
+# "2 km", "1,5 quilômetros", "500 metros", "300m"
+DISTANCE_PATTERN = r'(\d+(?:[.,]\d+)?)\s*(km|quil[oô]metros?|metros?|m)\b'
+
+PRICE_MAX_PATTERNS = [
+    r'abaixo de (\d+)',
+    r'menos de (\d+)',
+    r'até (\d+)',
+    r'menor que (\d+)',
+    r'maximo (\d+)',
+    r'máximo (\d+)',
+    r'no maximo (\d+)',
+    r'no máximo (\d+)'
+]
+PRICE_RANGE_PATTERN = r'entre (\d+) e (\d+)'
+
+_WORD = re.compile(r'\w+')
+_EMPTY = MappingProxyType({})
+
+class Analysis:
+    """Tudo o que o bot extrai de uma mensagem, calculado uma vez só.
+    
+    Montada pelo MessageAnalyzer e somente leitura: o handler, o
+    LeadScorer e o serviço premium leem daqui em vez de baixar a caixa e
+    rodar as mesmas regex de novo.
+    
+    - text / lowered / folded / tokens: original, minúsculo, sem acento, palavras
+    - price: pedido de preço ({'max_price', 'min_price', 'type'}) ou None
+    - code: código de imóvel citado (AP001) ou None
+    - tipo, operacao, quartos, near, bairro, cidade: filtros de busca
+    - sentiment, language: análise de sentimento e idioma
+    - intent: {'intent', 'confidence'} do classificador local, ou None sem ele
+    - timings: milissegundos gastos em cada etapa
+    """
+    
+    __slots__ = ('text', 'lowered', 'folded', 'tokens', 'price', 'code', 'tipo', 'operacao', 'quartos',
+                 'near', 'bairro', 'cidade', 'sentiment', 'language', 'intent', 'timings', '_views')
+    
+    def __init__(self, **values):
+        for field in self.__slots__:
+            object.__setattr__(self, field, values.get(field))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Analysis é somente leitura: {name}")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"Analysis é somente leitura: {name}")
+    
+    @property
+    def keywords(self):
+        """Todas as palavras-chave encontradas: {'namespace.categoria': palavras}"""
+        return self._views.get(None, _EMPTY)
+    
+    def hits(self, namespace):
+        """Palavras-chave de um classificador: {categoria: palavras}"""
+        return self._views.get(namespace, _EMPTY)
+    
+    @property
+    def is_search(self):
+        return 'search' in self.hits('handler') or self.near is not None
+    
+    def preferences(self):
+        """Filtros de busca citados na mensagem, num dict novo (a conversa pode alterá-lo)"""
+        prefs = {}
+        for field in ('tipo', 'operacao', 'quartos', 'bairro', 'cidade'):
+            value = getattr(self, field)
+            if value is not None:
+                prefs[field] = value
+        if self.near is not None:
+            prefs['near'] = dict(self.near)
+        return prefs
+    
+    def __repr__(self):
+        return f"Analysis({self.text!r}, timings={dict(self.timings or {})})"
+
+def extract_price(lowered):
+    """Pedido de preço no texto em minúsculas ou None"""
+    # "até 2 km do centro" é distância, não preço
+    text = re.sub(DISTANCE_PATTERN, ' ', lowered)
+    # "600 mil" / "600.000" -> "600000"
+    text = re.sub(r'(\d)\s*mil\b', r'\g<1>000', text.replace('.', ''))
+    
+    for pattern in PRICE_MAX_PATTERNS:
+        match = re.search(pattern, text)
+        if match:
+            return {
+                'max_price': int(match.group(1)),
+                'type': 'max'
+            }
+    
+    # Faixa de preço
+    range_match = re.search(PRICE_RANGE_PATTERN, text)
+    if range_match:
+        return {
+            'min_price': int(range_match.group(1)),
+            'max_price': int(range_match.group(2)),
+            'type': 'range'
+        }
+    
+    return None
+
+def extract_code(text):
+    match = re.search(r'\b(AP|CA)\d{3,4}\b', text.upper())
+    return match.group() if match else None
+
+class MessageAnalyzer:
+    """Primeira etapa do processamento: monta a Analysis de cada mensagem.
+    
+    Bairro, cidade e pontos de interesse vêm do catálogo (`property_service`)
+    e a intenção do classificador local (`intent_classifier`); sem eles essas
+    etapas ficam vazias. O tempo de cada etapa vai para Analysis.timings e
+    para as médias de stats().
+    """
+    
+    def __init__(self, property_service=None, intent_classifier=None):
+        self.property_service = property_service
+        self.intent_classifier = intent_classifier
+        self.sentiment_analyzer = SentimentAnalyzer()
+        self.language_detector = LanguageDetector()
+        self._totals = dict.fromkeys(STAGES, 0.0)
+        self._count = 0
+        self._lock = threading.Lock()
+    
+    def analyze(self, text):
+        values = {'text': text}
+        timings = {}
+        started = time.perf_counter()
+        
+        def lap(stage):
+            nonlocal started
+            now = time.perf_counter()
+            timings[stage] = (now - started) * 1000
+            started = now
+        
+        values['lowered'] = text.lower().strip()
+        values['folded'] = keyword_matcher.normalize(text)
+        values['tokens'] = tuple(_WORD.findall(values['folded']))
+        lap('normalize')
+        
+        views = keyword_matcher.views(text)
+        values['_views'] = views
+        lap('keywords')
+        
+        price = extract_price(values['lowered'])
+        values['price'] = MappingProxyType(price) if price else None
+        lap('price')
+        
+        values['code'] = extract_code(text)
+        lap('code')
+        
+        values.update(self._preferences(text, values['lowered'], views.get('handler', _EMPTY)))
+        lap('preferences')
+        
+        sentiment = self.sentiment_analyzer.analyze(text, views.get('sentiment', _EMPTY))
+        values['sentiment'] = MappingProxyType(sentiment)
+        lap('sentiment')
+        
+        values['language'] = self.language_detector.detect_language(text, views.get('language', _EMPTY))
+        lap('language')
+        
+        if self.intent_classifier is not None:
+            intent, confidence = self.intent_classifier.predict(text)
+            values['intent'] = MappingProxyType({'intent': intent, 'confidence': confidence})
+        lap('intent')
+        
+        values['timings'] = MappingProxyType(timings)
+        self._record(timings)
+        return Analysis(**values)
+    
+    def _preferences(self, text, lowered, found):
+        prefs = {}
+        
+        # Tipo
+        if 'apartamento' in found:
+            prefs['tipo'] = 'apartamento'
+        elif 'casa' in found:
+            prefs['tipo'] = 'casa'
+        
+        # Operação
+        if 'venda' in found:
+            prefs['operacao'] = 'venda'
+        elif 'aluguel' in found:
+            prefs['operacao'] = 'aluguel'
+        
+        # Quartos
+        quartos_match = re.search(r'(\d+)\s*quarto', lowered)
+        if quartos_match:
+            prefs['quartos'] = int(quartos_match.group(1))
+        
+        if self.property_service is None:
+            return prefs
+        
+        # Distância até ponto de interesse ("até 2 km do centro", "perto da praia")
+        near = self._extract_near(text, lowered)
+        if near:
+            prefs['near'] = MappingProxyType(near)
+            # "centro" aqui é o ponto de referência, não o filtro de bairro
+            text = re.sub(rf"\b{re.escape(near['alias'])}\b", ' ', fold(text))
+        
+        # Bairro e cidade (aceita erros de digitação e falta de acento)
+        bairro = self.property_service.find_place(text, 'bairro')
+        if bairro:
+            prefs['bairro'] = bairro['name'].lower()
+        
+        cidade = self.property_service.find_place(text, 'cidade')
+        if cidade:
+            prefs['cidade'] = cidade['name']
+        
+        return prefs
+    
+    def _extract_near(self, text, lowered):
+        """Pedido de distância até um ponto de interesse ou None.
+        
+        Com distância explícita ("a 500 m da praia") usa esse raio; só com
+        "perto"/"próximo" usa o raio padrão configurado para o ponto.
+        """
+        point = self.property_service.find_point(text)
+        if not point:
+            return None
+        
+        match = re.search(DISTANCE_PATTERN, lowered)
+        if match:
+            km = float(match.group(1).replace(',', '.'))
+            if match.group(2).startswith('m'):
+                km /= 1000
+        elif re.search(r'\b(perto|próxim[oa]s?|proxim[oa]s?|pertinho)\b', lowered):
+            km = None
+        else:
+            return None
+        
+        return {'point': point['point'], 'km': km, 'label': point['label'], 'alias': point['alias']}
+    
+    def _record(self, timings):
+        with self._lock:
+            self._count += 1
+            for stage, ms in timings.items():
+                self._totals[stage] += ms
+    
+    def stats(self) -> dict:
+        """Mensagens analisadas e tempo médio (ms) de cada etapa"""
+        with self._lock:
+            count = self._count
+            totals = dict(self._totals)
+        return {
+            'messages': count,
+            'avg_ms': {stage: round(total / count, 3) if count else 0.0 for stage, total in totals.items()}
+        }
@@ -0,0 +1,16 @@
+INVALID_PRICE = 999999999
+
+def parse_price(price_str):
+    """Converte preço string ('750.000,00') para float"""
+    try:
+        clean = price_str.replace('R$', '').replace('.', '').replace(',', '.').strip()
+        return float(clean)
+    except:
+        return INVALID_PRICE
+
+def parse_number(value):
+    """Converte '120', 120 ou None para número (0 se inválido)"""
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
@@ -1,119 +1,332 @@
 import json
 import logging
+import os
 import re
+import threading
+from services.catalog import Catalog
+from services import columnar_catalog
+from services.sqlite_catalog import SQLiteCatalog
+from services.relaxation import RelaxationEngine
+from services.facets import count_facets
+from services.feed_ingest import iter_feed, diff_feed
+from utils.lru_cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
+def enhance_properties(properties):
+    """Completa dados extras dos imóveis de demonstração (só campos que faltam: o que veio do arquivo ou do feed vale)"""
+    enhancements = {
+        'AP001': {'area': '120', 'vagas': '2', 'destaque': 'Vista Mar'},
+        'CA002': {'area': '350', 'vagas': '4', 'destaque': 'Condomínio Fechado'},
+        'AP003': {'area': '65', 'vagas': '1', 'destaque': 'Mobiliado'},
+        'CA004': {'area': '180', 'vagas': '2', 'destaque': 'Perto da Praia'},
+        'AP005': {'area': '75', 'vagas': '1', 'destaque': 'Novo'}
+    }
+    
+    for prop in properties:
+        code = prop.get('codigo')
+        for field, value in enhancements.get(code, {}).items():
+            prop.setdefault(field, value)
+    return properties
+
 class PropertyService:
-    def __init__(self):
-        self.properties = self._load_properties()
-        self._enhance_properties()
+    def __init__(self, properties=None, backend=None, path='data/properties.json'):
+        # CATALOG_BACKEND: 'index' (padrão), 'numpy' (colunar, para feeds grandes)
+        # ou 'sqlite' (catálogo fica no banco, não na memória)
+        self.backend = backend or os.environ.get('CATALOG_BACKEND', 'index')
+        if self.backend == 'numpy' and columnar_catalog.np is None:
+            logger.warning("numpy não instalado - usando backend 'index'")
+            self.backend = 'index'
+        
+        self.path = path
+        self._version = 0
+        self._reload_lock = threading.Lock()
+        
+        # Resultados de buscas repetidas; a chave inclui a versão do catálogo,
+        # então um reload invalida tudo sem precisar limpar o cache
+        self.search_cache = LRUCache(
+            max_size=int(os.environ.get('SEARCH_CACHE_SIZE', 1000)),
+            ttl=float(os.environ.get('SEARCH_CACHE_TTL', 300))
+        )
+        
+        if self.backend == 'sqlite':
+            # Importe antes com: python import_catalog.py
+            self.catalog = SQLiteCatalog(os.environ.get('CATALOG_DB_PATH', 'data/properties.db'))
+            return
+        
+        self.catalog = None
+        if properties is None:
+            properties = self._load_properties()
+        self.catalog = self._build_catalog(properties)
+    
+    @property
+    def properties(self):
+        return self.get_all_properties()
+    
+    @property
+    def version(self):
+        """Versão do snapshot atual (muda a cada reload ou importação)"""
+        return self.catalog.version
+    
+    def refresh(self):
+        """Relê a versão do catálogo uma vez por mensagem (no SQLite outro processo pode ter importado)"""
+        return self.catalog.refresh()
+    
+    def count(self):
+        """Quantidade de imóveis no catálogo"""
+        return len(self.catalog)
+    
+    def _build_catalog(self, properties, enhance=True):
+        if enhance:
+            enhance_properties(properties)
+        self._version += 1
+        return Catalog(properties, columnar=self.backend == 'numpy', version=self._version, previous=self.catalog)
+    
+    def _read_properties(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
     
     def _load_properties(self):
         try:
-            with open('data/properties.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._read_properties()
         except:
             logger.warning("Arquivo de imóveis não encontrado")
             return []
     
-    def _enhance_properties(self):
-        """Adiciona dados extras aos imóveis"""
-        enhancements = {
-            'AP001': {'area': '120', 'vagas': '2', 'destaque': 'Vista Mar'},
-            'CA002': {'area': '350', 'vagas': '4', 'destaque': 'Condomínio Fechado'},
-            'AP003': {'area': '65', 'vagas': '1', 'destaque': 'Mobiliado'},
-            'CA004': {'area': '180', 'vagas': '2', 'destaque': 'Perto da Praia'},
-            'AP005': {'area': '75', 'vagas': '1', 'destaque': 'Novo'}
-        }
-        
-        for prop in self.properties:
-            code = prop.get('codigo')
-            if code in enhancements:
-                prop.update(enhancements[code])
-    
-    def search_by_price(self, preferences):
-        """Busca PRECISA por preço"""
-        results = self.properties.copy()
-        
-        # Filtros básicos primeiro
-        if preferences.get('tipo'):
-            results = [p for p in results if p['tipo'].lower() == preferences['tipo'].lower()]
+    def reload(self):
+        """Relê o JSON e troca o catálogo de uma vez só.
         
-        if preferences.get('operacao'):
-            results = [p for p in results if p['operacao'].lower() == preferences['operacao'].lower()]
+        O snapshot novo é montado por inteiro antes da troca; buscas em
+        andamento continuam usando o snapshot antigo até terminar. Se o
+        arquivo estiver inválido (ex.: no meio de uma gravação), mantém o atual.
+        """
+        if self.backend == 'sqlite':
+            # No SQLite as consultas já leem sempre o estado atual do banco
+            return False
         
-        # FILTRO DE PREÇO PRECISO
-        max_price = preferences.get('max_price')
-        min_price = preferences.get('min_price', 0)
+        with self._reload_lock:
+            try:
+                properties = self._read_properties()
+            except Exception as e:
+                logger.error(f"Erro ao recarregar imóveis, mantendo versão {self.version}: {e}")
+                return False
+            
+            catalog = self._build_catalog(properties)
+            self.catalog = catalog
+            logger.info(f"Catálogo recarregado: versão {catalog.version}, {len(catalog)} imóveis")
+            return True
+    
+    def ingest_feed(self, path, format=None, partial=False, dry_run=False):
+        """Aplica um feed de imobiliária (JSON, CSV ou XML) ao catálogo.
         
-        if max_price:
-            filtered = []
-            for prop in results:
-                prop_price = self._parse_price(prop['preco'])
-                if min_price <= prop_price <= max_price:
-                    filtered.append(prop)
-            results = filtered
+        O feed é lido em streaming e comparado com o catálogo atual; só o
+        delta (novos, alterados, removidos) é aplicado. partial=True para
+        feeds que trazem só atualizações. Retorna o FeedDiff.
+        """
+        def records():
+            for record in iter_feed(path, format):
+                # Mesmo preenchimento do carregamento: o diff compara igual com igual
+                enhance_properties([record])
+                yield record
         
-        # Ordena por preço
-        results = sorted(results, key=lambda x: self._parse_price(x['preco']))
+        with self._reload_lock:
+            diff = diff_feed(records(), self.catalog.get, self.catalog.codes, partial)
+            
+            logger.info(f"Feed {path}: {diff.summary()}")
+            if diff and not dry_run:
+                self._apply_diff(diff)
+        return diff
+    
+    def _apply_diff(self, diff):
+        # Em memória vira um snapshot novo; no SQLite o delta é gravado no banco
+        self._version += 1
+        self.catalog = self.catalog.apply_diff(diff, self._version)
+    
+    def _run_search(self, **filters):
+        """Executa a busca no backend configurado e devolve todos os imóveis"""
+        cursor = self._run_cursor(**filters)
+        return cursor.next_page(len(cursor))
+    
+    def _run_cursor(self, near=None, order=None, **filters):
+        """Executa a busca e devolve um cursor paginado (SearchCursor).
         
-        return results
+        near = {'point', 'km'} limita a busca pela distância até um ponto de
+        interesse; nesse caso os imóveis vêm do mais perto ao mais longe.
+        """
+        return self.catalog.cursor(near=near, order=order, cache=self.search_cache, **filters)
     
-    def search_with_preferences(self, preferences):
-        """Busca geral com preferências"""
-        results = self.properties.copy()
+    def relax(self, preferences):
+        """Quando a busca não acha nada: quais filtros afrouxar e quantos imóveis cada um destrava.
+        
+        Retorna [{'field': 'max_price'|'quartos'|'bairro', 'value', 'unlocks'}].
+        """
+        filters = self._preference_filters(preferences)
+        filters.pop('order', None)
+        near = filters.pop('near', None)
+        catalog = self.catalog
         
-        # Tipo
-        if preferences.get('tipo'):
-            results = [p for p in results if p['tipo'].lower() == preferences['tipo'].lower()]
+        def count(**relaxed):
+            return len(catalog.cursor(near=near, cache=self.search_cache, **relaxed))
         
-        # Operação
-        if preferences.get('operacao'):
-            results = [p for p in results if p['operacao'].lower() == preferences['operacao'].lower()]
+        def sorted_prices(**relaxed):
+            return catalog.sorted_prices(near=near, cache=self.search_cache, **relaxed)
         
-        # Quartos
-        if preferences.get('quartos'):
-            min_quartos = preferences['quartos']
-            results = [p for p in results if p.get('quartos', 0) >= min_quartos]
+        return RelaxationEngine(count, sorted_prices, catalog.bairro_neighbours).suggest(filters)
+    
+    def facets(self, preferences):
+        """Onde há imóveis: contagens por tipo, bairro, quartos e faixa de preço.
         
-        # Bairro
-        if preferences.get('bairro'):
-            bairro = preferences['bairro'].lower()
-            results = [p for p in results if bairro in p.get('bairro', '').lower()]
+        Operação, cidade e distância filtram os candidatos; as demais
+        preferências são aplicadas numa única passada, e cada faceta ignora o
+        próprio filtro ("tenho 12 em Ingleses e 4 no Centro nessa faixa").
+        Formato em services.facets.count_facets.
+        """
+        filters = self._preference_filters(preferences)
+        filters.pop('order', None)
+        near = filters.pop('near', None)
+        faceted = {name: filters.pop(name, None)
+                   for name in ('tipo', 'bairro', 'min_quartos', 'min_price', 'max_price')}
         
+        rows = self.catalog.facet_rows(near=near, cache=self.search_cache, **filters)
+        return count_facets(rows, **faceted)
+    
+    def cache_stats(self):
+        """Contadores do cache de buscas (para calibrar SEARCH_CACHE_SIZE)"""
+        return self.search_cache.stats()
+    
+    def _price_filters(self, preferences):
+        max_price = preferences.get('max_price')
+        return dict(
+            tipo=(preferences.get('tipo') or '').lower(),
+            operacao=(preferences.get('operacao') or '').lower(),
+            # FILTRO DE PREÇO PRECISO
+            min_price=preferences.get('min_price', 0) if max_price else None,
+            max_price=max_price or None,
+            order='price',
+            near=preferences.get('near')
+        )
+    
+    def _preference_filters(self, preferences):
         # Preço
         if preferences.get('max_price'):
-            results = self.search_by_price(preferences)
+            return self._price_filters(preferences)
+        
+        return dict(
+            tipo=(preferences.get('tipo') or '').lower(),
+            operacao=(preferences.get('operacao') or '').lower(),
+            min_quartos=preferences.get('quartos'),
+            bairro=(preferences.get('bairro') or '').lower(),
+            cidade=(preferences.get('cidade') or '').lower(),
+            near=preferences.get('near')
+        )
+    
+    def search_by_price(self, preferences):
+        """Busca PRECISA por preço"""
+        return self._run_search(**self._price_filters(preferences))
+    
+    def search_with_preferences(self, preferences):
+        """Busca geral com preferências"""
+        return self._run_search(**self._preference_filters(preferences))
+    
+    def cursor_by_price(self, preferences):
+        """Como search_by_price, mas paginado: cursor.next_page(k) traz os k seguintes"""
+        return self._run_cursor(**self._price_filters(preferences))
+    
+    def cursor_with_preferences(self, preferences):
+        """Como search_with_preferences, mas paginado; no backend numpy os que melhor combinam vêm primeiro"""
+        filters = self._preference_filters(preferences)
+        filters.setdefault('order', 'best')
+        return self._run_cursor(**filters)
+    
+    def search_text(self, query, k=5, preferences=None):
+        """Busca textual (descrição, destaque, bairro) ordenada por relevância BM25.
+        
+        Com `preferences`, tipo, operação e cidade continuam valendo: o texto
+        só ordena os imóveis que já atendem a eles.
+        """
+        preferences = preferences or {}
+        filters = {name: (preferences.get(name) or '').lower() for name in ('tipo', 'operacao', 'cidade')}
+        return self.catalog.search_text(query, k, **{name: value for name, value in filters.items() if value})
+    
+    def find_place(self, text, kind=None):
+        """Bairro/cidade citado no texto, tolerando erros de digitação.
         
-        return results
+        Retorna {'name', 'kind', 'confidence'} ou None.
+        """
+        return self.catalog.gazetteer.find_in_text(text, kind)
+    
+    @property
+    def geo(self):
+        return self.catalog.geo
+    
+    def find_point(self, text):
+        """Ponto de interesse citado no texto ("centro", "praia"...) ou None"""
+        return self.geo.find_point(text)
+    
+    def distance_to(self, prop, point):
+        """Distância pré-calculada (km) do imóvel até o ponto de interesse, ou None"""
+        return self.geo.distance_to(prop.get('codigo'), point)
+    
+    def get_nearest(self, lat, lon, k=5, max_km=None):
+        """Os k imóveis mais próximos de uma coordenada: lista de (km, imóvel)"""
+        geo = self.geo
+        nearest = []
+        for km, i in geo.nearest(lat, lon, k, max_km):
+            prop = self.get_property_details(geo.codes[i])
+            if prop:
+                nearest.append((km, prop))
+        return nearest
+    
+    def get_similar(self, code, k=3):
+        """Os k imóveis mais parecidos com o do código (vizinhos pré-calculados)"""
+        similar = []
+        for similar_code in self.catalog.recommender.similar(code, k):
+            prop = self.get_property_details(similar_code)
+            if prop:
+                similar.append(prop)
+        return similar
     
     def get_property_details(self, code):
         """Retorna detalhes do imóvel ou None"""
-        for prop in self.properties:
-            if prop.get('codigo', '').upper() == code.upper():
-                return prop
-        return None
+        return self.catalog.get(code)
+    
+    @property
+    def media(self):
+        return self.catalog.media
     
     def get_property_photos_list(self, code):
-        """Retorna fotos se existirem"""
-        prop = self.get_property_details(code)
-        if prop:
-            return prop.get('fotos', [])
-        return []
+        """Retorna fotos se existirem (fotos, imagens e data/property_images.json, sem repetir)"""
+        return self.media.photos(code)
+    
+    def get_property_tour(self, code):
+        """URL do tour virtual do imóvel ou None"""
+        return self.media.tour(code)
     
     def get_all_properties(self):
         """Retorna todos os imóveis"""
-        return self.properties
+        return self.catalog.properties
     
     def get_all_codes(self):
         """Retorna todos os códigos disponíveis"""
-        return [p.get('codigo', '') for p in self.properties if p.get('codigo')]
+        return self.catalog.codes
     
-    def _parse_price(self, price_str):
-        """Converte preço string para float"""
-        try:
-            clean = price_str.replace('R$', '').replace('.', '').replace(',', '.').strip()
-            return float(clean)
-        except:
-            return 999999999
+    def get_price(self, prop):
+        """Preço numérico do imóvel (pré-calculado no carregamento)"""
+        return self.catalog.price_of(prop)
+    
+    def get_cheapest(self, preferences=None):
+        """Retorna o imóvel mais barato do catálogo ou None.
+        
+        Com `preferences`, só entre os que atendem a tipo, operação e
+        distância (a faixa de preço é ignorada).
+        """
+        if not preferences:
+            return self.catalog.cheapest()
+        
+        filters = self._price_filters(preferences)
+        filters.update(min_price=None, max_price=None)
+        if filters['near']:
+            # Com distância o cursor vem do mais perto ao mais longe
+            return min(self._run_search(**filters), key=self.get_price, default=None)
+        page = self._run_cursor(**filters).next_page(1)
+        return page[0] if page else None
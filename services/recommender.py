@@ -0,0 +1,194 @@
+import heapq
+import logging
+import math
+from bisect import bisect_left, bisect_right
+from services.parsing import INVALID_PRICE, parse_price, parse_number
+
+logger = logging.getLogger(__name__)
+
+class Recommender:
+    """Imóveis parecidos, pré-calculados no carregamento do catálogo.
+    
+    Cada imóvel vira um vetor (log do preço, log da área, quartos, bairro) e
+    só é comparado com os do mesmo tipo e operação. Os k vizinhos mais
+    próximos de todos ficam prontos numa tabela por código, então "parecidos
+    com o AP001" é só uma consulta de dicionário.
+    
+    A distância nunca é menor que a diferença de log do preço somada às
+    penalidades de bairro e quartos. Por isso o grupo é dividido em células
+    (bairro, quartos) ordenadas por preço, e a varredura de vizinhos pula as
+    células e trechos cujo piso já passa do k-ésimo melhor encontrado.
+    
+    Com `previous` (o Recommender do snapshot anterior), só são recalculados
+    os imóveis novos/alterados e aqueles cuja lista de vizinhos eles afetam.
+    """
+    
+    PRICE_WEIGHT = 1.0
+    AREA_WEIGHT = 0.5
+    QUARTOS_WEIGHT = 0.3
+    BAIRRO_PENALTY = 0.5
+    MISSING_AREA_PENALTY = 0.25
+    
+    def __init__(self, properties, k=5, previous=None):
+        self.k = k
+        self.codes = []
+        self.groups = []
+        self.features = []
+        self.position = {}
+        
+        for i, prop in enumerate(properties):
+            code = (prop.get('codigo') or '').upper()
+            price = parse_price(prop.get('preco', ''))
+            area = parse_number(prop.get('area'))
+            self.codes.append(code)
+            if not code or not 0 < price < INVALID_PRICE:
+                # Sem preço válido não dá para comparar
+                self.groups.append(None)
+                self.features.append(None)
+                continue
+            self.position.setdefault(code, i)
+            self.groups.append(((prop.get('operacao') or '').lower(), (prop.get('tipo') or '').lower()))
+            self.features.append((
+                math.log(price),
+                math.log(area) if area > 0 else None,
+                int(parse_number(prop.get('quartos'))),
+                (prop.get('bairro') or '').lower()
+            ))
+        
+        # Cada grupo (operação, tipo) ordenado pelo log do preço
+        members = {}
+        for i, group in enumerate(self.groups):
+            if group is not None and self.position.get(self.codes[i]) == i:
+                members.setdefault(group, []).append(i)
+        self.buckets = {}
+        for group, positions in members.items():
+            positions.sort(key=lambda i: (self.features[i][0], i))
+            self.buckets[group] = positions
+        
+        # Dentro do grupo, células por (bairro, quartos), também ordenadas por preço
+        self.cells = {}
+        for group, positions in self.buckets.items():
+            cells = {}
+            for i in positions:
+                cells.setdefault((self.features[i][3], self.features[i][2]), []).append(i)
+            self.cells[group] = [
+                (bairro, quartos, [self.features[i][0] for i in cell], cell)
+                for (bairro, quartos), cell in cells.items()
+            ]
+        
+        self.neighbors = {}
+        self.recomputed = 0
+        if previous is None:
+            todo = [i for positions in self.buckets.values() for i in positions]
+        else:
+            todo = self._reuse(previous)
+        for i in todo:
+            self.neighbors[self.codes[i]] = self._knn(i)
+        self.recomputed = len(todo)
+        if previous is not None:
+            logger.info(f"Imóveis parecidos: {self.recomputed} de {len(self.neighbors)} listas recalculadas")
+    
+    def _distance(self, a, b):
+        fa, fb = self.features[a], self.features[b]
+        d = self.PRICE_WEIGHT * abs(fa[0] - fb[0])
+        if fa[1] is None or fb[1] is None:
+            d += self.MISSING_AREA_PENALTY
+        else:
+            d += self.AREA_WEIGHT * abs(fa[1] - fb[1])
+        d += self.QUARTOS_WEIGHT * abs(fa[2] - fb[2])
+        if fa[3] != fb[3]:
+            d += self.BAIRRO_PENALTY
+        return d
+    
+    def _knn(self, i):
+        """Os k vizinhos de i no seu grupo: lista de (distância, código)"""
+        price, _, quartos, bairro = self.features[i]
+        # Piso de distância de cada célula (bairro, quartos): visita das mais
+        # promissoras para as menos e para quando o piso passa do k-ésimo
+        cells = sorted(
+            ((self.BAIRRO_PENALTY if cell_bairro != bairro else 0.0)
+             + self.QUARTOS_WEIGHT * abs(cell_quartos - quartos), n, prices, positions)
+            for n, (cell_bairro, cell_quartos, prices, positions) in enumerate(self.cells[self.groups[i]])
+        )
+        
+        heap = []  # (-distância, posição): o pior dos k fica no topo
+        k = self.k
+        for floor, _, prices, positions in cells:
+            if len(heap) == k and floor >= -heap[0][0]:
+                break
+            start = bisect_left(prices, price)
+            for step in (1, -1):
+                j = start if step == 1 else start - 1
+                while 0 <= j < len(positions):
+                    # Daqui em diante piso + diferença de preço já passa do k-ésimo
+                    if len(heap) == k and floor + self.PRICE_WEIGHT * abs(prices[j] - price) >= -heap[0][0]:
+                        break
+                    other = positions[j]
+                    j += step
+                    if other == i:
+                        continue
+                    d = self._distance(i, other)
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d, other))
+                    elif d < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d, other))
+        
+        return [(-d, self.codes[j]) for d, j in sorted(heap, key=lambda item: (-item[0], item[1]))]
+    
+    def _reuse(self, previous):
+        """Aproveita as listas do snapshot anterior; devolve as posições a recalcular"""
+        def same(i):
+            j = previous.position.get(self.codes[i])
+            return (j is not None and previous.groups[j] == self.groups[i]
+                    and previous.features[j] == self.features[i])
+        
+        current = [i for positions in self.buckets.values() for i in positions]
+        changed = {i for i in current if not same(i)}
+        gone = {code for code in previous.neighbors
+                if code not in self.position or self.position[code] in changed}
+        
+        todo = set(changed)
+        for i in current:
+            if i in changed:
+                continue
+            kept = previous.neighbors.get(self.codes[i], [])
+            if any(code in gone for _, code in kept):
+                todo.add(i)
+            else:
+                self.neighbors[self.codes[i]] = kept
+        
+        # Um imóvel novo/alterado pode ter entrado nos k vizinhos de quem não mudou
+        for group, cells in self.cells.items():
+            dirty = [i for i in self.buckets[group] if i in changed]
+            if not dirty:
+                continue
+            # Maior k-ésima distância de cada célula entre as listas mantidas
+            limits = []
+            for _, _, _, positions in cells:
+                kept = [self.neighbors[self.codes[j]] for j in positions if j not in todo]
+                limits.append(max(
+                    (neighbors[-1][0] if len(neighbors) == self.k else float('inf') for neighbors in kept),
+                    default=0.0
+                ))
+            for i in dirty:
+                price, _, quartos, bairro = self.features[i]
+                for (cell_bairro, cell_quartos, prices, positions), limit in zip(cells, limits):
+                    floor = ((self.BAIRRO_PENALTY if cell_bairro != bairro else 0.0)
+                             + self.QUARTOS_WEIGHT * abs(cell_quartos - quartos))
+                    if floor >= limit:
+                        continue
+                    reach = (limit - floor) / self.PRICE_WEIGHT
+                    lo = bisect_left(prices, price - reach)
+                    hi = bisect_right(prices, price + reach)
+                    for other in positions[lo:hi]:
+                        if other in todo:
+                            continue
+                        neighbors = self.neighbors[self.codes[other]]
+                        if len(neighbors) < self.k or self._distance(i, other) < neighbors[-1][0]:
+                            todo.add(other)
+        return sorted(todo)
+    
+    def similar(self, code, k=None):
+        """Códigos dos imóveis mais parecidos com `code`, do mais ao menos parecido"""
+        neighbors = self.neighbors.get((code or '').upper(), [])
+        return [c for _, c in neighbors[:k or self.k]]
@@ -0,0 +1,142 @@
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+from services.ai_service import AIService
+from services.property_service import PropertyService
+from services.catalog_watcher import CatalogWatcher
+from services.intent_classifier import load_intent_classifier
+from utils.conversation_store import ConversationStore
+from utils.context_manager import ContextManager
+from handlers.message_handler import MessageHandler
+from handlers.audio_handler import AudioHandler
+
+logger = logging.getLogger(__name__)
+
+class ServiceRegistry:
+    """Container único dos serviços compartilhados, criados sob demanda.
+
+    Todos os handlers recebem o mesmo catálogo, o mesmo cliente de IA e o
+    mesmo dicionário de conversas, então texto e áudio do mesmo número
+    compartilham o estado.
+    """
+
+    def __init__(self):
+        self._services = {}
+        self._stats = {}
+        self._building = []
+        self._lock = threading.RLock()
+        self._factories = {
+            'property_service': lambda: PropertyService(),
+            'intent_classifier': lambda: load_intent_classifier(),
+            'ai_service': lambda: AIService(intent_classifier=self.intent_classifier),
+            'conversations': lambda: ConversationStore(
+                max_users=int(os.environ.get('CONVERSATION_MAX_USERS', 10000)),
+                max_bytes=int(float(os.environ.get('CONVERSATION_MAX_MB', 64)) * 1024 * 1024),
+                history_size=int(os.environ.get('CONVERSATION_HISTORY', 20)),
+                spill_dir=os.environ.get('CONVERSATION_SPILL_DIR') or None
+            ),
+            # Conversas paradas há mais de CONTEXT_TIMEOUT_HOURS saem da memória e do disco
+            'context_manager': lambda: ContextManager(
+                timeout=timedelta(hours=float(os.environ.get('CONTEXT_TIMEOUT_HOURS', 24))),
+                on_expire=lambda user_id, data: self.conversations.discard(user_id),
+                tick=float(os.environ.get('CONTEXT_EXPIRY_TICK', 60))
+            ),
+            'catalog_watcher': lambda: CatalogWatcher(
+                self.property_service,
+                interval=float(os.environ.get('CATALOG_WATCH_INTERVAL', 5)),
+                feed_path=os.environ.get('CATALOG_FEED_PATH') or None
+            ),
+            'message_handler': lambda: MessageHandler(
+                ai_service=self.ai_service,
+                property_service=self.property_service,
+                conversations=self.conversations,
+                contexts=self.context_manager
+            ),
+            'audio_handler': lambda: AudioHandler(
+                ai_service=self.ai_service,
+                message_handler=self.message_handler
+            )
+        }
+
+    def get(self, name):
+        """Retorna o serviço, criando-o na primeira chamada"""
+        service = self._services.get(name)
+        if service is not None:
+            return service
+
+        with self._lock:
+            if name not in self._services:
+                self._services[name] = self._build(name)
+            return self._services[name]
+
+    def _build(self, name):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+
+        # Dependências criadas durante o build são descontadas deste serviço
+        frame = {'seconds': 0.0, 'bytes': 0}
+        self._building.append(frame)
+        mem_before = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            service = self._factories[name]()
+        finally:
+            elapsed = time.perf_counter() - t0
+            allocated = tracemalloc.get_traced_memory()[0] - mem_before
+            self._building.pop()
+            if started_tracing:
+                tracemalloc.stop()
+
+        if self._building:
+            self._building[-1]['seconds'] += elapsed
+            self._building[-1]['bytes'] += allocated
+
+        self._stats[name] = {
+            'startup_ms': round((elapsed - frame['seconds']) * 1000, 2),
+            'memory_kb': round((allocated - frame['bytes']) / 1024, 1)
+        }
+        logger.info(f"Serviço {name} iniciado em {self._stats[name]['startup_ms']}ms "
+                    f"({self._stats[name]['memory_kb']}KB)")
+        return service
+
+    @property
+    def property_service(self) -> PropertyService:
+        return self.get('property_service')
+
+    @property
+    def intent_classifier(self):
+        return self.get('intent_classifier')
+
+    @property
+    def ai_service(self) -> AIService:
+        return self.get('ai_service')
+
+    @property
+    def conversations(self) -> ConversationStore:
+        return self.get('conversations')
+
+    @property
+    def context_manager(self) -> ContextManager:
+        return self.get('context_manager')
+
+    @property
+    def catalog_watcher(self) -> CatalogWatcher:
+        return self.get('catalog_watcher')
+
+    @property
+    def message_handler(self) -> MessageHandler:
+        return self.get('message_handler')
+
+    @property
+    def audio_handler(self) -> AudioHandler:
+        return self.get('audio_handler')
+
+    def stats(self) -> dict:
+        """Tempo de inicialização e memória alocada por serviço já criado"""
+        return dict(self._stats)
+
+registry = ServiceRegistry()
@@ -0,0 +1,79 @@
+from bisect import bisect_left, bisect_right
+from services.geo_index import KDTree
+from services.parsing import INVALID_PRICE
+
+def bairro_neighbours(bairros, coordinates, k=3, max_km=6.0, extra=None):
+    """Bairros vizinhos de cada bairro (em minúsculas), pelo centro dos imóveis.
+    
+    O centro de cada bairro é a média das coordenadas dos seus imóveis; os
+    vizinhos são os k centros mais próximos a até max_km. `extra` (de
+    data/places.json) acrescenta vizinhos para bairros sem coordenadas.
+    """
+    sums = {}
+    for bairro, coords in zip(bairros, coordinates):
+        if bairro and coords:
+            lat, lon, n = sums.get(bairro, (0.0, 0.0, 0))
+            sums[bairro] = (lat + coords[0], lon + coords[1], n + 1)
+    
+    tree = KDTree([(lat / n, lon / n, bairro) for bairro, (lat, lon, n) in sums.items()])
+    neighbours = {}
+    for bairro, (lat, lon, n) in sums.items():
+        nearest = tree.nearest(lat / n, lon / n, k + 1, max_km)
+        neighbours[bairro] = [other for _, other in nearest if other != bairro][:k]
+    
+    for bairro, others in (extra or {}).items():
+        current = neighbours.setdefault(bairro.lower(), [])
+        for other in others:
+            if other.lower() not in current:
+                current.append(other.lower())
+    return neighbours
+
+class RelaxationEngine:
+    """Sugere qual filtro afrouxar quando uma busca não encontra nada.
+    
+    Para cada restrição calcula o menor afrouxamento que traz imóveis e
+    quantos ele destrava:
+    - preço: busca binária nos preços (ordenados) dos imóveis que atendem
+      aos outros filtros;
+    - quartos: um a menos;
+    - bairro: os bairros vizinhos.
+    
+    `count(**filtros)` e `sorted_prices(**filtros)` vêm do backend de busca.
+    """
+    
+    # Quantos imóveis o novo orçamento deve destravar
+    PRICE_TARGET = 3
+    
+    def __init__(self, count, sorted_prices, neighbours=None):
+        self.count = count
+        self.sorted_prices = sorted_prices
+        self.neighbours = neighbours or {}
+    
+    def suggest(self, filters):
+        """Lista de {'field', 'value', 'unlocks'}, das que mais destravam para as que menos"""
+        suggestions = []
+        
+        max_price = filters.get('max_price')
+        if max_price is not None:
+            prices = self.sorted_prices(**dict(filters, max_price=None))
+            valid = bisect_left(prices, INVALID_PRICE)
+            within = bisect_right(prices, max_price, 0, valid)
+            if within < valid:
+                new_max = prices[min(within + self.PRICE_TARGET, valid) - 1]
+                unlocks = bisect_right(prices, new_max, 0, valid) - within
+                suggestions.append({'field': 'max_price', 'value': new_max, 'unlocks': unlocks})
+        
+        min_quartos = filters.get('min_quartos')
+        if min_quartos and min_quartos > 1:
+            unlocks = self.count(**dict(filters, min_quartos=min_quartos - 1))
+            if unlocks:
+                suggestions.append({'field': 'quartos', 'value': min_quartos - 1, 'unlocks': unlocks})
+        
+        bairro = filters.get('bairro')
+        for neighbour in self.neighbours.get(bairro, []) if bairro else []:
+            unlocks = self.count(**dict(filters, bairro=neighbour))
+            if unlocks:
+                suggestions.append({'field': 'bairro', 'value': neighbour, 'unlocks': unlocks})
+        
+        suggestions.sort(key=lambda s: -s['unlocks'])
+        return suggestions
@@ -0,0 +1,133 @@
+import heapq
+import sys
+from abc import ABC, abstractmethod
+from utils.conversation_store import approximate_size
+
+# Bytes de cada int de posição e de cada entrada (chave, posição) do heap,
+# para o tamanho dos cursores guardados nas conversas (a chave é o float
+# do próprio catálogo, compartilhado)
+_INT_SIZE = sys.getsizeof(1 << 20)
+_HEAP_ENTRY_SIZE = sys.getsizeof((0.0, 0)) + _INT_SIZE
+
+def _positions_size(positions):
+    """Bytes de uma lista/tupla de posições, contando os ints (range não guarda nenhum)"""
+    if positions is None:
+        return 0
+    size = sys.getsizeof(positions)
+    if not isinstance(positions, range):
+        size += len(positions) * _INT_SIZE
+    return size
+
+class SearchCursor(ABC):
+    """Resultado de uma busca entregue em páginas ("ver mais").
+    
+    Fica guardado no estado da conversa: a próxima página continua de onde a
+    anterior parou, sem refazer a busca. Os cursores do catálogo em memória
+    guardam o snapshot em que a busca rodou, então as páginas continuam
+    coerentes mesmo se o catálogo for recarregado no meio.
+    
+    sys.getsizeof(cursor) conta o que é só dele (posições, heap, imóveis
+    próprios), não o snapshot compartilhado: é o que entra no orçamento de
+    memória das conversas (utils.conversation_store).
+    """
+    
+    def __init__(self, total):
+        self.total = total
+        self.served = 0
+    
+    def __len__(self):
+        return self.total
+    
+    @property
+    def remaining(self):
+        return self.total - self.served
+    
+    @property
+    def has_more(self):
+        return self.served < self.total
+    
+    def next_page(self, k=5):
+        """Próximos k imóveis (lista vazia quando acabou)"""
+        page = self._take(min(k, self.remaining)) if k > 0 and self.has_more else []
+        self.served += len(page)
+        return page
+    
+    @abstractmethod
+    def _take(self, k):
+        """Os próximos k imóveis (k já limitado ao que resta)"""
+
+class ListCursor(SearchCursor):
+    """Resultados que já vêm ordenados: cada página é uma fatia.
+    
+    shared=False quando `properties` foi montada só para este cursor (e não
+    é o snapshot do catálogo): aí os imóveis contam no tamanho dele.
+    """
+    
+    def __init__(self, properties, positions, shared=True):
+        super().__init__(len(positions))
+        self.properties = properties
+        self.positions = positions
+        self.shared = shared
+    
+    def __sizeof__(self):
+        size = super().__sizeof__() + _positions_size(self.positions)
+        if not self.shared:
+            size += approximate_size(self.properties)
+        return size
+    
+    def _take(self, k):
+        start = self.served
+        return [self.properties[i] for i in self.positions[start:start + k]]
+
+class HeapCursor(SearchCursor):
+    """Resultados ordenados por uma chave (ex.: preço) sem ordenar a lista toda.
+    
+    A primeira página sai de uma seleção top-k (heapq.nsmallest). Só se o
+    cliente pedir "ver mais" os candidatos restantes viram um heap, e cada
+    página seguinte custa k pops.
+    """
+    
+    def __init__(self, properties, positions, keys):
+        super().__init__(len(positions))
+        self.properties = properties
+        self.positions = positions
+        self.keys = keys
+        self._heap = None
+        self._last = None
+    
+    def __sizeof__(self):
+        size = super().__sizeof__() + _positions_size(self.positions)
+        if self._heap is not None:
+            size += sys.getsizeof(self._heap) + len(self._heap) * _HEAP_ENTRY_SIZE
+        return size
+    
+    def _take(self, k):
+        keys = self.keys
+        if self._last is None:
+            page = heapq.nsmallest(k, self.positions, key=lambda i: (keys[i], i))
+        else:
+            if self._heap is None:
+                # Empate no preço desempata pela posição: a ordem é total
+                last = self._last
+                self._heap = [(keys[i], i) for i in self.positions if (keys[i], i) > last]
+                heapq.heapify(self._heap)
+                self.positions = None
+            page = [heapq.heappop(self._heap)[1] for _ in range(k)]
+        
+        if page:
+            self._last = (keys[page[-1]], page[-1])
+        return [self.properties[i] for i in page]
+
+class KeysetCursor(SearchCursor):
+    """Cursor do SQLite: cada página é uma consulta que continua após a última chave"""
+    
+    def __init__(self, store, filters, order=None):
+        super().__init__(store.count_matching(**filters))
+        self.store = store
+        self.filters = filters
+        self.order = order
+        self._after = None
+    
+    def _take(self, k):
+        page, self._after = self.store.search_page(after=self._after, limit=k, order=self.order, **self.filters)
+        return page
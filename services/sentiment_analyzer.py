@@ -1,31 +1,40 @@
 from typing import Dict, Tuple
+from utils import keyword_matcher
+
+KEYWORDS = {
+    'urgent': [
+        "urgente", "urgência", "rápido", "hoje", "agora",
+        "imediato", "já", "preciso muito", "desesperado"
+    ],
+    'positive': [
+        "ótimo", "excelente", "perfeito", "maravilhoso",
+        "adorei", "incrível", "obrigado", "agradeço"
+    ],
+    'negative': [
+        "ruim", "péssimo", "horrível", "não gostei",
+        "insatisfeito", "problema", "reclamação", "difícil"
+    ]
+}
+keyword_matcher.register('sentiment', KEYWORDS)
 
 class SentimentAnalyzer:
     def __init__(self):
-        self.urgent_keywords = [
-            "urgente", "urgência", "rápido", "hoje", "agora", 
-            "imediato", "já", "preciso muito", "desesperado"
-        ]
-        self.positive_keywords = [
-            "ótimo", "excelente", "perfeito", "maravilhoso", 
-            "adorei", "incrível", "obrigado", "agradeço"
-        ]
-        self.negative_keywords = [
-            "ruim", "péssimo", "horrível", "não gostei", 
-            "insatisfeito", "problema", "reclamação", "difícil"
-        ]
+        self.urgent_keywords = KEYWORDS['urgent']
+        self.positive_keywords = KEYWORDS['positive']
+        self.negative_keywords = KEYWORDS['negative']
     
-    def analyze(self, text: str) -> Dict:
-        """Analisa o sentimento e urgência da mensagem"""
-        text_lower = text.lower()
+    def analyze(self, text: str, found=None) -> Dict:
+        """Analisa o sentimento e urgência da mensagem (`found`: palavras já encontradas na Analysis)"""
+        if found is None:
+            found = keyword_matcher.match(text, 'sentiment')
         
         # Detecta urgência
-        urgency_score = sum(1 for word in self.urgent_keywords if word in text_lower)
+        urgency_score = len(found.get('urgent', ()))
         is_urgent = urgency_score > 0
         
         # Detecta sentimento
-        positive_score = sum(1 for word in self.positive_keywords if word in text_lower)
-        negative_score = sum(1 for word in self.negative_keywords if word in text_lower)
+        positive_score = len(found.get('positive', ()))
+        negative_score = len(found.get('negative', ()))
         
         if positive_score > negative_score:
             sentiment = "positive"
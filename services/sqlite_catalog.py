@@ -0,0 +1,449 @@
+import json
+import logging
+import sqlite3
+import threading
+from services.catalog import parse_price, parse_number
+from services.search_cursor import KeysetCursor, ListCursor
+from services.gazetteer import Gazetteer, load_places
+from services.geo_index import GeoIndex
+from services.recommender import Recommender
+from services.media_index import MediaIndex
+from services.relaxation import bairro_neighbours
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS imoveis (
+    id INTEGER PRIMARY KEY,
+    codigo TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    tipo TEXT NOT NULL,
+    operacao TEXT NOT NULL,
+    bairro TEXT NOT NULL,
+    cidade TEXT NOT NULL,
+    quartos INTEGER NOT NULL,
+    preco_num REAL NOT NULL,
+    dados TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_imoveis_busca ON imoveis (operacao, tipo, preco_num);
+CREATE INDEX IF NOT EXISTS idx_imoveis_preco ON imoveis (preco_num);
+CREATE INDEX IF NOT EXISTS idx_imoveis_quartos ON imoveis (quartos);
+CREATE INDEX IF NOT EXISTS idx_imoveis_bairro ON imoveis (bairro);
+CREATE INDEX IF NOT EXISTS idx_imoveis_cidade ON imoveis (cidade);
+CREATE VIRTUAL TABLE IF NOT EXISTS imoveis_fts USING fts5(
+    descricao, destaque, bairro,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+"""
+
+class SQLiteCatalog:
+    """Catálogo de imóveis em SQLite (modo WAL).
+    
+    Os campos de filtro ficam em colunas indexadas (já em minúsculas) e o
+    imóvel completo fica em JSON na coluna `dados`. Cada busca vira uma única
+    consulta parametrizada; `imoveis_fts` (FTS5) cobre descrição, destaque e
+    bairro.
+    
+    Tem a mesma interface de services.catalog.Catalog para o PropertyService.
+    Os índices derivados (lugares, distâncias, parecidos, fotos) saem de
+    consultas só com as colunas de que precisam e são montados no primeiro
+    uso: o catálogo inteiro nunca é carregado na memória.
+    
+    A versão do banco fica guardada e só é relida por refresh() (uma vez
+    por mensagem). Quando ela muda, os índices derivados já montados são
+    refeitos numa thread e trocados de uma vez; até lá as buscas usam os
+    da versão anterior, sem esperar.
+    """
+    
+    # Ranking colunar só existe no catálogo em memória
+    columnar = None
+    
+    def __init__(self, path='data/properties.db'):
+        self.path = path
+        self._local = threading.local()
+        # Nome -> (versão, índice); o dict inteiro é trocado a cada remontagem
+        self._indexes = {}
+        self._indexes_lock = threading.Lock()
+        self._rebuilding = False
+        # (versão, conteúdo de data/places.json): lido uma vez por versão, não por índice
+        self._places = (None, {})
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+        self._version = self._read_version()
+    
+    def _conn(self):
+        # sqlite3 não compartilha conexões entre threads: uma por thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    @staticmethod
+    def _columns(prop):
+        """Colunas de filtro + JSON (sem o id) e os textos do FTS de um imóvel"""
+        columns = (
+            prop.get('codigo', ''),
+            prop.get('tipo', '').lower(),
+            prop.get('operacao', '').lower(),
+            prop.get('bairro', '').lower(),
+            prop.get('cidade', '').lower(),
+            int(parse_number(prop.get('quartos'))),
+            parse_price(prop.get('preco', '')),
+            json.dumps(dict(prop), ensure_ascii=False)
+        )
+        return columns, (prop.get('descricao', ''), prop.get('destaque', ''), prop.get('bairro', ''))
+    
+    def import_properties(self, properties):
+        """Substitui o catálogo inteiro pelos imóveis informados"""
+        rows = []
+        fts_rows = []
+        for i, prop in enumerate(properties, 1):
+            columns, texts = self._columns(prop)
+            rows.append((i,) + columns)
+            fts_rows.append((i,) + texts)
+        
+        with self._conn() as conn:
+            conn.execute('DELETE FROM imoveis')
+            conn.execute('DELETE FROM imoveis_fts')
+            conn.executemany('INSERT INTO imoveis VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            conn.executemany('INSERT INTO imoveis_fts (rowid, descricao, destaque, bairro) VALUES (?, ?, ?, ?)', fts_rows)
+            self._bump_version(conn)
+        
+        self.refresh()
+        logger.info(f"{len(rows)} imóveis importados para {self.path}")
+        return len(rows)
+    
+    def apply_diff(self, diff, version=None):
+        """Aplica só o delta de um feed (services.feed_ingest.FeedDiff), numa transação.
+        
+        Devolve o próprio catálogo; a versão nova vem do banco.
+        """
+        with self._conn() as conn:
+            for code in diff.removed:
+                row = conn.execute('SELECT id FROM imoveis WHERE codigo = ?', (code,)).fetchone()
+                if row:
+                    conn.execute('DELETE FROM imoveis WHERE id = ?', row)
+                    conn.execute('DELETE FROM imoveis_fts WHERE rowid = ?', row)
+            
+            for prop in diff.changed:
+                columns, texts = self._columns(prop)
+                row = conn.execute('SELECT id FROM imoveis WHERE codigo = ?', (columns[0],)).fetchone()
+                if row is None:
+                    continue
+                conn.execute(
+                    'UPDATE imoveis SET codigo = ?, tipo = ?, operacao = ?, bairro = ?, cidade = ?, '
+                    'quartos = ?, preco_num = ?, dados = ? WHERE id = ?', columns + row
+                )
+                conn.execute('DELETE FROM imoveis_fts WHERE rowid = ?', row)
+                conn.execute('INSERT INTO imoveis_fts (rowid, descricao, destaque, bairro) VALUES (?, ?, ?, ?)', row + texts)
+            
+            for prop in diff.added:
+                columns, texts = self._columns(prop)
+                cursor = conn.execute(
+                    'INSERT INTO imoveis (codigo, tipo, operacao, bairro, cidade, quartos, preco_num, dados) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', columns
+                )
+                conn.execute('INSERT INTO imoveis_fts (rowid, descricao, destaque, bairro) VALUES (?, ?, ?, ?)',
+                             (cursor.lastrowid,) + texts)
+            self._bump_version(conn)
+        
+        self.refresh()
+        logger.info(f"Delta aplicado em {self.path}: {diff.summary()}")
+        return self
+    
+    def _bump_version(self, conn):
+        conn.execute(
+            "INSERT INTO meta VALUES ('versao', 1) "
+            "ON CONFLICT(chave) DO UPDATE SET valor = valor + 1"
+        )
+    
+    def _read_version(self):
+        row = self._conn().execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()
+        return row[0] if row else 0
+    
+    @property
+    def version(self):
+        """Versão do catálogo (aumenta a cada importação), como lida no último refresh()"""
+        return self._version
+    
+    def refresh(self):
+        """Relê a versão do banco (outro processo pode ter importado); se mudou, remonta os índices derivados.
+        
+        Uma consulta só; a remontagem roda em outra thread. Retorna a versão.
+        """
+        version = self._read_version()
+        if version != self._version:
+            with self._indexes_lock:
+                self._version = version
+                start = bool(self._indexes) and not self._rebuilding
+                self._rebuilding = self._rebuilding or start
+            if start:
+                threading.Thread(target=self._rebuild, name='sqlite-catalog-indexes', daemon=True).start()
+        return version
+    
+    def _fetch(self, sql, params=()):
+        return [json.loads(row[0]) for row in self._conn().execute(sql, params)]
+    
+    def _where(self, tipo=None, operacao=None, bairro=None, cidade=None,
+               min_quartos=None, min_price=None, max_price=None, codes=None):
+        """Condições SQL (e parâmetros) para os filtros de busca; `codes` restringe aos códigos informados"""
+        where = []
+        params = []
+        if codes is not None:
+            # Um único parâmetro (array JSON), seja qual for a quantidade de códigos
+            where.append('codigo IN (SELECT value FROM json_each(?))')
+            params.append(json.dumps(list(codes)))
+        if tipo:
+            where.append('tipo = ?')
+            params.append(tipo)
+        if operacao:
+            where.append('operacao = ?')
+            params.append(operacao)
+        if cidade:
+            where.append('cidade = ?')
+            params.append(cidade)
+        if bairro:
+            where.append("bairro LIKE ? ESCAPE '\\'")
+            params.append('%' + bairro.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        if min_quartos:
+            where.append('quartos >= ?')
+            params.append(min_quartos)
+        if min_price is not None:
+            where.append('preco_num >= ?')
+            params.append(min_price)
+        if max_price is not None:
+            where.append('preco_num <= ?')
+            params.append(max_price)
+        return where, params
+    
+    def search(self, order=None, **filters):
+        """Mesmos filtros do CatalogIndex.search, mas devolve os imóveis"""
+        where, params = self._where(**filters)
+        sql = 'SELECT dados FROM imoveis'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY preco_num, id' if order == 'price' else ' ORDER BY id'
+        return self._fetch(sql, params)
+    
+    def count_matching(self, **filters):
+        """Quantos imóveis passam pelos filtros"""
+        where, params = self._where(**filters)
+        sql = 'SELECT COUNT(*) FROM imoveis'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        return self._conn().execute(sql, params).fetchone()[0]
+    
+    def _near(self, near):
+        """Código -> posição na ordem de distância dos imóveis a até near['km'] do ponto"""
+        geo = self.geo
+        return {geo.codes[i]: rank for rank, i in enumerate(geo.near(near['point'], near.get('km')))}
+    
+    def sorted_prices(self, near=None, cache=None, **filters):
+        """Preços, em ordem crescente, dos imóveis que atendem aos filtros"""
+        where, params = self._where(codes=self._near(near) if near else None, **filters)
+        sql = 'SELECT preco_num FROM imoveis'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        return [row[0] for row in self._conn().execute(sql + ' ORDER BY preco_num', params)]
+    
+    def facet_rows(self, near=None, cache=None, **filters):
+        """(tipo, bairro, quartos, preço, operação) dos imóveis que atendem aos filtros"""
+        where, params = self._where(codes=self._near(near) if near else None, **filters)
+        sql = 'SELECT tipo, bairro, quartos, preco_num, operacao FROM imoveis'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        return self._conn().execute(sql, params).fetchall()
+    
+    def search_page(self, after=None, limit=5, order=None, **filters):
+        """Uma página da busca, continuando após a chave `after`.
+        
+        Retorna (imóveis, chave do último) para pedir a página seguinte.
+        """
+        where, params = self._where(**filters)
+        if after is not None:
+            if order == 'price':
+                where.append('(preco_num, id) > (?, ?)')
+                params.extend(after)
+            else:
+                where.append('id > ?')
+                params.append(after[1])
+        
+        sql = 'SELECT dados, preco_num, id FROM imoveis'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY preco_num, id' if order == 'price' else ' ORDER BY id'
+        rows = self._conn().execute(sql + ' LIMIT ?', params + [limit]).fetchall()
+        if not rows:
+            return [], after
+        return [json.loads(row[0]) for row in rows], (rows[-1][1], rows[-1][2])
+    
+    def cursor(self, near=None, order=None, cache=None, **filters):
+        """Cursor paginado sobre a busca; as consultas já usam os índices do banco, sem cache.
+        
+        Sem `near` cada página é uma consulta por chave; com `near` os
+        imóveis vêm do mais perto ao mais longe.
+        """
+        if not near:
+            return KeysetCursor(self, filters, order)
+        # O índice geográfico decide quem está no raio; só esses imóveis saem do banco
+        rank = self._near(near)
+        results = sorted(self.search(codes=rank, **filters), key=lambda p: rank[p['codigo']])
+        return ListCursor(results, range(len(results)), shared=False)
+    
+    def search_text(self, query, limit=5, **filters):
+        """Busca textual (FTS5) ordenada por relevância BM25, só entre os que passam pelos filtros"""
+        terms = ['"' + term.replace('"', '""') + '"' for term in query.split() if term]
+        if not terms:
+            return []
+        
+        sql = ('SELECT i.dados FROM imoveis_fts f JOIN imoveis i ON i.id = f.rowid '
+               'WHERE imoveis_fts MATCH ?')
+        where, params = self._where(**filters)
+        if where:
+            # Subconsulta: `bairro` existe nas duas tabelas
+            sql += ' AND f.rowid IN (SELECT id FROM imoveis WHERE ' + ' AND '.join(where) + ')'
+        return self._fetch(sql + ' ORDER BY bm25(imoveis_fts) LIMIT ?', [' OR '.join(terms)] + params + [limit])
+    
+    def get(self, code):
+        rows = self._fetch('SELECT dados FROM imoveis WHERE codigo = ?', (code,))
+        return rows[0] if rows else None
+    
+    def all(self):
+        return self._fetch('SELECT dados FROM imoveis ORDER BY id')
+    
+    @property
+    def properties(self):
+        return self.all()
+    
+    @property
+    def codes(self):
+        return [row[0] for row in self._conn().execute('SELECT codigo FROM imoveis ORDER BY id')]
+    
+    def cheapest(self):
+        rows = self._fetch('SELECT dados FROM imoveis ORDER BY preco_num, id LIMIT 1')
+        return rows[0] if rows else None
+    
+    def price_of(self, prop):
+        return parse_price(prop.get('preco', ''))
+    
+    def places(self):
+        """Bairros e cidades distintos, com a grafia original"""
+        conn = self._conn()
+        bairros = [row[0] for row in conn.execute("SELECT DISTINCT json_extract(dados, '$.bairro') FROM imoveis")]
+        cidades = [row[0] for row in conn.execute("SELECT DISTINCT json_extract(dados, '$.cidade') FROM imoveis")]
+        return bairros, cidades
+    
+    def coordinates(self):
+        """(codigo, lat, lon) de cada imóvel, na ordem do catálogo"""
+        return self._conn().execute(
+            "SELECT codigo, json_extract(dados, '$.lat'), json_extract(dados, '$.lon') FROM imoveis ORDER BY id"
+        ).fetchall()
+    
+    def bairros(self):
+        """Bairro (em minúsculas) de cada imóvel, na ordem do catálogo"""
+        return [row[0] for row in self._conn().execute('SELECT bairro FROM imoveis ORDER BY id')]
+    
+    def count(self):
+        return self._conn().execute('SELECT COUNT(*) FROM imoveis').fetchone()[0]
+    
+    def __len__(self):
+        return self.count()
+    
+    def _derived(self, name):
+        """Índice derivado `name` (montado por _build_<name>); o primeiro uso monta na hora"""
+        cached = self._indexes.get(name)
+        if cached is None:
+            with self._indexes_lock:
+                cached = self._indexes.get(name)
+                if cached is None:
+                    cached = (self._version, getattr(self, '_build_' + name)(None))
+                    self._indexes = {**self._indexes, name: cached}
+        return cached[1]
+    
+    def _rebuild(self):
+        """Thread de remontagem: refaz os índices desatualizados até alcançar a versão atual"""
+        try:
+            while True:
+                version = self._version
+                # build(anterior) recebe o índice da versão anterior para reaproveitar o que não mudou
+                fresh = {name: (version, getattr(self, '_build_' + name)(index))
+                         for name, (built, index) in self._indexes.items() if built != version}
+                with self._indexes_lock:
+                    self._indexes = {**self._indexes, **fresh}
+                    if version == self._version:
+                        self._rebuilding = False
+                        break
+            logger.info(f"Índices derivados de {self.path} remontados para a versão {version}")
+        except Exception as e:
+            with self._indexes_lock:
+                self._rebuilding = False
+            logger.error(f"Erro ao remontar os índices de {self.path}: {e}", exc_info=True)
+        finally:
+            # A conexão desta thread não é mais usada
+            conn = getattr(self._local, 'conn', None)
+            if conn is not None:
+                conn.close()
+    
+    @property
+    def gazetteer(self):
+        return self._derived('gazetteer')
+    
+    def _places_config(self):
+        """data/places.json da versão atual, compartilhado pelos índices de lugares"""
+        version, places = self._places
+        if version != self._version:
+            version = self._version
+            places = load_places()
+            self._places = (version, places)
+        return places
+    
+    def _build_gazetteer(self, previous):
+        return Gazetteer.build(*self.places(), places=self._places_config())
+    
+    @property
+    def geo(self):
+        return self._derived('geo')
+    
+    def _build_geo(self, previous):
+        return GeoIndex.build(self.coordinates(), previous=previous, places=self._places_config())
+    
+    @property
+    def bairro_neighbours(self):
+        return self._derived('bairro_neighbours')
+    
+    def _build_bairro_neighbours(self, previous):
+        return bairro_neighbours(
+            self.bairros(),
+            [(lat, lon) if lat is not None else None for _, lat, lon in self.coordinates()],
+            extra=self._places_config().get('bairros_vizinhos')
+        )
+    
+    @property
+    def recommender(self):
+        return self._derived('recommender')
+    
+    def _build_recommender(self, previous):
+        # Só os campos que o Recommender compara, sem desserializar os imóveis
+        fields = ('codigo', 'tipo', 'operacao', 'bairro', 'quartos', 'preco', 'area')
+        rows = self._conn().execute(
+            "SELECT codigo, tipo, operacao, bairro, quartos, json_extract(dados, '$.preco'), "
+            "json_extract(dados, '$.area') FROM imoveis ORDER BY id"
+        )
+        return Recommender([dict(zip(fields, row)) for row in rows], previous=previous)
+    
+    @property
+    def media(self):
+        return self._derived('media')
+    
+    def _build_media(self, previous):
+        return MediaIndex.build(self._fetch(
+            "SELECT json_object('codigo', codigo, 'fotos', json_extract(dados, '$.fotos'), "
+            "'imagens', json_extract(dados, '$.imagens'), "
+            "'tour_virtual', json_extract(dados, '$.tour_virtual')) FROM imoveis ORDER BY id"
+        ))
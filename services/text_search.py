@@ -0,0 +1,110 @@
+import heapq
+import math
+import re
+import unicodedata
+
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'um', 'uma', 'uns', 'umas', 'de', 'da', 'do', 'das', 'dos',
+    'e', 'em', 'na', 'no', 'nas', 'nos', 'com', 'sem', 'para', 'pra', 'por', 'que',
+    'ao', 'aos', 'se', 'sendo', 'ou', 'eu', 'me', 'tem', 'ter', 'quero', 'procuro',
+    'gostaria', 'algum', 'alguma', 'imovel', 'imoveis'
+}
+
+def fold(text):
+    """Minúsculas e sem acentos: 'Jurerê' -> 'jurere'"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+def stem(word):
+    """Stemming leve para português: tira plural e vogal final de gênero/número"""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix, replacement in (('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ns', 'm')):
+        if word.endswith(suffix):
+            word = word[:-len(suffix)] + replacement
+            break
+    else:
+        if word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+    if len(word) > 4 and word[-1] in 'aoe':
+        word = word[:-1]
+    return word
+
+def tokenize(text):
+    return [stem(token) for token in re.findall(r'[a-z0-9]+', fold(text)) if token not in STOPWORDS]
+
+class TextIndex:
+    """Índice invertido com ranking BM25 sobre os textos dos imóveis.
+    
+    Cada campo tem um peso (destaque e bairro contam mais que a descrição).
+    A busca só soma as posting lists dos termos da consulta e escolhe o
+    top-k com um heap, sem ordenar todos os candidatos.
+    """
+    
+    FIELDS = {'descricao': 1.0, 'destaque': 2.0, 'bairro': 1.5, 'cidade': 0.5}
+    
+    def __init__(self, properties, k1=1.2, b=0.75, previous=None, reused=None):
+        """`reused` ({nova posição: posição em `previous`}) aponta os imóveis que não mudaram:
+        seus termos são copiados do índice anterior em vez de tokenizados de novo.
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_len = [0.0] * len(properties)
+        
+        reused = reused if previous is not None else {}
+        if reused:
+            moved = {j: i for i, j in reused.items()}
+            for term, docs in previous.postings.items():
+                kept = [(moved[j], tf) for j, tf in docs if j in moved]
+                if kept:
+                    self.postings[term] = kept
+            for i, j in reused.items():
+                self.doc_len[i] = previous.doc_len[j]
+        
+        for i, prop in enumerate(properties):
+            if i in reused:
+                continue
+            weights = {}
+            for field, weight in self.FIELDS.items():
+                for term in tokenize(str(prop.get(field) or '')):
+                    weights[term] = weights.get(term, 0.0) + weight
+            for term, tf in weights.items():
+                self.postings.setdefault(term, []).append((i, tf))
+            self.doc_len[i] = sum(weights.values())
+        
+        self.num_docs = len(self.doc_len)
+        self.avg_len = (sum(self.doc_len) / self.num_docs) if self.num_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (self.num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+    
+    def search(self, query, k=5, min_ratio=0.5, allowed=None):
+        """Lista de (posição, score) dos k imóveis mais relevantes.
+        
+        Resultados com score abaixo de min_ratio * melhor score são descartados
+        (casaram só com termos genéricos como 'casa' ou '3'). Com `allowed`
+        (conjunto de posições) só esses imóveis concorrem.
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.num_docs:
+            return []
+        
+        scores = {}
+        k1, b, avg_len, doc_len = self.k1, self.b, self.avg_len or 1.0, self.doc_len
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                if allowed is not None and i not in allowed:
+                    continue
+                norm = k1 * (1 - b + b * doc_len[i] / avg_len)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        if not top:
+            return []
+        cutoff = top[0][1] * min_ratio
+        return [(i, score) for i, score in top if score >= cutoff]
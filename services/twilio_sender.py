@@ -0,0 +1,43 @@
+import os
+import logging
+import requests
+
+logger = logging.getLogger(__name__)
+
+class TwilioSender:
+    """Envia mensagens pela API REST de Messages do Twilio"""
+
+    def __init__(self, account_sid=None, auth_token=None, api_base=None, timeout=15):
+        self.account_sid = account_sid or os.environ.get('TWILIO_ACCOUNT_SID')
+        self.auth_token = auth_token or os.environ.get('TWILIO_AUTH_TOKEN')
+        # TWILIO_API_BASE permite apontar para um Twilio local (fake_twilio.py)
+        self.api_base = (api_base or os.environ.get('TWILIO_API_BASE', 'https://api.twilio.com')).rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    @property
+    def configured(self):
+        """Se há credenciais para chamar a API"""
+        return bool(self.account_sid and self.auth_token)
+
+    @property
+    def messages_url(self):
+        return f"{self.api_base}/2010-04-01/Accounts/{self.account_sid}/Messages.json"
+
+    def send(self, to, from_, body, media_urls=None):
+        """Envia uma mensagem e retorna o SID criado pelo Twilio"""
+        data = [('To', to), ('From', from_), ('Body', body)]
+        for media_url in (media_urls or [])[:3]:
+            data.append(('MediaUrl', media_url))
+
+        response = self.session.post(
+            self.messages_url,
+            data=data,
+            auth=(self.account_sid, self.auth_token),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+        sid = response.json().get('sid')
+        logger.info(f"Resposta enviada para {to} (sid={sid})")
+        return sid
@@ -0,0 +1,86 @@
+import itertools
+import random
+import pytest
+from services import columnar_catalog
+from services.catalog import Catalog
+from services.parsing import parse_price
+
+BAIRROS = ['Centro', 'Trindade', 'Campeche', 'Saco Grande', 'Córrego Grande']
+
+FILTERS = {
+    'tipo': [None, 'apartamento', 'casa', 'sobrado'],
+    'operacao': [None, 'venda', 'aluguel'],
+    'bairro': [None, 'centro', 'grande', 'lagoa'],
+    'cidade': [None, 'florianópolis', 'são josé'],
+    'min_quartos': [None, 2, 4],
+    'min_price': [None, 2000, 400000],
+    'max_price': [None, 3000, 800000],
+}
+
+def generate_properties(n, seed=7):
+    rng = random.Random(seed)
+    properties = []
+    for i in range(n):
+        operacao = rng.choice(['Venda', 'Aluguel'])
+        valor = rng.randint(100, 1500) * 1000 if operacao == 'Venda' else rng.randint(8, 60) * 100
+        properties.append({
+            'codigo': f"IM{i:04d}",
+            'tipo': rng.choice(['Apartamento', 'Casa', 'Kitnet']),
+            'operacao': operacao,
+            'bairro': rng.choice(BAIRROS),
+            'cidade': rng.choice(['Florianópolis', 'São José']),
+            'quartos': rng.randint(0, 5),
+            # Alguns sem preço: valem INVALID_PRICE e caem fora de qualquer max_price
+            'preco': rng.choice([f"{valor:,.2f}".replace(',', '#').replace('.', ',').replace('#', '.')] * 9 + ['Consulte']),
+        })
+    return properties
+
+def linear_scan(properties, tipo=None, operacao=None, bairro=None, cidade=None,
+                min_quartos=None, min_price=None, max_price=None):
+    results = []
+    for i, prop in enumerate(properties):
+        price = parse_price(prop['preco'])
+        if tipo and prop['tipo'].lower() != tipo:
+            continue
+        if operacao and prop['operacao'].lower() != operacao:
+            continue
+        if bairro and bairro not in prop['bairro'].lower():
+            continue
+        if cidade and prop['cidade'].lower() != cidade:
+            continue
+        if min_quartos and prop['quartos'] < min_quartos:
+            continue
+        if min_price is not None and price < min_price:
+            continue
+        if max_price is not None and price > max_price:
+            continue
+        results.append(i)
+    return results
+
+def combinations():
+    names = list(FILTERS)
+    for values in itertools.product(*FILTERS.values()):
+        yield {name: value for name, value in zip(names, values) if value is not None}
+
+def check_engine(engine, properties):
+    for filters in combinations():
+        expected = linear_scan(properties, **filters)
+        assert engine.search(**filters) == expected, filters
+        by_price = sorted(expected, key=lambda i: parse_price(properties[i]['preco']))
+        assert engine.search(order='price', **filters) == by_price, filters
+
+def test_index_matches_linear_scan():
+    properties = generate_properties(300)
+    check_engine(Catalog(properties).index, properties)
+
+@pytest.mark.skipif(columnar_catalog.np is None, reason='numpy não instalado')
+def test_columnar_matches_linear_scan():
+    properties = generate_properties(300)
+    check_engine(Catalog(properties, columnar=True).columnar, properties)
+
+def test_sorted_prices_match_linear_scan():
+    properties = generate_properties(300)
+    index = Catalog(properties).index
+    for filters in ({}, {'operacao': 'venda'}, {'tipo': 'casa', 'bairro': 'grande', 'min_quartos': 2}):
+        expected = sorted(parse_price(properties[i]['preco']) for i in linear_scan(properties, **filters))
+        assert index.sorted_prices(**filters) == expected
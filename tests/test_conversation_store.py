@@ -0,0 +1,113 @@
+import os
+from collections import deque
+import pytest
+from utils.conversation_store import ConversationStore, approximate_size
+
+def conversation(**fields):
+    return dict({'history': [], 'preferences': {}, 'cursor': None}, **fields)
+
+def test_least_recently_used_leaves_first():
+    store = ConversationStore(max_users=2)
+    store['a'] = conversation()
+    store['b'] = conversation()
+    store['a']  # acesso renova "a"
+    store['c'] = conversation()
+    assert list(store) == ['a', 'c']
+    assert 'b' not in store
+    assert store.evictions == 1
+
+def test_newest_conversation_never_evicted():
+    store = ConversationStore(max_bytes=1)
+    store['a'] = conversation()
+    store['b'] = conversation()
+    assert list(store) == ['b']
+
+def test_history_becomes_bounded_deque():
+    store = ConversationStore(history_size=3)
+    store['a'] = conversation(history=[1, 2, 3, 4, 5])
+    history = store['a']['history']
+    assert isinstance(history, deque)
+    assert list(history) == [3, 4, 5]
+    history.append(6)
+    assert list(store['a']['history']) == [4, 5, 6]
+
+def test_bytes_track_sets_deletes_and_later_mutations():
+    store = ConversationStore()
+    store['a'] = conversation()
+    assert store.bytes == approximate_size(store['a'])
+    # Alterado depois de lido: remedido no próximo acesso
+    store['a']['preferences']['bairro'] = 'centro' * 100
+    store.stats()
+    assert store.bytes == approximate_size(store.entries['a'])
+    store['b'] = conversation()
+    del store['a']
+    assert store.bytes == approximate_size(store.entries['b'])
+
+def test_byte_budget_evicts_oldest():
+    store = ConversationStore()
+    store['a'] = conversation(name='x' * 5000)
+    store.max_bytes = store.bytes * 2 + 100
+    for key in 'bc':
+        store[key] = conversation(name='x' * 5000)
+    assert list(store) == ['b', 'c']
+    assert store.bytes <= store.max_bytes
+
+def test_approximate_size_counts_nested_and_shared_once():
+    shared = 'y' * 1000
+    assert approximate_size({'a': [shared, shared]}) < approximate_size({'a': [shared, 'z' * 1000]})
+    assert approximate_size({'a': ['y' * 1000]}) > 1000
+
+def test_spill_and_restore_without_transient_fields(tmp_path):
+    store = ConversationStore(max_users=1, spill_dir=str(tmp_path))
+    store['a'] = conversation(name='Ana', cursor=object(), history=['oi'])
+    store['b'] = conversation()
+    assert 'a' not in store.entries
+    assert len(os.listdir(tmp_path)) == 1
+    assert 'a' in store
+    restored = store['a']
+    assert restored['name'] == 'Ana'
+    assert list(restored['history']) == ['oi']
+    assert restored['cursor'] is None
+    # "b" foi para o disco no lugar de "a"; o arquivo de "a" foi apagado ao voltar
+    assert store.spilled == 2 and store.restored == 1
+    assert len(os.listdir(tmp_path)) == 1
+
+def test_delete_removes_spilled_file(tmp_path):
+    store = ConversationStore(max_users=1, spill_dir=str(tmp_path))
+    store['a'] = conversation()
+    store['b'] = conversation()
+    del store['a']
+    assert 'a' not in store
+    with pytest.raises(KeyError):
+        store['a']
+
+def test_without_spill_dir_evicted_conversation_is_gone():
+    store = ConversationStore(max_users=1)
+    store['a'] = conversation()
+    store['b'] = conversation()
+    assert 'a' not in store
+    with pytest.raises(KeyError):
+        store['a']
+
+def test_pinned_conversation_is_not_evicted():
+    store = ConversationStore(max_users=1)
+    with store.pinned('a'):
+        store['a'] = conversation()
+        conv = store['a']
+        store['b'] = conversation()
+        store['c'] = conversation()
+        assert 'a' in store.entries
+        conv['history'].append('ainda aqui')
+    assert 'a' not in store.entries
+    assert store.stats()['pinned'] == 0
+
+def test_discard_skips_pinned_conversation(tmp_path):
+    store = ConversationStore(max_users=1, spill_dir=str(tmp_path))
+    store['a'] = conversation()
+    store['b'] = conversation()
+    with store.pinned('b'):
+        assert store.discard('b') is False
+    assert store.discard('a') is True
+    assert store.discard('b') is True
+    assert store.discard('b') is False
+    assert os.listdir(tmp_path) == []
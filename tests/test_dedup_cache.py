@@ -0,0 +1,68 @@
+from concurrent.futures import Future
+from utils import dedup_cache
+from utils.dedup_cache import DedupCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def done(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+def test_same_sid_within_ttl_is_processed_once(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dedup_cache.time, 'monotonic', clock)
+    cache = DedupCache(max_size=10, ttl=60)
+    calls = []
+    factory = lambda: calls.append(1) or done('resposta')
+    first, created = cache.get_or_create('SM1', factory)
+    assert created and first.result() == 'resposta'
+    clock.now += 59
+    retry, created = cache.get_or_create('SM1', factory)
+    # O retry do Twilio recebe o mesmo Future, sem processar de novo
+    assert not created and retry is first
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1
+
+def test_same_sid_after_ttl_is_processed_again(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dedup_cache.time, 'monotonic', clock)
+    cache = DedupCache(max_size=10, ttl=60)
+    calls = []
+    factory = lambda: calls.append(1) or done(len(calls))
+    cache.get_or_create('SM1', factory)
+    clock.now += 61
+    future, created = cache.get_or_create('SM1', factory)
+    assert created and future.result() == 2
+    assert len(calls) == 2
+    assert cache.stats()['evictions'] == 1
+
+def test_pending_future_is_shared_until_it_completes():
+    cache = DedupCache(max_size=10, ttl=60)
+    source = Future()
+    first, _ = cache.get_or_create('SM1', lambda: source)
+    retry, created = cache.get_or_create('SM1', lambda: done('outro'))
+    assert not created and retry is first and not retry.done()
+    source.set_result('resposta')
+    assert retry.result() == 'resposta'
+
+def test_failed_sid_is_retried():
+    cache = DedupCache(max_size=10, ttl=60)
+    failed = Future()
+    failed.set_exception(RuntimeError('falhou'))
+    cache.get_or_create('SM1', lambda: failed)
+    future, created = cache.get_or_create('SM1', lambda: done('resposta'))
+    assert created and future.result() == 'resposta'
+
+def test_oldest_sid_is_evicted_beyond_max_size():
+    cache = DedupCache(max_size=2, ttl=60)
+    for sid in ('SM1', 'SM2', 'SM3'):
+        cache.get_or_create(sid, lambda: done(sid))
+    assert list(cache.entries) == ['SM2', 'SM3']
+    _, created = cache.get_or_create('SM1', lambda: done('de novo'))
+    assert created
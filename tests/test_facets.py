@@ -0,0 +1,26 @@
+from services.facets import count_facets
+
+ROWS = [
+    ('apartamento', 'centro', 2, 450000.0, 'venda'),
+    ('apartamento', 'trindade', 2, 2800.0, 'aluguel'),
+    ('casa', 'campeche', 3, 4500.0, 'aluguel'),
+    ('casa', 'jurere', 4, 1200000.0, 'venda'),
+]
+
+def test_price_buckets_follow_each_listing_operacao():
+    facets = count_facets(ROWS)
+    assert facets['price'] == {(300000, 500000): 1, (1000000, 2000000): 1, (2500, 4000): 1, (4000, 6000): 1}
+    assert (None, 300000) not in facets['price']
+
+def test_each_facet_ignores_its_own_filter():
+    facets = count_facets(ROWS, tipo='casa', min_quartos=4)
+    assert facets['total'] == 1
+    assert facets['tipo'] == {'casa': 1}
+    assert facets['quartos'] == {3: 1, 4: 1}
+    assert facets['bairro'] == {'jurere': 1}
+
+def test_listing_failing_two_filters_is_not_counted():
+    facets = count_facets(ROWS, tipo='casa', bairro='centro')
+    assert facets['total'] == 0
+    assert facets['tipo'] == {'apartamento': 1}
+    assert facets['bairro'] == {'campeche': 1, 'jurere': 1}
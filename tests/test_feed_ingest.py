@@ -0,0 +1,45 @@
+from services.feed_ingest import diff_feed
+
+CATALOG = {
+    'AP001': {'codigo': 'AP001', 'tipo': 'Apartamento', 'preco': '500.000,00', 'quartos': 2},
+    'AP002': {'codigo': 'AP002', 'tipo': 'Apartamento', 'preco': '650.000,00', 'quartos': 3},
+    'CA001': {'codigo': 'CA001', 'tipo': 'Casa', 'preco': '900.000,00', 'quartos': 4},
+}
+
+FEED = [
+    {'codigo': 'AP001', 'tipo': 'Apartamento', 'preco': '500.000,00', 'quartos': 2},
+    {'codigo': 'ap002', 'tipo': 'Apartamento', 'preco': '620.000,00', 'quartos': 3},
+    {'codigo': 'CA001', 'tipo': 'Casa', 'preco': '900.000,00', 'quartos': 4, 'vagas': '2'},
+    {'codigo': 'KT001', 'tipo': 'Kitnet', 'preco': '1.200,00', 'quartos': 1},
+]
+
+def diff(records, partial=False):
+    return diff_feed(iter(records), CATALOG.get, list(CATALOG), partial=partial)
+
+def codes(records):
+    return [r['codigo'] for r in records]
+
+def test_detects_added_changed_and_removed():
+    result = diff(FEED[1:])
+    assert codes(result.added) == ['KT001']
+    assert codes(result.changed) == ['ap002', 'CA001']
+    # Só AP002 mudou de preço; CA001 ganhou um campo
+    assert result.price_changed == ['AP002']
+    assert result.removed == ['AP001']
+    assert result.summary() == {'added': 1, 'changed': 2, 'price_changed': 1, 'removed': 1, 'unchanged': 0, 'skipped': 0}
+
+def test_partial_feed_does_not_remove_missing_listings():
+    result = diff(FEED[1:], partial=True)
+    assert codes(result.added) == ['KT001']
+    assert codes(result.changed) == ['ap002', 'CA001']
+    assert result.removed == []
+
+def test_identical_feed_is_empty_diff():
+    result = diff(FEED[:1] + [CATALOG['AP002'], CATALOG['CA001']])
+    assert not result
+    assert result.summary()['unchanged'] == 3
+
+def test_records_without_code_or_repeated_are_skipped():
+    result = diff([{'tipo': 'Casa'}, FEED[3], dict(FEED[3], preco='999,00')], partial=True)
+    assert codes(result.added) == ['KT001']
+    assert result.summary()['skipped'] == 2
@@ -0,0 +1,37 @@
+import pytest
+from services.gazetteer import Gazetteer
+
+BAIRROS = ['Centro', 'Saco Grande', 'Córrego Grande', 'Saco dos Limões', 'Jurerê', 'Jurerê Internacional',
+           'Santo Antônio de Lisboa', 'Canasvieiras']
+
+@pytest.fixture
+def gazetteer():
+    return Gazetteer.build(BAIRROS, ['Florianópolis', 'São José'], path='sem_arquivo.json')
+
+def name(match):
+    return match['name'] if match else None
+
+def test_exact_and_accent_insensitive(gazetteer):
+    assert gazetteer.find_in_text('moro no centro') == {'name': 'Centro', 'kind': 'bairro', 'confidence': 1.0}
+    assert name(gazetteer.find_in_text('casa em jurere internacional', 'bairro')) == 'Jurerê Internacional'
+    assert name(gazetteer.find_in_text('sao jose', 'cidade')) == 'São José'
+
+def test_typos(gazetteer):
+    assert name(gazetteer.find_in_text('perto do centor', 'bairro')) == 'Centro'
+    assert name(gazetteer.find_in_text('casa em canasvieras', 'bairro')) == 'Canasvieiras'
+    assert name(gazetteer.find_in_text('corego grande', 'bairro')) == 'Córrego Grande'
+    assert name(gazetteer.find_in_text('sako grande', 'bairro')) == 'Saco Grande'
+
+def test_partial_multi_word_name(gazetteer):
+    assert name(gazetteer.find_in_text('santo antonio', 'bairro')) == 'Santo Antônio de Lisboa'
+
+def test_casa_grande_is_not_a_bairro(gazetteer):
+    assert gazetteer.find_in_text('quero uma casa grande', 'bairro') is None
+    assert gazetteer.find_in_text('casa grande', 'bairro') is None
+
+def test_shared_word_alone_is_ambiguous(gazetteer):
+    assert gazetteer.find_in_text('grande', 'bairro') is None
+    assert gazetteer.find_in_text('algo no saco', 'bairro') is None
+
+def test_unrelated_text(gazetteer):
+    assert gazetteer.find_in_text('quero comprar um apartamento', 'bairro') is None
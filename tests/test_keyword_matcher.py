@@ -0,0 +1,69 @@
+import pytest
+from utils.keyword_matcher import KeywordMatcher, normalize
+
+TABLES = {
+    'greeting': ['oi', 'bom dia', 'boa noite'],
+    'photo': ['ver', 'foto'],
+    'family': ['família', 'filhos'],
+    'budget': ['quanto', 'quanto entrada', 'entrada'],
+    'views.sea': ['vista mar', 'vista para o mar'],
+    'views.other': ['vista'],
+}
+
+def matcher():
+    return KeywordMatcher(TABLES)
+
+def test_normalize_folds_accents_case_and_spaces():
+    assert normalize('  Rápido   JÁ\tfamília ') == 'rapido ja familia'
+
+def test_whole_words_only():
+    found = matcher().match('noite verde fotografia')
+    assert 'greeting' not in found
+    assert 'photo' not in found
+
+def test_word_at_text_edges_and_punctuation():
+    found = matcher().match('oi! quero ver, por favor')
+    assert found['greeting'] == ('oi',)
+    assert found['photo'] == ('ver',)
+
+def test_multi_word_pattern():
+    found = matcher().match('olá, boa noite!')
+    assert found['greeting'] == ('boa noite',)
+
+def test_multi_word_pattern_needs_every_word():
+    assert 'greeting' not in matcher().match('boa tarde, noite')
+
+def test_overlapping_patterns_all_found():
+    found = matcher().match('quanto entrada preciso?')
+    assert found['budget'] == ('quanto', 'quanto entrada', 'entrada')
+
+def test_failure_link_after_partial_match():
+    # "vista para" não termina "vista para o mar", mas "vista" sozinha ainda casa
+    found = matcher().match('vista para a lagoa')
+    assert 'views.sea' not in found
+    assert found['views.other'] == ('vista',)
+
+def test_accent_folding_in_text_and_keywords():
+    found = matcher().match('Minha FAMILIA e meus filhos')
+    assert found['family'] == ('família', 'filhos')
+
+def test_repeated_keyword_reported_once_in_text_order():
+    found = matcher().match('foto, ver, foto')
+    assert found['photo'] == ('foto', 'ver')
+
+def test_scan_positions_are_word_positions():
+    hits = matcher().scan('bom dia, quero ver')
+    assert ('greeting', 'bom dia', 0, 2) in hits
+    assert ('photo', 'ver', 3, 4) in hits
+
+def test_namespace_view_strips_prefix():
+    m = matcher()
+    assert m.match('vista para o mar', 'views') == {'sea': ('vista para o mar',), 'other': ('vista',)}
+    assert m.match('vista para o mar', 'missing') == {}
+
+def test_cached_result_is_reused_and_read_only():
+    m = matcher()
+    first = m.match('oi, quanto custa?')
+    assert m.match('oi, quanto custa?') is first
+    with pytest.raises(TypeError):
+        first['greeting'] = ()
@@ -0,0 +1,85 @@
+import time
+from datetime import timedelta
+import pytest
+from services.ai_service import AIService
+from services.message_analysis import MessageAnalyzer
+from services.property_service import PropertyService
+from handlers.message_handler import MessageHandler
+from utils.context_manager import ContextManager
+
+LISTINGS = [
+    {'codigo': 'AP001', 'lat': -27.5912, 'lon': -48.5478, 'tipo': 'Apartamento', 'operacao': 'venda', 'preco': '450.000,00', 'bairro': 'Centro',
+     'cidade': 'Florianópolis', 'quartos': 2, 'descricao': 'Apartamento reformado', 'destaque': 'Vista Mar'},
+    {'codigo': 'AP002', 'lat': -27.5890, 'lon': -48.5220, 'tipo': 'Apartamento', 'operacao': 'aluguel', 'preco': '2.800,00', 'bairro': 'Trindade',
+     'cidade': 'Florianópolis', 'quartos': 2, 'descricao': 'Perto da UFSC', 'destaque': 'Mobiliado'},
+    {'codigo': 'CA001', 'lat': -27.6600, 'lon': -48.5000, 'tipo': 'Casa', 'operacao': 'venda', 'preco': '95.000,00', 'bairro': 'Campeche',
+     'cidade': 'Florianópolis', 'quartos': 2, 'descricao': 'Casa simples', 'destaque': 'Quintal'},
+    {'codigo': 'CA002', 'lat': -27.6755, 'lon': -48.4825, 'tipo': 'Casa', 'operacao': 'aluguel', 'preco': '4.500,00', 'bairro': 'Campeche',
+     'cidade': 'Florianópolis', 'quartos': 3, 'descricao': 'Casa com piscina', 'destaque': 'Perto da Praia'},
+    {'codigo': 'CA003', 'lat': -27.4380, 'lon': -48.4995, 'tipo': 'Casa', 'operacao': 'venda', 'preco': '1.200.000,00', 'bairro': 'Jurerê',
+     'cidade': 'Florianópolis', 'quartos': 4, 'descricao': 'Casa em condomínio', 'destaque': 'Condomínio Fechado'},
+]
+
+@pytest.fixture
+def handler():
+    properties = PropertyService(properties=[dict(p) for p in LISTINGS], backend='index')
+    handler = MessageHandler(ai_service=AIService(), property_service=properties,
+                             analyzer=MessageAnalyzer(properties))
+    handler.process_message('oi', 'user')
+    return handler
+
+def codes(response):
+    return [line.split('Código: ')[1].strip() for line in response.splitlines() if 'Código: ' in line]
+
+def test_price_search_respects_tipo_in_message(handler):
+    response = handler.process_message('casa até 100 mil', 'user')
+    assert sorted(codes(response)) == ['CA001', 'CA002']
+
+def test_price_search_respects_tipo_and_operacao_in_message(handler):
+    response = handler.process_message('apartamento para comprar até 500 mil', 'user')
+    assert codes(response) == ['AP001']
+
+def test_price_search_keeps_earlier_preferences(handler):
+    handler.process_message('quero alugar', 'user')
+    response = handler.process_message('até 5 mil', 'user')
+    assert sorted(codes(response)) == ['AP002', 'CA002']
+
+def test_no_price_results_cheapest_respects_filters(handler):
+    # Casas para alugar são todas mais baratas que a faixa: a sugestão nunca fica "acima" com valor negativo
+    response = handler.process_message('casa para alugar entre 300 mil e 900 mil', 'user')
+    assert 'acima' not in response
+    assert '-' not in response.replace('R$ ', '')
+    assert 'CA002' in response
+
+def test_distance_applies_only_to_the_message_that_asks_for_it(handler):
+    response = handler.process_message('casa perto da praia', 'user')
+    assert sorted(codes(response)) == ['CA002', 'CA003']
+    assert 'near' in handler.conversations['user']['preferences']
+    response = handler.process_message('quero uma casa', 'user')
+    assert 'near' not in handler.conversations['user']['preferences']
+    assert sorted(codes(response)) == ['CA001', 'CA002', 'CA003']
+
+def test_price_search_after_distance_search_drops_distance(handler):
+    handler.process_message('casa perto da praia', 'user')
+    response = handler.process_message('até 200 mil', 'user')
+    assert sorted(codes(response)) == ['CA001', 'CA002']
+    assert 'near' not in handler.conversations['user']['preferences']
+
+def test_text_fallback_only_without_recognised_filters(handler):
+    response = handler.process_message('procuro algo com vista mar', 'user')
+    assert 'Pelo que você descreveu' in response
+    assert codes(response)[0] == 'AP001'
+
+def test_recognised_filters_without_results_do_not_fall_back_to_text(handler):
+    response = handler.process_message('apartamento 5 quartos no centro', 'user')
+    assert 'Pelo que você descreveu' not in response
+    assert codes(response) == []
+
+def test_idle_conversation_expires_through_context_manager(handler):
+    handler.contexts = ContextManager(timeout=timedelta(seconds=60), tick=1.0,
+                                      on_expire=lambda user_id, data: handler.conversations.discard(user_id))
+    handler.process_message('casa perto da praia', 'user')
+    assert handler.contexts.expire(time.monotonic() + 30) == 0
+    assert 'user' in handler.conversations
+    assert handler.contexts.expire(time.monotonic() + 61) == 1
+    assert 'user' not in handler.conversations
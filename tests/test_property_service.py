@@ -0,0 +1,51 @@
+import pytest
+from services import columnar_catalog
+from services.property_service import PropertyService
+
+def listing(code, tipo='Apartamento', operacao='venda', preco='500.000,00', bairro='Centro', quartos=2, **extra):
+    return dict({'codigo': code, 'tipo': tipo, 'operacao': operacao, 'preco': preco, 'bairro': bairro,
+                 'cidade': 'Florianópolis', 'quartos': quartos}, **extra)
+
+def codes(properties):
+    return [p['codigo'] for p in properties]
+
+@pytest.mark.skipif(columnar_catalog.np is None, reason='numpy não instalado')
+def test_numpy_backend_ranks_search_results():
+    properties = [listing('AP001', quartos=4, area='60'), listing('AP002', quartos=2, area='60'),
+                  listing('AP003', quartos=2, area='120', vagas='2'), listing('CA001', tipo='Casa')]
+    service = PropertyService(properties=properties, backend='numpy')
+    cursor = service.cursor_with_preferences({'tipo': 'apartamento', 'quartos': 2})
+    # Quartos exatos primeiro; entre eles, maior área e mais vagas
+    assert codes(cursor.next_page(5)) == ['AP003', 'AP002', 'AP001']
+    # A busca sem paginação continua na ordem do catálogo
+    assert codes(service.search_with_preferences({'tipo': 'apartamento', 'quartos': 2})) == ['AP001', 'AP002', 'AP003']
+
+def test_index_backend_keeps_catalog_order():
+    properties = [listing('AP001', quartos=4), listing('AP002', quartos=2)]
+    service = PropertyService(properties=properties, backend='index')
+    assert codes(service.cursor_with_preferences({'quartos': 2}).next_page(5)) == ['AP001', 'AP002']
+
+def test_relax_suggests_budget_that_unlocks_three_listings():
+    properties = [listing('AP010', preco='900.000,00'), listing('AP011', preco='300.000,00'),
+                  listing('AP012', preco='520.000,00'), listing('AP013', preco='450.000,00'),
+                  listing('AP014', preco='500.000,00'), listing('AP015', preco='Consulte'),
+                  listing('CA010', tipo='Casa', preco='100.000,00')]
+    service = PropertyService(properties=properties, backend='index')
+    preferences = {'tipo': 'apartamento', 'operacao': 'venda', 'max_price': 250000}
+    assert service.relax(preferences) == [{'field': 'max_price', 'value': 500000, 'unlocks': 3}]
+    # Dois já cabem no orçamento: o novo teto destrava os três seguintes (sem contar o "Consulte")
+    assert service.relax(dict(preferences, max_price=460000)) == [{'field': 'max_price', 'value': 900000, 'unlocks': 3}]
+    assert service.relax(dict(preferences, max_price=1000000)) == []
+
+def test_relax_suggests_fewer_rooms_and_neighbour_bairros():
+    properties = [listing('AP020', bairro='Centro', quartos=2, lat=-27.5954, lon=-48.5480),
+                  listing('AP021', bairro='Agronômica', quartos=3, lat=-27.5800, lon=-48.5350),
+                  listing('AP022', bairro='Agronômica', quartos=4, lat=-27.5810, lon=-48.5360),
+                  listing('AP023', bairro='Campeche', quartos=3, lat=-27.6800, lon=-48.4900)]
+    service = PropertyService(properties=properties, backend='index')
+    # Campeche fica a mais de 6 km do Centro: não é vizinho
+    assert service.relax({'bairro': 'centro', 'quartos': 3}) == [
+        {'field': 'bairro', 'value': 'agronômica', 'unlocks': 2},
+        {'field': 'quartos', 'value': 2, 'unlocks': 1},
+    ]
+    assert service.relax({'bairro': 'centro', 'quartos': 1}) == [{'field': 'bairro', 'value': 'agronômica', 'unlocks': 2}]
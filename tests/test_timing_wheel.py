@@ -0,0 +1,88 @@
+from utils.timing_wheel import TimingWheel
+
+def test_expires_at_deadline():
+    wheel = TimingWheel(tick=1.0, slots=10)
+    wheel.schedule('a', 3.5)
+    assert wheel.advance(3.0) == []
+    assert wheel.advance(3.5) == ['a']
+    assert 'a' not in wheel and len(wheel) == 0
+
+def test_postponed_deadline_does_not_expire_at_old_time():
+    wheel = TimingWheel(tick=1.0, slots=10)
+    wheel.schedule('a', 2)
+    wheel.schedule('a', 7)
+    assert wheel.advance(5) == []
+    assert 'a' in wheel
+    assert wheel.advance(6.9) == []
+    assert wheel.advance(7) == ['a']
+
+def test_brought_forward_deadline_expires_early():
+    wheel = TimingWheel(tick=1.0, slots=10)
+    wheel.schedule('a', 8)
+    wheel.schedule('a', 3)
+    assert wheel.advance(3) == ['a']
+    assert wheel.advance(9) == []
+
+def test_deadline_later_in_current_tick():
+    wheel = TimingWheel(tick=1.0, slots=10)
+    wheel.schedule('a', 4.8)
+    assert wheel.advance(4.2) == []
+    assert wheel.advance(4.8) == ['a']
+
+def test_deadline_beyond_one_rotation():
+    wheel = TimingWheel(tick=1.0, slots=10)
+    wheel.schedule('a', 25)
+    # O balde de 25 vira em 5 e 15 antes do prazo
+    assert wheel.advance(5) == []
+    assert wheel.advance(15) == []
+    assert wheel.advance(24.9) == []
+    assert wheel.advance(25) == ['a']
+
+def test_advance_more_than_one_rotation_at_once():
+    wheel = TimingWheel(tick=1.0, slots=10)
+    for i, deadline in enumerate((1, 9, 12, 29, 31)):
+        wheel.schedule(i, deadline)
+    assert sorted(wheel.advance(30)) == [0, 1, 2, 3]
+    assert wheel.advance(30.5) == []
+    assert wheel.advance(31) == [4]
+    assert len(wheel) == 0
+
+def test_schedule_in_the_past_expires_on_next_advance():
+    wheel = TimingWheel(tick=1.0, slots=10, now=50)
+    wheel.schedule('a', 10)
+    assert wheel.advance(50) == ['a']
+
+def test_cancel():
+    wheel = TimingWheel(tick=1.0, slots=10)
+    wheel.schedule('a', 2)
+    assert wheel.cancel('a') is True
+    assert wheel.cancel('a') is False
+    assert 'a' not in wheel
+    assert wheel.advance(20) == []
+
+def test_cancel_then_reschedule_later_ignores_old_bucket():
+    wheel = TimingWheel(tick=1.0, slots=10)
+    wheel.schedule('a', 2)
+    wheel.cancel('a')
+    wheel.schedule('a', 6)
+    assert wheel.advance(3) == []
+    assert 'a' in wheel
+    assert wheel.advance(6) == ['a']
+    assert wheel.advance(20) == []
+
+def test_cancel_then_reschedule_earlier():
+    wheel = TimingWheel(tick=1.0, slots=10)
+    wheel.schedule('a', 8)
+    wheel.cancel('a')
+    wheel.schedule('a', 2)
+    assert wheel.advance(2) == ['a']
+    assert wheel.advance(9) == []
+
+def test_fractional_tick():
+    wheel = TimingWheel(tick=0.5, slots=4)
+    wheel.schedule('a', 1.2)
+    wheel.schedule('b', 3.1)
+    assert wheel.advance(1.0) == []
+    assert wheel.advance(1.2) == ['a']
+    assert wheel.advance(3.0) == []
+    assert wheel.advance(3.1) == ['b']
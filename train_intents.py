@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Treina o classificador de intenções com data/intents.json e salva data/intent_model.npz
+Execute: python train_intents.py [--avaliar] [--dados arquivo.json] [--modelo arquivo.npz]
+--avaliar: separa 20% dos exemplos para teste e mostra acurácia por intenção
+O bot carrega o modelo salvo; sem ele, treina na inicialização
+"""
+
+import sys
+import time
+from services.intent_classifier import (CONFIDENCE_THRESHOLD, DATA_PATH, MODEL_PATH, IntentClassifier,
+                                        load_examples, split_examples)
+
+def evaluate(examples):
+    train, test = split_examples(examples)
+    model = IntentClassifier.train(train)
+    report = model.evaluate(test)
+    
+    print(f"🧪 {len(train)} exemplos de treino, {len(test)} de teste\n")
+    print(f"{'intenção':<18} {'precisão':>9} {'recall':>7} {'exemplos':>9}")
+    for intent, metrics in report['per_intent'].items():
+        print(f"{intent:<18} {metrics['precision']:>9.2f} {metrics['recall']:>7.2f} {metrics['support']:>9}")
+    
+    print(f"\n🎯 Acurácia: {report['accuracy']:.1%}")
+    print(f"🤖 Decididas localmente (confiança >= {CONFIDENCE_THRESHOLD}): {report['coverage']:.1%}, "
+          f"com acurácia de {report['confident_accuracy']:.1%}; o resto vai para o LLM")
+    
+    mistakes = [(expected, got, n) for expected, row in report['confusion'].items()
+                for got, n in row.items() if got != expected]
+    if mistakes:
+        print("\nConfusões mais comuns:")
+        for expected, got, n in sorted(mistakes, key=lambda item: -item[2])[:5]:
+            print(f"  {expected} -> {got}: {n}")
+    print()
+
+def train(data_path, model_path):
+    examples = load_examples(data_path)
+    print(f"📚 {len(examples)} exemplos em {data_path}")
+    
+    if '--avaliar' in sys.argv:
+        evaluate(examples)
+    
+    t0 = time.perf_counter()
+    model = IntentClassifier.train(examples)
+    print(f"✅ Treinado em {(time.perf_counter() - t0) * 1000:.0f}ms com {len(model.labels)} intenções")
+    
+    model.save(model_path)
+    print(f"💾 Modelo salvo em {model_path}")
+    
+    # Tempo de uma predição (o que o bot paga por mensagem)
+    sample = [text for text, _ in examples[:200]]
+    t0 = time.perf_counter()
+    for text in sample:
+        model.predict(text)
+    print(f"⚡ {(time.perf_counter() - t0) / len(sample) * 1e6:.0f}µs por mensagem")
+
+def _option(name, default):
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return default
+
+if __name__ == "__main__":
+    train(_option('--dados', DATA_PATH), _option('--modelo', MODEL_PATH))
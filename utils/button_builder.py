@@ -1,3 +1,11 @@
+from utils import keyword_matcher
+
+KEYWORDS = {
+    'buy': ['comprar', 'venda', 'compra'],
+    'rent': ['alugar', 'aluguel', 'locação']
+}
+keyword_matcher.register('buttons', KEYWORDS)
+
 class ButtonBuilder:
     """Constrói botões interativos para WhatsApp"""
     
@@ -38,11 +46,11 @@ class ButtonBuilder:
     
     def get_contextual_buttons(self, text: str) -> list:
         """Botões contextuais baseados no texto"""
-        text_lower = text.lower()
+        found = keyword_matcher.match(text, 'buttons')
         
-        if any(word in text_lower for word in ['comprar', 'venda', 'compra']):
+        if 'buy' in found:
             return [{"id": "search_buy", "title": "🏠 Ver Imóveis à Venda"}]
-        elif any(word in text_lower for word in ['alugar', 'aluguel', 'locação']):
+        elif 'rent' in found:
             return [{"id": "search_rent", "title": "🔑 Ver Imóveis para Alugar"}]
         else:
             return self.get_main_menu()
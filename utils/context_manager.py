@@ -1,34 +1,68 @@
 import json
+import logging
 import os
+import threading
+import time
 from datetime import datetime, timedelta
+from utils.timing_wheel import TimingWheel
+
+logger = logging.getLogger(__name__)
 
 class ContextManager:
-    """Gerencia contexto das conversas para manter coerência"""
+    """Gerencia contexto das conversas para manter coerência.
+    
+    Contextos parados há mais de `timeout` saem sozinhos: start() liga uma
+    thread que a cada `tick` segundos vira uma roda de tempo e remove só os
+    que venceram, sem percorrer todos os usuários. `on_expire(user_id, data)`
+    é chamado para cada contexto vencido (ex.: arquivar a conversa ou
+    enfileirar uma mensagem de retomada).
+    """
     
-    def __init__(self):
+    def __init__(self, timeout=timedelta(hours=24), on_expire=None, tick=60.0):
         self.contexts = {}
-        self.context_timeout = timedelta(hours=24)
+        self.context_timeout = timeout
+        self.on_expire = on_expire
+        self.tick = tick
+        self.expired = 0
+        # Uma volta da roda cobre o timeout: cada contexto é visto uma vez ao vencer
+        slots = max(1, int(timeout.total_seconds() // tick) + 1)
+        self._wheel = TimingWheel(tick=tick, slots=slots, now=time.monotonic())
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
     
     def get_context(self, user_id: str) -> dict:
         """Recupera contexto do usuário"""
-        if user_id not in self.contexts:
-            return {}
-        
-        context = self.contexts[user_id]
+        with self._lock:
+            if user_id not in self.contexts:
+                return {}
+            
+            context = self.contexts[user_id]
+            
+            # Verifica timeout (entre uma virada da roda e outra)
+            if datetime.now() - context.get('last_update', datetime.now()) > self.context_timeout:
+                self._wheel.cancel(user_id)
+                del self.contexts[user_id]
+                self.expired += 1
+            else:
+                return context.get('data', {})
         
-        # Verifica timeout
-        if datetime.now() - context.get('last_update', datetime.now()) > self.context_timeout:
-            self.clear_context(user_id)
-            return {}
-        
-        return context.get('data', {})
+        self._notify([(user_id, context.get('data', {}))])
+        return {}
     
     def set_context(self, user_id: str, data: dict):
         """Define novo contexto"""
-        self.contexts[user_id] = {
-            'data': data,
-            'last_update': datetime.now()
-        }
+        self._set(user_id, data, datetime.now())
+    
+    def _set(self, user_id, data, last_update):
+        # Prazo em tempo monotônico: mudar o relógio do sistema não expira ninguém antes da hora
+        remaining = (self.context_timeout - (datetime.now() - last_update)).total_seconds()
+        with self._lock:
+            self.contexts[user_id] = {
+                'data': data,
+                'last_update': last_update
+            }
+            self._wheel.schedule(user_id, time.monotonic() + remaining)
     
     def update_context(self, user_id: str, updates: dict):
         """Atualiza contexto existente"""
@@ -38,17 +72,69 @@ class ContextManager:
     
     def clear_context(self, user_id: str):
         """Limpa contexto do usuário"""
-        if user_id in self.contexts:
-            del self.contexts[user_id]
+        with self._lock:
+            if user_id in self.contexts:
+                del self.contexts[user_id]
+            self._wheel.cancel(user_id)
+    
+    def expire(self, now=None):
+        """Remove os contextos vencidos até `now` (time.monotonic()) e chama on_expire; retorna quantos"""
+        with self._lock:
+            due = self._wheel.advance(time.monotonic() if now is None else now)
+            removed = [(user_id, self.contexts.pop(user_id)['data']) for user_id in due if user_id in self.contexts]
+            self.expired += len(removed)
+        
+        # Fora do lock: o hook pode demorar (gravar arquivo, enfileirar mensagem)
+        self._notify(removed)
+        return len(removed)
+    
+    def _notify(self, removed):
+        if self.on_expire is None:
+            return
+        for user_id, data in removed:
+            try:
+                self.on_expire(user_id, data)
+            except Exception as e:
+                logger.error(f"Erro no on_expire de {user_id}: {e}", exc_info=True)
+    
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='context-expiry', daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.wait(self.tick):
+            try:
+                self.expire()
+            except Exception as e:
+                logger.error(f"Erro ao expirar contextos: {e}", exc_info=True)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'contexts': len(self.contexts),
+                'scheduled': len(self._wheel),
+                'expired': self.expired,
+                'timeout_seconds': self.context_timeout.total_seconds()
+            }
     
     def save_to_file(self, filepath: str = 'contexts.json'):
         """Salva contextos em arquivo (opcional)"""
         data = {}
-        for user_id, context in self.contexts.items():
-            data[user_id] = {
-                'data': context['data'],
-                'last_update': context['last_update'].isoformat()
-            }
+        with self._lock:
+            for user_id, context in self.contexts.items():
+                data[user_id] = {
+                    'data': context['data'],
+                    'last_update': context['last_update'].isoformat()
+                }
         
         with open(filepath, 'w') as f:
             json.dump(data, f)
@@ -61,8 +147,6 @@ class ContextManager:
         with open(filepath, 'r') as f:
             data = json.load(f)
         
+        # Já vencidos expiram na próxima virada da roda
         for user_id, context in data.items():
-            self.contexts[user_id] = {
-                'data': context['data'],
-                'last_update': datetime.fromisoformat(context['last_update'])
-            }
+            self._set(user_id, context['data'], datetime.fromisoformat(context['last_update']))
@@ -0,0 +1,228 @@
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict, deque
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+def approximate_size(obj, _seen=None):
+    """Bytes aproximados de dicts/listas/strings aninhados; outros objetos contam só o próprio tamanho"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(key, seen) + approximate_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(approximate_size(item, seen) for item in obj)
+    return size
+
+class ConversationStore(MutableMapping):
+    """Conversas por número com orçamento de memória fixo.
+    
+    - `history` de cada conversa vira um buffer circular (deque) com as
+      últimas history_size mensagens
+    - passando de max_users conversas ou de max_bytes (aproximados), sai a
+      conversa usada há mais tempo
+    - com spill_dir, a conversa que sai é gravada em disco e volta
+      sozinha na próxima mensagem do número; sem ele, é descartada
+    
+    Enquanto uma mensagem do número é processada, `with store.pinned(número)`
+    segura a conversa na memória: ela não sai no meio do atendimento (o que
+    deixaria as alterações num dict solto e o arquivo em disco velho).
+    
+    Campos em `transient` (ex.: o cursor de paginação, que aponta para o
+    catálogo) não vão para o disco. Funciona como um dict: `in`, [], get()
+    e del consideram também as conversas em disco; len() e a iteração só
+    as que estão na memória.
+    """
+    
+    def __init__(self, max_users=10000, max_bytes=64 * 1024 * 1024, history_size=20, spill_dir=None,
+                 transient=('cursor',)):
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self.history_size = history_size
+        self.spill_dir = spill_dir
+        self.transient = tuple(transient)
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.bytes = 0
+        self.evictions = 0
+        self.spilled = 0
+        self.restored = 0
+        # Quem pega uma conversa altera o dict depois (history.append): o tamanho é remedido no próximo acesso
+        self._dirty = set()
+        # Número -> quantos atendimentos em andamento seguram a conversa
+        self._pins = {}
+        self._lock = threading.RLock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+    
+    def _path(self, key):
+        # Hash do número: nome de arquivo seguro para "whatsapp:+55..."
+        return os.path.join(self.spill_dir, hashlib.sha1(str(key).encode('utf-8')).hexdigest() + '.pkl')
+    
+    def _prepare(self, value):
+        history = value.get('history') if isinstance(value, dict) else None
+        if history is not None and not (isinstance(history, deque) and history.maxlen == self.history_size):
+            value['history'] = deque(history, maxlen=self.history_size)
+        return value
+    
+    def __getitem__(self, key):
+        with self._lock:
+            self._measure()
+            value = self.entries.get(key)
+            if value is None:
+                value = self._restore(key)
+                if value is None:
+                    raise KeyError(key)
+                self._store(key, value)
+            else:
+                self.entries.move_to_end(key)
+                self._dirty.add(key)
+            return value
+    
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._measure()
+            self._store(key, self._prepare(value))
+    
+    def __delitem__(self, key):
+        with self._lock:
+            found = key in self.entries
+            if found:
+                del self.entries[key]
+                self.bytes -= self.sizes.pop(key)
+                self._dirty.discard(key)
+            if self.spill_dir and os.path.exists(self._path(key)):
+                os.remove(self._path(key))
+                found = True
+            if not found:
+                raise KeyError(key)
+    
+    def __contains__(self, key):
+        with self._lock:
+            return key in self.entries or bool(self.spill_dir and os.path.exists(self._path(key)))
+    
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self.entries))
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def _store(self, key, value):
+        if key in self.entries:
+            self.bytes -= self.sizes[key]
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self.sizes[key] = approximate_size(value)
+        self.bytes += self.sizes[key]
+        self._dirty.add(key)
+        self._evict()
+    
+    def _measure(self):
+        for key in self._dirty:
+            if key in self.entries:
+                size = approximate_size(self.entries[key])
+                self.bytes += size - self.sizes[key]
+                self.sizes[key] = size
+        self._dirty.clear()
+        self._evict()
+    
+    @contextmanager
+    def pinned(self, key):
+        """Segura a conversa de `key` na memória até o fim do bloco (pode ser criada dentro dele)"""
+        with self._lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._pins[key] == 1:
+                    del self._pins[key]
+                else:
+                    self._pins[key] -= 1
+                # O que foi escrito durante o atendimento entra na conta agora
+                if key in self.entries:
+                    self._dirty.add(key)
+                self._measure()
+    
+    def discard(self, key):
+        """Remove a conversa (da memória e do disco) se nenhuma mensagem dela estiver em atendimento.
+        
+        Para quem expira conversas paradas de outra thread: a que acabou de
+        receber mensagem (pinned) fica. Retorna se removeu.
+        """
+        with self._lock:
+            if key in self._pins or key not in self:
+                return False
+            del self[key]
+            return True
+    
+    def _evict(self):
+        # A conversa mais recente e as seguras por pinned() nunca saem, mesmo acima do orçamento
+        while len(self.entries) > 1 and (len(self.entries) > self.max_users or self.bytes > self.max_bytes):
+            newest = next(reversed(self.entries))
+            key = next((key for key in self.entries if key not in self._pins), newest)
+            if key == newest:
+                break
+            value = self.entries.pop(key)
+            self.bytes -= self.sizes.pop(key)
+            self._dirty.discard(key)
+            self.evictions += 1
+            if self.spill_dir:
+                self._spill(key, value)
+    
+    def _spill(self, key, value):
+        if isinstance(value, dict):
+            value = {field: item for field, item in value.items() if field not in self.transient}
+        try:
+            with open(self._path(key), 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.spilled += 1
+        except Exception as e:
+            logger.warning(f"Erro ao gravar conversa de {key} em disco: {e}")
+    
+    def _restore(self, key):
+        if not self.spill_dir:
+            return None
+        path = self._path(key)
+        try:
+            # Arquivos gravados por este próprio processo em spill_dir
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Erro ao ler conversa de {key} do disco: {e}")
+            return None
+        os.remove(path)
+        self.restored += 1
+        if isinstance(value, dict):
+            for field in self.transient:
+                value.setdefault(field, None)
+        return self._prepare(value)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            self._measure()
+            on_disk = len(os.listdir(self.spill_dir)) if self.spill_dir else 0
+            return {
+                'users': len(self.entries),
+                'bytes': self.bytes,
+                'max_users': self.max_users,
+                'max_bytes': self.max_bytes,
+                'history_size': self.history_size,
+                'evictions': self.evictions,
+                'pinned': len(self._pins),
+                'on_disk': on_disk,
+                'spilled': self.spilled,
+                'restored': self.restored
+            }
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+class DedupCache:
+    """Cache limitado com TTL que evita processar a mesma mensagem duas vezes.
+
+    Guarda um Future por chave (MessageSid): um retry do Twilio recebe o
+    mesmo Future, esteja o processamento original ainda rodando ou já concluído.
+    """
+
+    def __init__(self, max_size=10000, ttl=600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        """Retorna (future, criado).
+
+        Na primeira vez chama factory(), que deve devolver um Future (ou None
+        se não conseguiu enfileirar). Quem chegar depois com a mesma chave
+        recebe o mesmo Future em vez de iniciar outro processamento.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+
+            entry = self.entries.get(key)
+            if entry is not None:
+                future, _ = entry
+                # Falhou antes: deixa o retry tentar de novo
+                if not (future.done() and future.exception() is not None):
+                    self.hits += 1
+                    return future, False
+                del self.entries[key]
+
+            self.misses += 1
+            future = Future()
+            self.entries[key] = (future, now)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+        # factory() roda fora do lock: pode bloquear enquanto a fila está cheia
+        try:
+            source = factory()
+        except Exception as e:
+            self._discard(key, future)
+            future.set_exception(e)
+            raise
+
+        if source is None:
+            self._discard(key, future)
+            future.set_result(None)
+            return None, True
+
+        source.add_done_callback(lambda done: self._copy_result(done, future))
+        return future, True
+
+    def _copy_result(self, source, future):
+        if source.exception() is not None:
+            future.set_exception(source.exception())
+        else:
+            future.set_result(source.result())
+
+    def _discard(self, key, future):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] is future:
+                del self.entries[key]
+
+    def _evict_expired(self, now):
+        # Entradas ficam em ordem de inserção, então as expiradas estão no início
+        while self.entries:
+            key, (_, created_at) = next(iter(self.entries.items()))
+            if now - created_at <= self.ttl:
+                break
+            del self.entries[key]
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,183 @@
+import importlib
+import re
+import threading
+import unicodedata
+from collections import deque
+from types import MappingProxyType
+from utils.lru_cache import LRUCache
+
+_WORD = re.compile(r'\w+')
+
+def normalize(text):
+    """Minúsculas, sem acentos e com espaços simples: 'Rápido  Já' -> 'rapido ja'"""
+    text = text.lower()
+    if not text.isascii():
+        # NFKD separa letra e acento; o encode descarta o acento (e emojis) em C
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(text.split())
+
+class KeywordMatcher:
+    """Automato Aho-Corasick, palavra a palavra, com as palavras-chave de várias categorias.
+    
+    Uma única passada pelas palavras do texto normalizado acha todas as
+    palavras-chave (e expressões como "boa noite") de todas as categorias.
+    Só casa palavra inteira: "ver" não casa com "verde", "oi" não casa
+    com "noite".
+    
+    match(texto) devolve {categoria: (palavras encontradas, na ordem)} e
+    guarda o resultado: os vários classificadores que olham a mesma
+    mensagem reaproveitam a mesma varredura.
+    """
+    
+    def __init__(self, tables, cache_size=1024):
+        # Estado 0 é a raiz; out[estado]: (nº de palavras, categoria, palavra-chave original)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        
+        for category, keywords in tables.items():
+            for keyword in keywords:
+                words = _WORD.findall(normalize(keyword))
+                if not words:
+                    continue
+                state = 0
+                for word in words:
+                    nxt = self.goto[state].get(word)
+                    if nxt is None:
+                        nxt = len(self.goto)
+                        self.goto.append({})
+                        self.fail.append(0)
+                        self.out.append([])
+                        self.goto[state][word] = nxt
+                    state = nxt
+                self.out[state].append((len(words), category, keyword))
+        
+        # Links de falha em largura: o maior sufixo do estado que também é prefixo de alguma expressão
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(word, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+        
+        # Transições completas (já seguindo os links de falha): um get por palavra na varredura.
+        # Em largura, o estado de falha (mais raso) sempre fica pronto antes
+        self.delta = [None] * len(self.goto)
+        self.delta[0] = self.goto[0]
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self.delta[state] = {**self.delta[self.fail[state]], **self.goto[state]}
+            queue.extend(self.goto[state].values())
+        
+        self._cache = LRUCache(max_size=cache_size, ttl=float('inf'))
+        self._last = (None, None)
+    
+    def scan(self, text):
+        """Todas as ocorrências: lista de (categoria, palavra-chave, início, fim), em posições de palavra"""
+        delta, out = self.delta, self.out
+        hits = []
+        state = 0
+        for i, word in enumerate(_WORD.findall(normalize(text))):
+            state = delta[state].get(word, 0)
+            if out[state]:
+                for length, category, keyword in out[state]:
+                    hits.append((category, keyword, i - length + 1, i + 1))
+        return hits
+    
+    def match(self, text, namespace=None):
+        """{categoria: palavras encontradas (sem repetir, na ordem do texto)}; somente leitura.
+        
+        Categorias 'namespace.categoria' já saem separadas por namespace:
+        com namespace, só as dele e sem o prefixo.
+        """
+        return self._views(text).get(namespace, _EMPTY)
+    
+    def views(self, text):
+        """{namespace: {categoria: palavras}} de uma vez; a chave None é a visão completa"""
+        return self._views(text)
+    
+    def _views(self, text):
+        # Os classificadores de uma mensagem perguntam em sequência: a última resposta
+        # fica à mão, sem passar pelo lock do LRU (tupla trocada de uma vez, segura entre threads)
+        last_text, views = self._last
+        if last_text != text:
+            views = self._cache.get_or_compute(text, lambda: self._group(self.scan(text)))
+            self._last = (text, views)
+        return views
+    
+    @staticmethod
+    def _group(hits):
+        # dict como conjunto ordenado: palavras sem repetir, na ordem em que aparecem
+        found = {}
+        for category, keyword, _, _ in hits:
+            found.setdefault(category, {})[keyword] = None
+        
+        views = {None: {}}
+        for category, keywords in found.items():
+            keywords = tuple(keywords)
+            views[None][category] = keywords
+            namespace, dot, name = category.partition('.')
+            if dot:
+                views.setdefault(namespace, {})[name] = keywords
+        return MappingProxyType({namespace: MappingProxyType(view) for namespace, view in views.items()})
+
+_EMPTY = MappingProxyType({})
+
+# Módulos que registram tabelas (register() ao serem importados). O automato
+# compartilhado importa todos antes de ser montado: o que ele reconhece não
+# depende de quais classificadores alguém já importou
+TABLE_MODULES = (
+    'handlers.message_handler',
+    'services.image_service',
+    'services.language_detector',
+    'services.lead_scorer',
+    'services.sentiment_analyzer',
+    'utils.button_builder',
+)
+
+_tables = {}
+_shared = None
+_loaded = False
+_lock = threading.Lock()
+
+def register(namespace, table):
+    """Registra as categorias de um classificador ({categoria: [palavras]}) como 'namespace.categoria'"""
+    global _shared
+    entries = {f"{namespace}.{category}": tuple(keywords) for category, keywords in table.items()}
+    with _lock:
+        if any(_tables.get(name) != keywords for name, keywords in entries.items()):
+            _tables.update(entries)
+            _shared = None
+
+def _load_tables():
+    global _loaded
+    if not _loaded:
+        # Fora do _lock: o register() de cada módulo o usa
+        for module in TABLE_MODULES:
+            importlib.import_module(module)
+        _loaded = True
+
+def shared():
+    """O automato com as palavras de todos os classificadores (montado sob demanda)"""
+    global _shared
+    matcher = _shared
+    if matcher is None:
+        _load_tables()
+        with _lock:
+            if _shared is None:
+                _shared = KeywordMatcher(_tables)
+            matcher = _shared
+    return matcher
+
+def match(text, namespace=None):
+    """Categorias encontradas no texto; com namespace, só as dele e sem o prefixo"""
+    return shared().match(text, namespace)
+
+def views(text):
+    """Categorias encontradas no texto, já separadas por namespace (ver KeywordMatcher.views)"""
+    return shared().views(text)
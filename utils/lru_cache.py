@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+
+class LRUCache:
+    """Cache LRU com TTL e contadores de acerto.
+    
+    Passando de max_size, sai a entrada usada há mais tempo; entradas mais
+    velhas que ttl segundos são descartadas na próxima leitura. Os contadores
+    (hits, misses, evictions, expirations) ajudam a calibrar o tamanho.
+    """
+    
+    def __init__(self, max_size=1000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+    
+    def get_or_compute(self, key, compute):
+        """Valor da chave; na falta chama compute() (fora do lock) e guarda o resultado"""
+        if self.max_size <= 0:
+            return compute()
+        
+        now = time.monotonic()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at <= self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+                self.expirations += 1
+            self.misses += 1
+        
+        value = compute()
+        
+        with self._lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value
+    
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,120 @@
+import logging
+import queue
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+class _Shard:
+    """Uma fila + uma thread: mensagens do mesmo remetente saem em ordem"""
+
+    def __init__(self, index, max_queue, name):
+        self.index = index
+        self.tasks = queue.Queue(maxsize=max_queue)
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        # rejected é incrementado pelas threads do Flask; os outros contadores só por esta
+        self._lock = threading.Lock()
+        self.busy = False
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=500)
+        self.thread = threading.Thread(target=self._run, name=f"{name}-{index}", daemon=True)
+        self.thread.start()
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def _run(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                self.tasks.task_done()
+                break
+
+            future, fn, args, kwargs, enqueued_at = task
+            wait = time.monotonic() - enqueued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.recent_waits.append(wait)
+
+            self.busy = True
+            try:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(fn(*args, **kwargs))
+                self.processed += 1
+            except Exception as e:
+                logger.error(f"Erro no shard {self.index}: {e}", exc_info=True)
+                future.set_exception(e)
+                self.failed += 1
+            finally:
+                self.busy = False
+                self.tasks.task_done()
+
+    def stats(self) -> dict:
+        waits = sorted(self.recent_waits)
+        done = self.processed + self.failed
+        with self._lock:
+            rejected = self.rejected
+        return {
+            'shard': self.index,
+            'queue_depth': self.tasks.qsize(),
+            'busy': self.busy,
+            'processed': self.processed,
+            'failed': self.failed,
+            'rejected': rejected,
+            'avg_wait_ms': round(self.total_wait / done * 1000, 2) if done else 0.0,
+            'p95_wait_ms': round(waits[int(len(waits) * 0.95) - 1] * 1000, 2) if waits else 0.0,
+            'max_wait_ms': round(self.max_wait * 1000, 2)
+        }
+
+class ShardedDispatcher:
+    """Distribui tarefas por chave (número do remetente) entre N shards.
+
+    Tarefas com a mesma chave caem sempre no mesmo shard e rodam em ordem;
+    chaves diferentes rodam em paralelo.
+    """
+
+    def __init__(self, num_shards=4, max_queue=100, enqueue_timeout=2.0, name='shard'):
+        self.enqueue_timeout = enqueue_timeout
+        self.shards = [_Shard(i, max_queue, name) for i in range(num_shards)]
+
+    def shard_for(self, key: str) -> int:
+        # crc32 é estável entre processos, ao contrário de hash()
+        return zlib.crc32(key.encode('utf-8')) % len(self.shards)
+
+    def submit(self, key: str, fn, *args, **kwargs):
+        """Enfileira a tarefa no shard da chave; retorna um Future ou None se a fila estiver cheia"""
+        shard = self.shards[self.shard_for(key)]
+        future = Future()
+        try:
+            shard.tasks.put((future, fn, args, kwargs, time.monotonic()), timeout=self.enqueue_timeout)
+        except queue.Full:
+            shard.reject()
+            return None
+        return future
+
+    def shutdown(self, wait=True):
+        """Encerra os shards depois de esvaziar as filas"""
+        for shard in self.shards:
+            shard.tasks.put(None)
+        if wait:
+            for shard in self.shards:
+                shard.thread.join()
+
+    def stats(self) -> dict:
+        shards = [shard.stats() for shard in self.shards]
+        return {
+            'shards': len(shards),
+            'queue_depth': sum(s['queue_depth'] for s in shards),
+            'processed': sum(s['processed'] for s in shards),
+            'failed': sum(s['failed'] for s in shards),
+            'rejected': sum(s['rejected'] for s in shards),
+            'max_wait_ms': max((s['max_wait_ms'] for s in shards), default=0.0),
+            'per_shard': shards
+        }
@@ -0,0 +1,64 @@
+class TimingWheel:
+    """Roda de tempo: prazos agrupados em baldes de `tick` segundos.
+    
+    advance(agora) só visita os baldes dos ticks que passaram, nunca a lista
+    inteira de chaves; cada chave está em um balde por vez. Adiar um prazo
+    (schedule de novo com um prazo maior) só troca o número guardado: quando
+    o balde antigo vira, a chave ainda não venceu e é movida para o balde
+    do prazo novo. Custo amortizado O(1) por schedule, cancel e expiração.
+    
+    Prazos além de uma volta (slots * tick) ficam no balde certo e são
+    reavaliados a cada volta até vencerem.
+    """
+    
+    def __init__(self, tick=1.0, slots=3600, now=0.0):
+        self.tick = tick
+        self.slots = slots
+        self.buckets = [set() for _ in range(slots)]
+        self.deadlines = {}
+        self._current = self._tick_of(now)
+    
+    def _tick_of(self, moment):
+        return int(moment // self.tick)
+    
+    def schedule(self, key, deadline):
+        """Agenda (ou reagenda) a chave para vencer em `deadline`"""
+        previous = self.deadlines.get(key)
+        self.deadlines[key] = deadline
+        # Prazo adiado: a chave continua no balde antigo e é movida quando ele virar
+        if previous is None or deadline < previous:
+            self.buckets[max(self._tick_of(deadline), self._current) % self.slots].add(key)
+    
+    def cancel(self, key):
+        # As cópias nos baldes são ignoradas quando eles virarem
+        return self.deadlines.pop(key, None) is not None
+    
+    def __contains__(self, key):
+        return key in self.deadlines
+    
+    def __len__(self):
+        return len(self.deadlines)
+    
+    def advance(self, now):
+        """Chaves vencidas até `now` (removidas da roda), na ordem dos baldes"""
+        target = self._tick_of(now)
+        expired = []
+        # Atraso maior que uma volta: basta virar cada balde uma vez
+        first = max(self._current, target - self.slots + 1)
+        for tick in range(first, target + 1):
+            bucket = self.buckets[tick % self.slots]
+            if not bucket:
+                continue
+            self.buckets[tick % self.slots] = set()
+            for key in bucket:
+                deadline = self.deadlines.get(key)
+                if deadline is None:
+                    continue
+                if deadline <= now:
+                    del self.deadlines[key]
+                    expired.append(key)
+                else:
+                    # Adiado, mais de uma volta à frente ou vence ainda neste tick (o balde atual é revisto no próximo advance)
+                    self.buckets[max(self._tick_of(deadline), target) % self.slots].add(key)
+        self._current = target
+        return expired